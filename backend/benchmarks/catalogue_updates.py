@@ -0,0 +1,89 @@
+"""Benchmark live catalogue updates at increasing catalogue sizes.
+
+Times a single upsert, a single delete and a batch of 100 mixed deltas on the
+scalar and vectorized engines (incremental, copy-on-write snapshot updates),
+next to a full rebuild for reference. Run from the backend directory:
+
+    python -m benchmarks.catalogue_updates --sizes 1000 10000 100000
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from typing import Any, Dict, List
+
+from recommendation_engine import RecommendationEngine
+from benchmarks.synthetic import generate_internship, write_catalogue
+
+
+def timed(function, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 3)
+
+
+def run_size(size: int, vectorized: bool, repeat: int, seed: int = 11) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    path = write_catalogue(size)
+    start = time.perf_counter()
+    engine = RecommendationEngine(vectorized=vectorized, data_path=path)
+    build_ms = round((time.perf_counter() - start) * 1000, 3)
+    next_id = [size]
+    live_ids = list(engine.snapshot.id_positions)
+
+    def new_internship() -> Dict[str, Any]:
+        next_id[0] += 1
+        internship = generate_internship(rng, next_id[0])
+        live_ids.append(internship["id"])
+        return internship
+
+    def live_id(remove: bool = False) -> str:
+        index = rng.randrange(len(live_ids))
+        internship_id = live_ids[index]
+        if remove:
+            live_ids[index] = live_ids[-1]
+            live_ids.pop()
+        return internship_id
+
+    def update_existing():
+        internship = generate_internship(rng, size)
+        internship["id"] = live_id()
+        engine.apply_deltas([("upsert", internship)])
+
+    def batch():
+        deltas: List = []
+        for _ in range(100):
+            if rng.random() < 0.3:
+                deltas.append(("delete", live_id(remove=True)))
+            else:
+                deltas.append(("upsert", new_internship()))
+        engine.apply_deltas(deltas)
+
+    return {
+        "size": size,
+        "vectorized": vectorized,
+        "full_build_ms": build_ms,
+        "add_one_ms": timed(lambda: engine.apply_deltas([("upsert", new_internship())]), repeat),
+        "update_one_ms": timed(update_existing, repeat),
+        "delete_one_ms": timed(lambda: engine.apply_deltas([("delete", live_id(remove=True))]), repeat),
+        "batch_100_ms": timed(batch, max(1, repeat // 4)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--scalar-only", action="store_true", help="Skip the NumPy engine")
+    args = parser.parse_args()
+    modes = [False] if args.scalar_only else [False, True]
+    results = [run_size(size, vectorized, args.repeat) for size in args.sizes for vectorized in modes]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Recommendation engine benchmark suite.
+
+For every catalogue size and engine mode, a fresh process (so peak memory and
+startup are measured in isolation) loads a synthetic catalogue and reports:
+
+- ``startup_s``: engine construction time (catalogue load and index builds)
+- ``latency``: ``get_recommendations`` latency percentiles over random profiles
+- ``throughput_per_s``: sequential profiles scored per second
+- ``peak_rss_mb``: peak resident memory of the process
+- ``api``: end-to-end ``POST /recommend`` throughput and latency through an
+  in-process ASGI client (requires ``httpx``), with the response cache off
+
+Results are printed (or written with ``--output``) as JSON. Pass a previous
+result file with ``--compare`` to add relative changes per size and mode, so
+regressions show up between commits. Run from the backend directory:
+
+    python -m benchmarks.engine --sizes 1000 10000 100000 --output bench.json
+    python -m benchmarks.engine --sizes 1000000 --modes scalar --compare bench.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional
+
+from benchmarks.loadtest import percentiles
+from benchmarks.synthetic import generate_profile, write_catalogue
+
+# Engine keyword arguments for each benchmarked mode
+MODES = {
+    "scalar": {},
+    "vectorized": {"vectorized": True},
+    "retrieval": {"retrieval": True},
+}
+# Environment variables main.py reads for each mode
+MODE_ENV = {
+    "scalar": {},
+    "vectorized": {"VECTORIZED_SCORING": "1"},
+    "retrieval": {"ANN_RETRIEVAL": "1"},
+}
+# Metrics compared with --compare, and whether higher is better
+COMPARED_METRICS = {
+    "startup_s": False,
+    "latency.p50_ms": False,
+    "latency.p99_ms": False,
+    "throughput_per_s": True,
+    "peak_rss_mb": False,
+    "api.throughput_rps": True,
+}
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def benchmark_engine(path: str, mode: str, profiles: List[Dict[str, Any]], warmup: int) -> Dict[str, Any]:
+    """Direct engine measurements; runs in its own process"""
+    from recommendation_engine import RecommendationEngine
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        engine = RecommendationEngine(data_path=path, **MODES[mode])
+        startup = time.perf_counter() - start
+
+        for profile in profiles[:warmup]:
+            engine.get_recommendations(**profile)
+        latencies = []
+        start = time.perf_counter()
+        for profile in profiles:
+            profile_start = time.perf_counter()
+            engine.get_recommendations(**profile)
+            latencies.append(time.perf_counter() - profile_start)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "startup_s": round(startup, 3),
+        "latency": percentiles(latencies),
+        "throughput_per_s": round(len(profiles) / elapsed, 1),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def benchmark_api(path: str, mode: str, profiles: List[Dict[str, Any]], concurrency: int,
+                  env: Optional[Dict[str, str]] = None, quiet: bool = True) -> Dict[str, Any]:
+    """End-to-end /recommend measurements through the ASGI app; runs in its own process"""
+    try:
+        import httpx
+    except ImportError:
+        return {"skipped": "httpx is not installed"}
+
+    os.environ.update({"INTERNSHIPS_DATA_PATH": path, "RECOMMENDATION_CACHE_SIZE": "0", **MODE_ENV[mode],
+                       **(env or {})})
+    with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+        import main
+        main.service_ready.wait()
+
+        async def run() -> Dict[str, Any]:
+            queue = list(reversed(profiles))
+            latencies: List[float] = []
+            statuses: Dict[int, int] = {}
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+                async def client_loop():
+                    while queue:
+                        body = {"profile": queue.pop()}
+                        start = time.perf_counter()
+                        response = await client.post("/recommend", json=body)
+                        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                        if response.status_code == 200:
+                            latencies.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+                elapsed = time.perf_counter() - start
+            return {
+                "concurrency": concurrency,
+                "requests": len(profiles),
+                "throughput_rps": round(len(profiles) / elapsed, 1),
+                "status_counts": {str(status): count for status, count in sorted(statuses.items())},
+                "latency": percentiles(latencies),
+            }
+
+        try:
+            return asyncio.run(run())
+        finally:
+            if main.scoring_pool:
+                main.scoring_pool.shutdown()
+            main.logging_setup.stop()
+
+
+def in_fresh_process(function, *args):
+    """Run ``function(*args)`` in a new interpreter and return its result"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+        return executor.submit(function, *args).result()
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metric(result: Dict[str, Any], name: str) -> Optional[float]:
+    value: Any = result
+    for part in name.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value if isinstance(value, (int, float)) else None
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Relative change of each compared metric against a previous run (positive is better)"""
+    previous = {(result["size"], result["mode"]): result for result in baseline.get("results", [])}
+    comparisons = []
+    for result in results:
+        before = previous.get((result["size"], result["mode"]))
+        if before is None:
+            continue
+        changes = {}
+        for name, higher_is_better in COMPARED_METRICS.items():
+            old, new = metric(before, name), metric(result, name)
+            if old and new is not None:
+                change = (new - old) / old
+                changes[name] = round((change if higher_is_better else -change) * 100, 1)
+        comparisons.append({"size": result["size"], "mode": result["mode"], "baseline_commit": baseline.get("commit"),
+                            "improvement_pct": changes})
+    return comparisons
+
+
+def run(sizes: List[int], modes: List[str], profile_count: int, api_requests: int, concurrency: int,
+        seed: int = 42) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    profiles = [generate_profile(rng) for _ in range(max(profile_count, api_requests))]
+    results = []
+    for size in sizes:
+        path = write_catalogue(size)
+        for mode in modes:
+            result = {"size": size, "mode": mode}
+            result.update(in_fresh_process(benchmark_engine, path, mode, profiles[:profile_count],
+                                           min(20, profile_count)))
+            if api_requests:
+                result["api"] = in_fresh_process(benchmark_api, path, mode, profiles[:api_requests], concurrency)
+            print(f"{size} {mode}: p50 {result['latency'].get('p50_ms')}ms, startup {result['startup_s']}s",
+                  file=sys.stderr)
+            results.append(result)
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=["scalar", "vectorized"])
+    parser.add_argument("--profiles", type=int, default=200, help="Profiles scored directly per size and mode")
+    parser.add_argument("--api-requests", type=int, default=200, help="/recommend calls per size and mode (0 skips)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent in-process API clients")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results to this file instead of stdout")
+    parser.add_argument("--compare", help="Previous result file to compare against")
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.modes, args.profiles, args.api_requests, args.concurrency, args.seed)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            report["comparison"] = compare(report["results"], json.load(f))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
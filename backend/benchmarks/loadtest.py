@@ -0,0 +1,119 @@
+"""Concurrent load test for a running recommendation API.
+
+Fires ``--requests`` POST /recommend calls from ``--concurrency`` client threads
+while a separate prober hits /health, then reports latency percentiles for
+both. Compare runs against a server started with ``SCORING_EXECUTOR=inline``
+(scoring on the event loop) and ``SCORING_EXECUTOR=thread`` / ``process``.
+
+    python -m benchmarks.loadtest --url http://localhost:8000 --concurrency 32 --requests 2000
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+SKILLS = ["JavaScript", "React", "Python", "SQL", "Excel", "Data Analysis", "Digital Marketing", "SEO",
+          "Content Writing", "Graphic Design", "Figma", "Sales", "Communication", "Finance", "Machine Learning"]
+SECTORS = ["Technology", "Finance", "Design", "Media", "Healthcare", "Education", "Sales", "Marketing", "Operations"]
+LOCATIONS = ["Mumbai, Maharashtra", "Pune, Maharashtra", "Delhi, Delhi", "Bangalore, Karnataka",
+             "Hyderabad, Telangana", "Chennai, Tamil Nadu", "Kolkata, West Bengal"]
+EDUCATION = ["12th Pass", "Diploma", "Graduate", "Post Graduate"]
+
+
+def random_profile(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "age": str(rng.randint(18, 26)),
+        "education": rng.choice(EDUCATION),
+        "skills": rng.sample(SKILLS, rng.randint(1, 5)),
+        "sectors": rng.sample(SECTORS, rng.randint(1, 2)),
+        "location": rng.choice(LOCATIONS),
+    }
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def at(fraction: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 2)
+
+    return {"count": len(ordered), "p50_ms": at(0.50), "p90_ms": at(0.90), "p99_ms": at(0.99),
+            "max_ms": round(ordered[-1] * 1000, 2)}
+
+
+def timed_request(url: str, body: bytes = None, timeout: float = 30.0):
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, OSError):
+        status = 0
+    return status, time.perf_counter() - start
+
+
+def run(url: str, concurrency: int, total_requests: int, seed: int = 42) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    bodies = [json.dumps({"profile": random_profile(rng)}).encode() for _ in range(total_requests)]
+    recommend_latencies: List[float] = []
+    health_latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def recommend(body: bytes):
+        status, elapsed = timed_request(f"{url}/recommend", body)
+        with lock:
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                recommend_latencies.append(elapsed)
+
+    def probe_health():
+        while not done.is_set():
+            status, elapsed = timed_request(f"{url}/health")
+            if status == 200:
+                health_latencies.append(elapsed)
+            time.sleep(0.05)
+
+    prober = threading.Thread(target=probe_health, daemon=True)
+    prober.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        list(clients.map(recommend, bodies))
+    elapsed = time.perf_counter() - start
+    done.set()
+    prober.join()
+
+    return {
+        "url": url,
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(total_requests / elapsed, 1),
+        "status_counts": {str(status): count for status, count in sorted(statuses.items())},
+        "recommend": percentiles(recommend_latencies),
+        "health": percentiles(health_latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(json.dumps(run(args.url.rstrip("/"), args.concurrency, args.requests, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
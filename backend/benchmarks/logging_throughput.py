@@ -0,0 +1,68 @@
+"""Compare /recommend throughput under different logging configurations.
+
+Each configuration runs in a fresh process with stdout redirected to a real
+file, so log writes cost what they cost in production:
+
+- ``sync``: every request logged, written synchronously on the event loop
+  (what per-request ``print`` calls used to do)
+- ``queued``: every request logged through the background queue
+- ``sampled``: the default, queued and 1% of requests logged
+- ``off``: only warnings and errors
+
+Run from the backend directory:
+
+    python -m benchmarks.logging_throughput --size 1000 --requests 2000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+from typing import Any, Dict, List
+
+from benchmarks.engine import benchmark_api, in_fresh_process
+from benchmarks.synthetic import generate_profile, write_catalogue
+
+CONFIGURATIONS = {
+    "sync": {"LOG_QUEUE_SIZE": "0", "LOG_REQUEST_SAMPLE_RATE": "1"},
+    "queued": {"LOG_REQUEST_SAMPLE_RATE": "1"},
+    "sampled": {},
+    "off": {"LOG_LEVEL": "WARNING"},
+}
+
+
+def benchmark_logging(path: str, profiles: List[Dict[str, Any]], concurrency: int, env: Dict[str, str],
+                      log_path: str) -> Dict[str, Any]:
+    """Runs in its own process: log to ``log_path`` and measure the API"""
+    with open(log_path, "w", buffering=1, encoding="utf-8") as log_file:
+        sys.stdout = log_file
+        result = benchmark_api(path, "scalar", profiles, concurrency, env=env, quiet=False)
+        sys.stdout = sys.__stdout__
+    result["log_bytes"] = os.path.getsize(log_path)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1000, help="Catalogue size")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--configurations", nargs="+", choices=list(CONFIGURATIONS), default=list(CONFIGURATIONS))
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    profiles = [generate_profile(rng) for _ in range(args.requests)]
+    path = write_catalogue(args.size)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name in args.configurations:
+            results[name] = in_fresh_process(benchmark_logging, path, profiles, args.concurrency,
+                                             CONFIGURATIONS[name], os.path.join(directory, f"{name}.log"))
+            print(f"{name}: {results[name].get('throughput_rps')} requests/s", file=sys.stderr)
+    print(json.dumps({"size": args.size, "requests": args.requests, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
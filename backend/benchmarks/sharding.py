@@ -0,0 +1,81 @@
+"""Benchmark sharded scoring with an increasing number of catalogue shards.
+
+Scores the same random profiles against one synthetic catalogue with each
+shard count (``RecommendationEngine(shards=...)``, ``SCORING_SHARDS`` in the
+API), every count in a fresh process, and reports startup time, latency
+percentiles and the p50 speedup over a single process. Shards only run in
+parallel up to the number of cores. Run from the backend directory:
+
+    python -m benchmarks.sharding --size 1000000 --shards 1 2 4 8
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+from benchmarks.engine import MODES, in_fresh_process
+from benchmarks.loadtest import percentiles
+from benchmarks.synthetic import generate_profile, write_catalogue
+
+
+def benchmark_shards(path: str, mode: str, shards: int, profiles: List[Dict[str, Any]],
+                     warmup: int) -> Dict[str, Any]:
+    """Latency of one shard count; runs in its own process"""
+    from recommendation_engine import RecommendationEngine
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        engine = RecommendationEngine(data_path=path, shards=shards, **MODES[mode])
+        startup = time.perf_counter() - start
+        try:
+            for profile in profiles[:warmup]:
+                engine.get_recommendations(**profile)
+            latencies = []
+            for profile in profiles:
+                profile_start = time.perf_counter()
+                engine.get_recommendations(**profile)
+                latencies.append(time.perf_counter() - profile_start)
+        finally:
+            engine.close()
+
+    return {"shards": shards, "startup_s": round(startup, 3), "latency": percentiles(latencies)}
+
+
+def run(size: int, shard_counts: List[int], mode: str, profile_count: int, seed: int = 42) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    profiles = [generate_profile(rng) for _ in range(profile_count)]
+    path = write_catalogue(size)
+    results = []
+    for shards in shard_counts:
+        result = in_fresh_process(benchmark_shards, path, mode, shards, profiles, min(10, profile_count))
+        print(f"{size} {mode} x{shards}: p50 {result['latency'].get('p50_ms')}ms, startup {result['startup_s']}s",
+              file=sys.stderr)
+        results.append(result)
+
+    # Speedup relative to the smallest shard count measured
+    base = results[0]["latency"].get("p50_ms") if results else None
+    for result in results:
+        p50 = result["latency"].get("p50_ms")
+        result["p50_speedup"] = round(base / p50, 2) if base and p50 else None
+    return {"size": size, "mode": mode, "cpu_count": os.cpu_count(), "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1000000)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--mode", choices=list(MODES), default="scalar")
+    parser.add_argument("--profiles", type=int, default=50, help="Profiles scored per shard count")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.size, args.shards, args.mode, args.profiles, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Synthetic internship catalogues and candidate profiles for benchmarks.
+
+Listings and profiles are drawn from the engine's own vocabularies: skills
+from ``data/skill_synonyms.json``, sectors from the related-sector table of
+the default scoring config, and Indian cities with their states (including
+the nearby-city pairs the location score rewards). Everything is generated
+from a fixed seed, so runs are reproducible.
+"""
+import json
+import os
+import random
+import tempfile
+from typing import Any, Dict, Iterator, List
+
+from scoring_config import ScoringConfig
+from synonyms import DEFAULT_SYNONYMS_PATH
+
+# Bump when the generated listings change, so cached catalogue files are regenerated
+GENERATOR_VERSION = 2
+
+
+def _load_skills() -> List[str]:
+    with open(DEFAULT_SYNONYMS_PATH, encoding="utf-8") as f:
+        table = json.load(f)
+    skills = {base: None for base in table}
+    for synonyms in table.values():
+        skills.update((synonym, None) for synonym in synonyms)
+    return list(skills)
+
+
+SKILLS = _load_skills()
+SECTORS = sorted({name.title() for sector, related in ScoringConfig.from_file().get().related_sectors.items()
+                  for name in (sector, *related)})
+LOCATIONS = [
+    "Mumbai, Maharashtra", "Pune, Maharashtra", "Nashik, Maharashtra", "Nagpur, Maharashtra",
+    "Delhi, Delhi", "Gurgaon, Haryana", "Faridabad, Haryana", "Noida, Uttar Pradesh", "Lucknow, Uttar Pradesh",
+    "Kanpur, Uttar Pradesh", "Bangalore, Karnataka", "Mysore, Karnataka", "Mangalore, Karnataka",
+    "Hyderabad, Telangana", "Secunderabad, Telangana", "Chennai, Tamil Nadu", "Coimbatore, Tamil Nadu",
+    "Madurai, Tamil Nadu", "Kolkata, West Bengal", "Jaipur, Rajasthan", "Udaipur, Rajasthan",
+    "Ahmedabad, Gujarat", "Surat, Gujarat", "Bhopal, Madhya Pradesh", "Indore, Madhya Pradesh",
+    "Patna, Bihar", "Bhubaneswar, Odisha", "Kochi, Kerala", "Thiruvananthapuram, Kerala", "Guwahati, Assam",
+    "Chandigarh, Punjab", "Ludhiana, Punjab", "Dehradun, Uttarakhand", "Ranchi, Jharkhand", "Raipur, Chhattisgarh",
+    "Visakhapatnam, Andhra Pradesh", "Vijayawada, Andhra Pradesh", "Panaji, Goa", "Shimla, Himachal Pradesh",
+    "Srinagar, Jammu and Kashmir",
+]
+EDUCATION = ["10th Pass", "12th Pass", "Diploma", "Graduate", "Post Graduate", "PhD"]
+AGE_RANGES = ["18-21", "21-24", "21-25", "22-26", "18-30"]
+ROLES = ["Intern", "Trainee", "Apprentice", "Associate Intern", "Analyst Intern"]
+TASKS = ["support live projects", "assist senior staff", "prepare weekly reports", "work with field teams",
+         "help run community programmes", "research new initiatives", "improve internal processes"]
+REQUIREMENTS = ["Good communication skills", "Basic computer knowledge", "Willingness to travel",
+                "Ability to work in a team", "Proficiency in English or Hindi", "Problem-solving attitude"]
+
+
+def generate_internship(rng: random.Random, index: int) -> Dict[str, Any]:
+    sector = rng.choice(SECTORS)
+    skills = rng.sample(SKILLS, rng.randint(1, 7))
+    return {
+        "id": f"synthetic-{index}",
+        "title": f"{sector} {rng.choice(ROLES)}",
+        "company": f"Company {rng.randint(1, 5000)}",
+        "sector": sector,
+        "skills": skills,
+        "location": rng.choice(LOCATIONS),
+        "duration": f"{rng.choice([2, 3, 6])} months",
+        "stipend": f"₹{rng.randint(5, 30)},000/month",
+        "description": f"Work with the {sector.lower()} team to {rng.choice(TASKS)} using {', '.join(skills[:3])}.",
+        "requirements": [f"Knowledge of {skills[0]}"] + rng.sample(REQUIREMENTS, 2),
+        "education_level": rng.choice(EDUCATION),
+        "age_range": rng.choice(AGE_RANGES),
+    }
+
+
+def generate_profile(rng: random.Random) -> Dict[str, Any]:
+    """Keyword arguments for ``RecommendationEngine.get_recommendations`` (and the /recommend profile)"""
+    return {
+        "age": str(rng.randint(18, 28)),
+        "education": rng.choice(EDUCATION),
+        "skills": rng.sample(SKILLS, rng.randint(1, 6)),
+        "sectors": rng.sample(SECTORS, rng.randint(1, 3)),
+        "location": rng.choice(LOCATIONS),
+    }
+
+
+def iter_catalogue(size: int, seed: int = 7) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return (generate_internship(rng, index) for index in range(size))
+
+
+def generate_catalogue(size: int, seed: int = 7) -> List[Dict[str, Any]]:
+    return list(iter_catalogue(size, seed))
+
+
+def write_catalogue(size: int, seed: int = 7, directory: str = None) -> str:
+    """Write a synthetic catalogue as JSON Lines (cached by size and seed) and return its path"""
+    directory = directory or tempfile.gettempdir()
+    path = os.path.join(directory, f"synthetic_internships_v{GENERATOR_VERSION}_{size}_{seed}.jsonl")
+    if not os.path.exists(path):
+        # Write to a temporary name first, so an interrupted run never leaves a truncated cached file
+        partial_path = f"{path}.partial"
+        with open(partial_path, "w", encoding="utf-8") as f:
+            for internship in iter_catalogue(size, seed):
+                f.write(json.dumps(internship, ensure_ascii=False) + "\n")
+        os.replace(partial_path, path)
+    return path
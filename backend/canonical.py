@@ -0,0 +1,118 @@
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+# Id of a profile term that no catalogue value has; it equals no catalogue id
+UNKNOWN = -1
+
+# Profile strings remembered per term table
+MEMO_SIZE = 65536
+
+
+def canonical_skill(skill: str) -> str:
+    return skill.lower()
+
+
+def canonical_sector(sector: str) -> str:
+    return sector.lower()
+
+
+def canonical_city(location: str) -> str:
+    return location.split(',')[0].strip().lower()
+
+
+def canonical_state(location: str) -> str:
+    return location.split(',')[-1].strip().lower()
+
+
+# Term kinds and the canonical form the matching rules compare
+NORMALIZERS = {
+    "skill": canonical_skill,
+    "sector": canonical_sector,
+    "city": canonical_city,
+    "state": canonical_state,
+}
+
+
+class TermTable:
+    """Skills, sectors, cities and states interned as small integer ids.
+
+    Every distinct canonical term (lowercased skill or sector, stripped and
+    lowercased city or state of a location) gets an id per kind, so matching
+    compares ints and sets of ints instead of building new strings. Catalogue
+    values are interned as listings are indexed. Profile strings are looked up
+    through a bounded memo of raw string to id and never grow the vocabulary.
+
+    Ids are never reused, so one table is shared by successive catalogue
+    snapshots. Only known terms are memoized: a string without an id may get
+    one from a concurrent catalogue update, so it is looked up again every
+    time (memoizing it could pin a stale ``UNKNOWN`` after the update).
+    """
+
+    def __init__(self, memo_size: int = MEMO_SIZE):
+        self.ids: Dict[str, Dict[str, int]] = {kind: {} for kind in NORMALIZERS}
+        self.terms: Dict[str, List[str]] = {kind: [] for kind in NORMALIZERS}
+        self.memo_size = memo_size
+        self._memo: Dict[Tuple[str, str], int] = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The memo is rebuilt (empty) when unpickled
+        state = dict(self.__dict__)
+        state["_memo"] = {}
+        return state
+
+    def lookup(self, kind: str, value: str) -> int:
+        """Id of the canonical form of ``value``, or ``UNKNOWN`` when no catalogue value has it"""
+        key = (kind, value)
+        term_id = self._memo.get(key)
+        if term_id is None:
+            term_id = self.ids[kind].get(NORMALIZERS[kind](value), UNKNOWN)
+            if term_id != UNKNOWN:
+                if len(self._memo) >= self.memo_size:
+                    self._memo.clear()
+                self._memo[key] = term_id
+        return term_id
+
+    def intern(self, kind: str, value: str) -> int:
+        """Id of the canonical form of a catalogue value, assigned on first sight"""
+        term_id = self.lookup(kind, value)
+        if term_id == UNKNOWN:
+            term = NORMALIZERS[kind](value)
+            term_id = self.ids[kind][term] = len(self.terms[kind])
+            self.terms[kind].append(term)
+            self._memo[(kind, value)] = term_id
+        return term_id
+
+    def term(self, kind: str, term_id: int) -> str:
+        return self.terms[kind][term_id]
+
+    def __len__(self) -> int:
+        return sum(len(terms) for terms in self.terms.values())
+
+
+class ProfileTerms:
+    """A candidate profile converted to term ids once per request"""
+
+    __slots__ = ("rules", "skills", "skill_ids", "keyword_weights", "sector_ids", "related_sector_ids",
+                 "has_location", "city_id", "state_id", "nearby_city_ids")
+
+    def __init__(self, rules):
+        # Scoring rules of the request
+        self.rules = rules
+        # Lowercased skills in profile order (duplicates kept, as the scoring loops count them)
+        self.skills: List[str] = []
+        # Ids of the profile skills that appear in the catalogue
+        self.skill_ids: FrozenSet[int] = frozenset()
+        # Per profile skill: related catalogue skill id -> keyword weight
+        self.keyword_weights: List[Dict[int, float]] = []
+        self.sector_ids: FrozenSet[int] = frozenset()
+        self.related_sector_ids: FrozenSet[int] = frozenset()
+        self.has_location = False
+        self.city_id = UNKNOWN
+        self.state_id = UNKNOWN
+        self.nearby_city_ids: FrozenSet[int] = frozenset()
+
+
+def location_terms(terms: TermTable, location: str) -> Optional[Tuple[int, int]]:
+    """Interned (city, state) ids of a catalogue location, None when it is empty"""
+    if not location:
+        return None
+    return terms.intern("city", location), terms.intern("state", location)
@@ -0,0 +1,436 @@
+import bisect
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from canonical import TermTable
+from catalogue_stats import CatalogueStats
+from categorical_index import CategoricalIndex
+from internship_store import InternshipStore, InternshipRecord
+from skill_index import SkillIndex
+from skill_similarity import SkillSimilarity
+from text_retrieval import TextRetriever, internship_text
+from vectorized import VectorizedScorer
+
+logger = logging.getLogger(__name__)
+
+# A delta is ("upsert", internship dict) or ("delete", internship id)
+Delta = Tuple[str, Any]
+
+# Rebuild from scratch once deleted listings outnumber live ones (and this many exist)
+MIN_TOMBSTONES_FOR_COMPACTION = 1024
+
+
+class FieldIndex:
+    """Sorted catalogue positions per lowercased sector, location and education level.
+
+    Locations are indexed under the full string as well as the city and the
+    state, so ``location=pune`` and ``location=maharashtra`` both match
+    "Pune, Maharashtra". Deleted listings are not indexed.
+    """
+
+    FIELDS = ("sector", "location", "education_level")
+
+    def __init__(self, records: List[Optional[InternshipRecord]]):
+        self.postings: Dict[str, Dict[str, List[int]]] = {field: {} for field in self.FIELDS}
+        for position, record in enumerate(records):
+            if record is not None:
+                for field, key in self.keys(record):
+                    self.postings[field].setdefault(key, []).append(position)
+
+    @staticmethod
+    def keys(record: InternshipRecord) -> Iterator[Tuple[str, str]]:
+        """(field, key) pairs a record is indexed under"""
+        yield "sector", record.sector.strip().lower()
+        location = record.location.strip().lower()
+        for key in {location, *(part.strip() for part in location.split(','))}:
+            if key:
+                yield "location", key
+        yield "education_level", record.education_level.strip().lower()
+
+    def positions(self, field: str, value: str) -> List[int]:
+        """Sorted positions of live listings whose ``field`` matches ``value`` (case-insensitive)"""
+        return self.postings[field].get(value.strip().lower(), [])
+
+    def updated(self, old_records: List[Optional[InternshipRecord]], records: List[Optional[InternshipRecord]],
+                positions: Iterable[int]) -> "FieldIndex":
+        """Copy-on-write update: a new index with the given positions re-indexed"""
+        new = FieldIndex.__new__(FieldIndex)
+        new.postings = {field: dict(postings) for field, postings in self.postings.items()}
+        owned = set()
+
+        def owned_postings(field: str, key: str) -> List[int]:
+            if (field, key) not in owned:
+                new.postings[field][key] = list(new.postings[field].get(key, ()))
+                owned.add((field, key))
+            return new.postings[field][key]
+
+        for position in positions:
+            old_record = old_records[position] if position < len(old_records) else None
+            if old_record is not None:
+                for field, key in self.keys(old_record):
+                    postings = owned_postings(field, key)
+                    del postings[bisect.bisect_left(postings, position)]
+                    if not postings:
+                        del new.postings[field][key]
+                        owned.discard((field, key))
+            if records[position] is not None:
+                for field, key in self.keys(records[position]):
+                    bisect.insort(owned_postings(field, key), position)
+
+        return new
+
+
+class StaleCursorError(ValueError):
+    """Raised for a paging cursor issued before the catalogue's positions were renumbered"""
+
+
+class CatalogueSnapshot:
+    """Immutable view of the catalogue together with every index derived from it.
+
+    Requests read ``engine.snapshot`` once and use it throughout, so they see a
+    consistent catalogue while updates build a new snapshot next to it
+    (copy-on-write) and swap it in with a single assignment. Deleted listings
+    leave a ``None`` tombstone so positions, and with them the catalogue-order
+    tie-breaking, stay stable; new listings are appended. Positions are only
+    renumbered by a full build (a reload or a compaction); ``layout`` is the
+    version of the snapshot that numbered them, and paging cursors carry it.
+
+    ``id_positions`` is writer-side state: it is only read while applying deltas
+    (under the engine's update lock) and is shared and updated in place by
+    successive snapshots, so only the newest snapshot's map is accurate. It is
+    only updated once the new snapshot has been built, so a failed update
+    leaves it matching the current snapshot.
+    """
+
+    def __init__(self, store: InternshipStore, records: List[Optional[InternshipRecord]], version: str,
+                 skill_index: SkillIndex, vectorized_scorer: Optional[VectorizedScorer],
+                 id_positions: Dict[str, int], live_count: int, field_index: FieldIndex, stats: CatalogueStats,
+                 categorical_index: CategoricalIndex, terms: TermTable,
+                 text_retriever: Optional[TextRetriever] = None, layout: Optional[str] = None):
+        self.store = store
+        self.records = records
+        self.version = version
+        self.layout = layout or version
+        self.skill_index = skill_index
+        self.vectorized_scorer = vectorized_scorer
+        self.id_positions = id_positions
+        self.live_count = live_count
+        self.field_index = field_index
+        self.stats = stats
+        self.categorical_index = categorical_index
+        # Skill, sector, city and state ids shared by the indexes (and successive snapshots)
+        self.terms = terms
+        self.text_retriever = text_retriever
+
+    @classmethod
+    def build(cls, engine, store: InternshipStore, vectorized: bool = False,
+              records: Optional[List[InternshipRecord]] = None, version: Optional[str] = None,
+              retrieval: bool = False) -> "CatalogueSnapshot":
+        """Build a snapshot and all of its indexes from scratch"""
+        records = list(store.records if records is None else records)
+        terms = TermTable()
+        similarity = SkillSimilarity.for_store(store, terms)
+        return cls(
+            store=store,
+            records=records,
+            # Content hash of the catalogue file, identical across workers loading the same data
+            version=version or store.fingerprint,
+            skill_index=SkillIndex(records, terms, similarity),
+            vectorized_scorer=VectorizedScorer(engine, records, similarity=similarity) if vectorized else None,
+            id_positions={record.id: position for position, record in enumerate(records)},
+            live_count=len(records),
+            field_index=FieldIndex(records),
+            stats=CatalogueStats(records),
+            categorical_index=CategoricalIndex(records, terms),
+            terms=terms,
+            text_retriever=cls.build_text_retriever(store, records, version) if retrieval else None,
+        )
+
+    @staticmethod
+    def build_text_retriever(store: InternshipStore, records: List[Optional[InternshipRecord]],
+                             version: Optional[str] = None) -> TextRetriever:
+        """Load or build the ANN text index for these records"""
+        # The persisted index is only valid for the catalogue file exactly as stored
+        from_file = version is None or version == store.fingerprint
+        return TextRetriever.for_snapshot(
+            store.fingerprint if from_file else version,
+            lambda: (internship_text(store.materialize(record)) if record is not None else None
+                     for record in records),
+            index_path=os.getenv("ANN_INDEX_PATH", f"{store.path}.ann") + store.shard_suffix if from_file else None,
+        )
+
+    def materialize(self, record: InternshipRecord) -> Dict[str, Any]:
+        """Full internship dict for a record of this snapshot"""
+        return self.store.materialize(record)
+
+    def live_records(self):
+        """Iterate over the listings that have not been deleted"""
+        return (record for record in self.records if record is not None)
+
+    def matching_positions(self, start: int = 0, filters: Optional[Dict[str, str]] = None) -> Iterator[int]:
+        """Positions from ``start`` on of live listings matching every field filter, in catalogue order.
+
+        Walks the shortest posting list among the filtered fields and checks the
+        other filters on each record.
+        """
+        filters = {field: value.strip().lower() for field, value in (filters or {}).items() if value}
+        if not filters:
+            records = self.records
+            return (position for position in range(start, len(records)) if records[position] is not None)
+
+        candidates = min(filters.items(), key=lambda item: len(self.field_index.positions(*item)))
+        positions = self.field_index.positions(*candidates)
+        others = [item for item in filters.items() if item != candidates]
+        if not others:
+            return iter(positions[bisect.bisect_left(positions, start):])
+        return (position for position in positions[bisect.bisect_left(positions, start):]
+                if all(item in FieldIndex.keys(self.records[position]) for item in others))
+
+    def cursor(self, position: int) -> str:
+        """Paging cursor resuming at ``position``"""
+        return f"{self.layout}:{position}"
+
+    def cursor_position(self, cursor: Optional[str]) -> int:
+        """Position a paging cursor resumes at (0 for None)
+
+        Raises ``StaleCursorError`` when positions were renumbered since the cursor was issued.
+        """
+        if not cursor:
+            return 0
+        layout, _, position = cursor.rpartition(":")
+        if not layout or not position.isdigit():
+            raise ValueError(f"Invalid cursor: {cursor}")
+        if layout != self.layout:
+            raise StaleCursorError("The catalogue was rebuilt since this cursor was issued, restart from the first page")
+        return int(position)
+
+    def count_matching(self, filters: Optional[Dict[str, str]] = None) -> int:
+        """Number of live listings matching every field filter"""
+        filters = {field: value for field, value in (filters or {}).items() if value}
+        if not filters:
+            return self.live_count
+        if len(filters) == 1:
+            return len(self.field_index.positions(*next(iter(filters.items()))))
+        return sum(1 for _ in self.matching_positions(0, filters))
+
+    def with_deltas(self, engine, deltas: List[Delta]) -> Tuple["CatalogueSnapshot", Dict[str, int]]:
+        """Apply deltas in order and return the new snapshot with a change summary.
+
+        Derived indexes are updated incrementally for the touched positions only.
+        """
+        # Parse everything first so a bad delta fails before any shared state is touched
+        parsed = []
+        for operation, payload in deltas:
+            if operation == "upsert":
+                parsed.append((operation, InternshipRecord.from_dict(payload)))
+            elif operation == "delete":
+                parsed.append((operation, str(payload)))
+            else:
+                raise ValueError(f"Unknown catalogue delta operation: {operation}")
+
+        records = list(self.records)
+        # Id changes are collected here and written to the shared id map once every new index exists
+        id_changes: Dict[str, Optional[int]] = {}
+        live_count = self.live_count
+        changed: Dict[int, None] = {}
+        summary = {"added": 0, "updated": 0, "deleted": 0, "missing": 0}
+
+        for operation, payload in parsed:
+            if operation == "upsert":
+                record = payload
+                position = id_changes[record.id] if record.id in id_changes else self.id_positions.get(record.id)
+                if position is None:
+                    position = id_changes[record.id] = len(records)
+                    records.append(record)
+                    live_count += 1
+                    summary["added"] += 1
+                else:
+                    records[position] = record
+                    summary["updated"] += 1
+            else:
+                position = id_changes[payload] if payload in id_changes else self.id_positions.get(payload)
+                if position is None:
+                    summary["missing"] += 1
+                    continue
+                id_changes[payload] = None
+                records[position] = None
+                live_count -= 1
+                summary["deleted"] += 1
+            changed[position] = None
+
+        if not changed:
+            return self, summary
+
+        digest = hashlib.sha1(self.version.encode("utf-8"))
+        digest.update(json.dumps(deltas, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        version = digest.hexdigest()[:16]
+
+        tombstones = len(records) - live_count
+        if tombstones >= MIN_TOMBSTONES_FOR_COMPACTION and tombstones > live_count:
+            live = [record for record in records if record is not None]
+            return CatalogueSnapshot.build(engine, self.store, self.vectorized_scorer is not None,
+                                           records=live, version=version,
+                                           retrieval=self.text_retriever is not None), summary
+
+        positions = list(changed)
+        scorer = self.vectorized_scorer
+        snapshot = CatalogueSnapshot(
+            store=self.store,
+            records=records,
+            version=version,
+            skill_index=self.skill_index.updated(records, positions),
+            vectorized_scorer=scorer.updated(records, positions) if scorer is not None else None,
+            id_positions=self.id_positions,
+            live_count=live_count,
+            field_index=self.field_index.updated(self.records, records, positions),
+            stats=self.stats.updated(self.records, records, positions),
+            categorical_index=self.categorical_index.updated(self.records, records, positions),
+            terms=self.terms,
+            text_retriever=self.text_retriever.updated({
+                position: internship_text(self.store.materialize(records[position]))
+                if records[position] is not None else None
+                for position in positions
+            }) if self.text_retriever is not None else None,
+            layout=self.layout,
+        )
+        id_positions = self.id_positions
+        for listing_id, position in id_changes.items():
+            if position is None:
+                id_positions.pop(listing_id, None)
+            else:
+                id_positions[listing_id] = position
+        return snapshot, summary
+
+
+def parse_delta_line(line: str) -> Delta:
+    """Parse one line of a deltas file: {"op": "upsert", "internship": {...}} or {"op": "delete", "id": "..."}"""
+    entry = json.loads(line)
+    if not isinstance(entry, dict):
+        raise ValueError("A catalogue delta must be a JSON object")
+    operation = entry.get("op")
+    if operation == "upsert":
+        if not isinstance(entry["internship"], dict):
+            raise ValueError("An upserted internship must be a JSON object")
+        return "upsert", entry["internship"]
+    if operation == "delete":
+        return "delete", str(entry["id"])
+    raise ValueError(f"Unknown catalogue delta operation: {operation}")
+
+
+class CatalogueWatcher:
+    """Polls the catalogue file and an append-only deltas file and applies changes to the engine.
+
+    A replaced catalogue file triggers a full reload, after which the whole
+    deltas file is replayed (it holds the changes made since that export).
+    New complete lines appended to the deltas file are applied incrementally.
+    With ``watch_scoring`` a changed scoring config file is reloaded too; an
+    invalid one is logged and the current rules stay in use. Every worker runs
+    its own watcher, so all workers converge on the same catalogue version.
+    """
+
+    def __init__(self, engine, deltas_path: Optional[str] = None, interval: float = 2.0,
+                 watch_catalogue: bool = True, watch_scoring: bool = False):
+        self.engine = engine
+        self.deltas_path = deltas_path
+        self.interval = interval
+        self.watch_catalogue = watch_catalogue
+        self.watch_scoring = watch_scoring
+        self.deltas_offset = 0
+        self.catalogue_stat = self._stat(engine.snapshot.store.path)
+        self.scoring_stat = self._stat(engine.scoring.path)
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="catalogue-watcher", daemon=True)
+
+    @staticmethod
+    def _stat(path: Optional[str]) -> Optional[Tuple[float, int, int]]:
+        try:
+            stat = os.stat(path)
+        except (OSError, TypeError):
+            return None
+        return stat.st_mtime, stat.st_size, stat.st_ino
+
+    def start(self):
+        self.poll()
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.exception("Catalogue watcher error: %s", e)
+
+    def poll(self):
+        if self.watch_scoring:
+            scoring_stat = self._stat(self.engine.scoring.path)
+            if scoring_stat is not None and scoring_stat != self.scoring_stat:
+                self.scoring_stat = scoring_stat
+                try:
+                    self.engine.reload_scoring()
+                    logger.info("Scoring config changed, reloaded rules",
+                                extra={"scoring_version": self.engine.scoring.version})
+                except (OSError, ValueError) as e:
+                    logger.warning("Scoring config not reloaded: %s", e)
+
+        if not self.watch_catalogue:
+            return
+        catalogue_stat = self._stat(self.engine.snapshot.store.path)
+        if catalogue_stat is not None and catalogue_stat != self.catalogue_stat:
+            if self.catalogue_stat is not None and catalogue_stat[2] == self.catalogue_stat[2]:
+                logger.warning("Catalogue file was modified in place; replace it atomically (write a new file, "
+                               "then rename it over the old one) so listings in use stay readable")
+            self.catalogue_stat = catalogue_stat
+            self.engine.reload()
+            self.deltas_offset = 0
+            logger.info("Catalogue file changed, reloaded internships")
+
+        if not self.deltas_path or not os.path.exists(self.deltas_path):
+            return
+        if os.path.getsize(self.deltas_path) < self.deltas_offset:
+            # The deltas file was truncated or replaced: replay it from the start
+            self.deltas_offset = 0
+
+        deltas = []
+        # Only moved past the lines read once they are applied, so a failed update is retried on the next poll
+        offset = self.deltas_offset
+        with open(self.deltas_path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Partially written line, picked up on the next poll
+                offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    deltas.append(parse_delta_line(line.decode("utf-8")))
+                except (ValueError, KeyError, TypeError) as e:
+                    # A malformed line can never apply; skipping it keeps the lines around it
+                    logger.warning("Skipping invalid catalogue delta: %s", e,
+                                   extra={"path": self.deltas_path, "offset": offset - len(line)})
+
+        if deltas:
+            summary = self.engine.apply_deltas(deltas)
+            logger.info("Applied catalogue deltas", extra={"changes": len(deltas),
+                                                            "update_ms": round(summary["update_time"] * 1000, 3)})
+        self.deltas_offset = offset
+
+
+def start_catalogue_watcher(engine) -> Optional[CatalogueWatcher]:
+    """Start a watcher for ``engine`` when CATALOGUE_WATCH, CATALOGUE_DELTAS_PATH or SCORING_CONFIG_WATCH is set"""
+    deltas_path = os.getenv("CATALOGUE_DELTAS_PATH")
+    watch = os.getenv("CATALOGUE_WATCH", "").lower() in ("1", "true", "yes")
+    watch_scoring = os.getenv("SCORING_CONFIG_WATCH", "").lower() in ("1", "true", "yes")
+    if not (watch or deltas_path or watch_scoring):
+        return None
+    watcher = CatalogueWatcher(engine, deltas_path=deltas_path,
+                               interval=float(os.getenv("CATALOGUE_WATCH_INTERVAL", "2")),
+                               watch_catalogue=bool(watch or deltas_path), watch_scoring=watch_scoring)
+    watcher.start()
+    return watcher
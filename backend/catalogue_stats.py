@@ -0,0 +1,109 @@
+import bisect
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from internship_store import InternshipRecord
+
+# Stipend percentiles reported by /stats
+STIPEND_PERCENTILES = (0.25, 0.75, 0.9)
+
+
+class CatalogueStats:
+    """Running catalogue statistics, kept next to the catalogue snapshot.
+
+    Counts per sector, location and education level, plus a sorted list of
+    parsed stipend amounts for the mean, median and percentiles. Updates only
+    touch the changed listings (copy-on-write, like the other snapshot
+    indexes), and the summary is computed once per snapshot.
+    """
+
+    def __init__(self, records: Iterable[Optional[InternshipRecord]]):
+        self.sector_counts: Counter = Counter()
+        self.location_counts: Counter = Counter()
+        self.education_counts: Counter = Counter()
+        self.stipends: List[float] = []
+        self.stipend_total = 0.0
+        self.live_count = 0
+        self.updated_at = datetime.now().isoformat()
+        self._summary: Optional[Dict[str, Any]] = None
+
+        for record in records:
+            if record is not None:
+                self._count(record, 1)
+                if record.stipend_amount is not None:
+                    self.stipends.append(record.stipend_amount)
+                    self.stipend_total += record.stipend_amount
+        self.stipends.sort()
+
+    def _count(self, record: InternshipRecord, delta: int):
+        for counts, value in ((self.sector_counts, record.sector), (self.location_counts, record.location),
+                              (self.education_counts, record.education_level)):
+            counts[value] += delta
+            if counts[value] <= 0:
+                del counts[value]
+        self.live_count += delta
+
+    def updated(self, old_records: List[Optional[InternshipRecord]], records: List[Optional[InternshipRecord]],
+                positions: Iterable[int]) -> "CatalogueStats":
+        """Copy-on-write update for the listings at ``positions``"""
+        new = CatalogueStats.__new__(CatalogueStats)
+        new.sector_counts = Counter(self.sector_counts)
+        new.location_counts = Counter(self.location_counts)
+        new.education_counts = Counter(self.education_counts)
+        new.stipends = list(self.stipends)
+        new.stipend_total = self.stipend_total
+        new.live_count = self.live_count
+        new.updated_at = datetime.now().isoformat()
+        new._summary = None
+
+        for position in positions:
+            old_record = old_records[position] if position < len(old_records) else None
+            if old_record is not None:
+                new._count(old_record, -1)
+                if old_record.stipend_amount is not None:
+                    del new.stipends[bisect.bisect_left(new.stipends, old_record.stipend_amount)]
+                    new.stipend_total -= old_record.stipend_amount
+            record = records[position]
+            if record is not None:
+                new._count(record, 1)
+                if record.stipend_amount is not None:
+                    bisect.insort(new.stipends, record.stipend_amount)
+                    new.stipend_total += record.stipend_amount
+
+        return new
+
+    def stipend_summary(self) -> Dict[str, Any]:
+        stipends = self.stipends
+        count = len(stipends)
+        if not count:
+            return {"count": 0}
+        middle = count // 2
+        median = stipends[middle] if count % 2 else (stipends[middle - 1] + stipends[middle]) / 2
+        summary = {
+            "count": count,
+            "min": stipends[0],
+            "max": stipends[-1],
+            "mean": round(self.stipend_total / count, 2),
+            "median": median,
+        }
+        for fraction in STIPEND_PERCENTILES:
+            summary[f"p{int(fraction * 100)}"] = stipends[min(count - 1, int(fraction * count))]
+        return summary
+
+    def summary(self) -> Dict[str, Any]:
+        """Statistics for /stats (computed on first use, then reused for this snapshot)"""
+        if self._summary is None:
+            stipend = self.stipend_summary()
+            self._summary = {
+                "total_internships": self.live_count,
+                "sectors": sorted(self.sector_counts),
+                "locations": sorted(self.location_counts),
+                "avg_stipend": stipend.get("mean", 0),
+                "sector_counts": dict(self.sector_counts.most_common()),
+                "location_counts": dict(self.location_counts.most_common()),
+                "education_counts": dict(self.education_counts.most_common()),
+                "stipend": stipend,
+                "last_updated": self.updated_at,
+            }
+        return self._summary
@@ -0,0 +1,100 @@
+import bisect
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from canonical import TermTable, location_terms
+from internship_store import InternshipRecord
+
+# Record fields scored as categories, in the order of a group key
+CATEGORICAL_FIELDS = ("sector", "location", "education_level", "age_range")
+
+GroupKey = Tuple[int, int, int, int]
+
+
+class CategoricalIndex:
+    """Categorical ids and posting lists for the non-skill scoring fields.
+
+    Every distinct raw sector, location, education level and age range gets a
+    small integer id, so a request scores each distinct value once (with the
+    engine's own rules) instead of once per listing. Listings are also grouped
+    by their full (sector, location, education, age range) id combination:
+    listings without any skill relation to a profile score identically within
+    a group, so ranking them only needs one score per group and the group's
+    sorted positions.
+
+    Distinct sectors and locations also carry their canonical term ids
+    (sector, and city and state), interned once when the value first appears.
+
+    Ids are never reused; deleted listings are removed from their group.
+    """
+
+    def __init__(self, records: List[Optional[InternshipRecord]], terms: TermTable):
+        self.terms = terms
+        self.values: Dict[str, List[str]] = {field: [] for field in CATEGORICAL_FIELDS}
+        # Sector term id, by sector value id
+        self.sector_terms: List[int] = []
+        # (city, state) term ids, by location value id (None for an empty location)
+        self.location_terms: List[Optional[Tuple[int, int]]] = []
+        self.ids: Dict[str, Dict[str, int]] = {field: {} for field in CATEGORICAL_FIELDS}
+        self.groups: Dict[GroupKey, List[int]] = {}
+        # Group key of every catalogue position (None for deleted listings)
+        self.keys: List[Optional[GroupKey]] = []
+
+        for position, record in enumerate(records):
+            key = self._key(record) if record is not None else None
+            self.keys.append(key)
+            if key is not None:
+                self.groups.setdefault(key, []).append(position)
+
+    def _value_id(self, field: str, value: str) -> int:
+        value_id = self.ids[field].get(value)
+        if value_id is None:
+            value_id = self.ids[field][value] = len(self.values[field])
+            self.values[field].append(value)
+            if field == "sector":
+                self.sector_terms.append(self.terms.intern("sector", value))
+            elif field == "location":
+                self.location_terms.append(location_terms(self.terms, value))
+        return value_id
+
+    def _key(self, record: InternshipRecord) -> GroupKey:
+        return tuple(self._value_id(field, getattr(record, field)) for field in CATEGORICAL_FIELDS)
+
+    def value_scores(self, field: str, score: Callable[[str], float]) -> List[float]:
+        """``score(value)`` for every distinct value of ``field``, indexed by id"""
+        return [score(value) for value in self.values[field]]
+
+    def updated(self, old_records: List[Optional[InternshipRecord]], records: List[Optional[InternshipRecord]],
+                positions: Iterable[int]) -> "CategoricalIndex":
+        """Copy-on-write update: a new index with the given positions regrouped"""
+        new = CategoricalIndex.__new__(CategoricalIndex)
+        new.terms = self.terms
+        # Value lists only ever grow, so copies of the id maps are enough for older snapshots
+        new.values = {field: list(values) for field, values in self.values.items()}
+        new.sector_terms = list(self.sector_terms)
+        new.location_terms = list(self.location_terms)
+        new.ids = {field: dict(ids) for field, ids in self.ids.items()}
+        new.groups = dict(self.groups)
+        new.keys = list(self.keys)
+        owned = set()
+
+        def owned_group(key: GroupKey) -> List[int]:
+            if key not in owned:
+                new.groups[key] = list(new.groups.get(key, ()))
+                owned.add(key)
+            return new.groups[key]
+
+        for position in positions:
+            key = self.keys[position] if position < len(self.keys) else None
+            if key is not None:
+                group = owned_group(key)
+                del group[bisect.bisect_left(group, position)]
+                if not group:
+                    del new.groups[key]
+                    owned.discard(key)
+            if position >= len(new.keys):
+                new.keys.extend([None] * (position + 1 - len(new.keys)))
+            key = new.keys[position] = new._key(records[position]) if records[position] is not None else None
+            if key is not None:
+                bisect.insort(owned_group(key), position)
+
+        return new
@@ -0,0 +1,195 @@
+"""Prebuilt engine state, saved once and loaded by every worker.
+
+A snapshot file holds everything the engine derives from the catalogue and
+the synonym table: parsed records, the interned term ids, the skill, field
+and categorical indexes, statistics, the compiled synonym tables and (in
+vectorized mode) the column arrays. Loading it skips parsing and index builds. NumPy arrays are stored
+out-of-band and page-aligned, so they are used in place from a read-only
+memory mapping (shared by every process on the host) instead of being copied.
+
+Layout: magic, header length, JSON header, pickle, aligned array buffers.
+The header records the format version and the content hashes of the
+catalogue and synonym files; a snapshot that does not match is ignored.
+
+Build a snapshot before starting the workers with:
+
+    python -m engine_snapshot --data data/internships.jsonl --out data/internships.jsonl.engine
+"""
+import argparse
+import gc
+import hashlib
+import json
+import logging
+import mmap
+import os
+import pickle
+import struct
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from catalogue import CatalogueSnapshot
+from internship_store import InternshipStore
+from synonyms import DEFAULT_SYNONYMS_PATH
+from vectorized import VectorizedScorer
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"YSENGINE"
+SNAPSHOT_FORMAT_VERSION = 3
+# Array buffers start on page boundaries so they can be used straight from the mapping
+BUFFER_ALIGNMENT = 4096
+_HEADER_LENGTH = struct.Struct("<I")
+
+# Snapshot fields restored as they were saved
+SNAPSHOT_FIELDS = ("records", "version", "skill_index", "vectorized_scorer", "id_positions", "live_count",
+                   "field_index", "stats", "categorical_index", "terms")
+
+
+def file_fingerprint(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def synonyms_path() -> str:
+    return os.getenv("SKILL_SYNONYMS_PATH", DEFAULT_SYNONYMS_PATH)
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // BUFFER_ALIGNMENT) * BUFFER_ALIGNMENT
+
+
+def _detached_scorer(scorer: VectorizedScorer) -> VectorizedScorer:
+    """Copy of the scorer without its engine reference and per-request caches"""
+    detached = VectorizedScorer.__new__(VectorizedScorer)
+    detached.__dict__.update((name, value) for name, value in scorer.__dict__.items()
+                             if name not in ("engine", "_similarity_row", "_keyword_row"))
+    return detached
+
+
+def save_engine_snapshot(engine, snapshot: CatalogueSnapshot, path: str):
+    """Write ``snapshot`` (freshly built from its catalogue file) and the engine's synonym tables to ``path``"""
+    state: Dict[str, Any] = {field: getattr(snapshot, field) for field in SNAPSHOT_FIELDS}
+    if snapshot.vectorized_scorer is not None:
+        state["vectorized_scorer"] = _detached_scorer(snapshot.vectorized_scorer)
+    state["synonyms"] = engine.synonyms
+
+    buffers: List[pickle.PickleBuffer] = []
+    payload = pickle.dumps(state, protocol=5, buffer_callback=buffers.append)
+    raw_buffers = [buffer.raw() for buffer in buffers]
+
+    header = {
+        "format": SNAPSHOT_FORMAT_VERSION,
+        "python": list(sys.version_info[:2]),
+        "catalogue": snapshot.store.fingerprint,
+        "synonyms": file_fingerprint(synonyms_path()),
+        "vectorized": snapshot.vectorized_scorer is not None,
+        "records": len(snapshot.records),
+        "payload_length": len(payload),
+        # Offsets relative to the end of the pickle
+        "buffers": [],
+    }
+    offset = 0
+    for raw in raw_buffers:
+        offset = _aligned(offset)
+        header["buffers"].append([offset, raw.nbytes])
+        offset += raw.nbytes
+    header_bytes = json.dumps(header).encode("utf-8")
+
+    # Written under a temporary name and renamed, so concurrent readers never see a partial file
+    partial_path = f"{path}.{os.getpid()}.partial"
+    with open(partial_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(_HEADER_LENGTH.pack(len(header_bytes)))
+        f.write(header_bytes)
+        f.write(payload)
+        buffers_start = _aligned(f.tell())
+        for (buffer_offset, _), raw in zip(header["buffers"], raw_buffers):
+            f.seek(buffers_start + buffer_offset)
+            f.write(raw)
+    os.replace(partial_path, path)
+
+
+def read_header(mapping) -> Optional[Dict[str, Any]]:
+    if mapping[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        return None
+    start = len(SNAPSHOT_MAGIC) + _HEADER_LENGTH.size
+    (length,) = _HEADER_LENGTH.unpack_from(mapping, len(SNAPSHOT_MAGIC))
+    header = json.loads(bytes(mapping[start:start + length]))
+    header["payload_start"] = start + length
+    return header
+
+
+def load_engine_snapshot(engine, path: str, data_path: Optional[str] = None) -> Optional[CatalogueSnapshot]:
+    """Restore the engine state saved at ``path``; None when it is missing or does not match the current files.
+
+    Sets ``engine.synonyms`` to the saved synonym tables and returns the catalogue snapshot.
+    """
+    try:
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    header = read_header(mapping)
+    if (header is None or header.get("format") != SNAPSHOT_FORMAT_VERSION
+            or header.get("python") != list(sys.version_info[:2])
+            or header.get("vectorized") != engine.vectorized
+            or header.get("synonyms") != file_fingerprint(synonyms_path())):
+        return None
+    store = InternshipStore(data_path, scan=False, shard=engine.shard)
+    if store.fingerprint != header["catalogue"]:
+        return None
+
+    view = memoryview(mapping)
+    payload_start = header["payload_start"]
+    buffers_start = _aligned(payload_start + header["payload_length"])
+    buffers = [view[buffers_start + offset:buffers_start + offset + length]
+               for offset, length in header["buffers"]]
+    # The collector would repeatedly scan the objects being created; unpickling is much faster without it
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        state = pickle.loads(view[payload_start:payload_start + header["payload_length"]], buffers=buffers)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    engine.synonyms = state["synonyms"]
+    store.records = state["records"]
+    scorer = state["vectorized_scorer"]
+    if scorer is not None:
+        scorer.engine = engine
+        scorer._reset_caches()
+    return CatalogueSnapshot(
+        store=store,
+        text_retriever=CatalogueSnapshot.build_text_retriever(store, state["records"]) if engine.retrieval else None,
+        **{field: state[field] for field in SNAPSHOT_FIELDS},
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=None, help="Catalogue file (defaults to INTERNSHIPS_DATA_PATH)")
+    parser.add_argument("--out", required=True, help="Snapshot file")
+    parser.add_argument("--vectorized", action="store_true", help="Include the NumPy column arrays")
+    args = parser.parse_args()
+
+    from recommendation_engine import RecommendationEngine
+    start_time = time.perf_counter()
+    engine = RecommendationEngine(vectorized=args.vectorized, data_path=args.data)
+    build_time = time.perf_counter() - start_time
+    save_engine_snapshot(engine, engine.snapshot, args.out)
+
+    start_time = time.perf_counter()
+    loaded = RecommendationEngine(vectorized=args.vectorized, data_path=args.data, snapshot_path=args.out)
+    print(json.dumps({"path": args.out, "bytes": os.path.getsize(args.out), "records": len(engine.snapshot.records),
+                      "build_time": round(build_time, 3), "load_time": round(time.perf_counter() - start_time, 3),
+                      "loaded_from": loaded.loaded_from}))
+
+
+if __name__ == "__main__":
+    main()
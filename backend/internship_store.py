@@ -0,0 +1,156 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "internships.jsonl")
+
+# First amount in a stipend string, with thousands separators ("₹15,000/month") or a k suffix ("12k")
+STIPEND_PATTERN = re.compile(r'(\d[\d,]*(?:\.\d+)?)\s*([kK](?![a-zA-Z]))?')
+
+
+def parse_stipend(stipend: str) -> Optional[float]:
+    """Monthly amount of a stipend string such as "₹15,000/month", or None when it has no amount"""
+    match = STIPEND_PATTERN.search(stipend or "")
+    if match is None:
+        return None
+    amount = float(match.group(1).replace(",", ""))
+    return amount * 1000 if match.group(2) else amount
+
+
+class InternshipRecord:
+    """Compact, read-only view of one catalogue line holding only the fields used for scoring.
+
+    Strings are interned so repeated values (sectors, locations, skills) are
+    stored once. Text-heavy fields such as ``description`` and ``requirements``
+    stay in the memory-mapped file until ``InternshipStore.materialize`` is called.
+    Supports ``record['field']`` access like the plain dicts it replaces.
+    """
+
+    __slots__ = ("id", "title", "company", "sector", "skills", "location", "duration", "stipend",
+                 "education_level", "age_range", "stipend_amount", "offset", "length", "source")
+
+    FIELDS = ("id", "title", "company", "sector", "location", "duration", "stipend",
+              "education_level", "age_range")
+
+    def __init__(self, data: Dict[str, Any], offset: int = -1, length: int = 0, source: Optional[bytes] = None):
+        for field in self.FIELDS:
+            setattr(self, field, sys.intern(str(data.get(field, ""))))
+        self.skills = tuple(sys.intern(skill) for skill in data.get("skills", ()))
+        # Parsed once so statistics never re-parse stipend strings
+        self.stipend_amount = parse_stipend(self.stipend)
+        self.offset = offset
+        self.length = length
+        # Serialized full record for listings added at runtime (not backed by the mapped file)
+        self.source = source
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "InternshipRecord":
+        """Record for a listing added or updated at runtime"""
+        return cls(data, source=json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+class CatalogueFileChangedError(RuntimeError):
+    """Raised when the catalogue file was modified in place while records still point into it"""
+
+
+class InternshipStore:
+    """Internship catalogue read from a JSON Lines file.
+
+    The file is memory-mapped read-only, so its pages live in the OS page cache
+    and are shared by every worker process mapping the same file. Records keep
+    byte offsets into the file and full dicts are only built on demand.
+
+    The file must be replaced atomically (written under another name, then
+    renamed over it): the store keeps reading the file it opened for as long as
+    any snapshot uses it. Full records are read with ``pread`` rather than from
+    the mapping, so a file truncated in place cannot crash the process. If the
+    file is modified in place, ``materialize`` raises
+    ``CatalogueFileChangedError`` instead of returning wrong listings.
+
+    A ``shard`` ``(index, count)`` keeps only every ``count``-th listing,
+    starting at ``index``: record ``i`` of the shard is listing
+    ``i * count + index`` of the file.
+    """
+
+    def __init__(self, path: Optional[str] = None, scan: bool = True, shard: Optional[Tuple[int, int]] = None):
+        """Map the catalogue file; with ``scan=False`` records are left empty (to be restored from a snapshot)"""
+        self.path = path or os.getenv("INTERNSHIPS_DATA_PATH", DEFAULT_DATA_PATH)
+        self.shard = shard
+        self.records: List[InternshipRecord] = []
+        self.mapping: Optional[mmap.mmap] = None
+
+        # Kept open to read full records, and to notice in-place modifications of the file
+        self.file = open(self.path, "rb")
+        self.file_stat = self._file_stat()
+        if self.file_stat[0] > 0:
+            self.mapping = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        digest = hashlib.sha1()
+        if self.mapping is not None:
+            digest.update(self.mapping)
+            if scan:
+                for offset, length, data in self._scan():
+                    self.records.append(InternshipRecord(data, offset, length))
+        # Shards of one file are different catalogues, so indexes saved for one never load for another
+        self.fingerprint = digest.hexdigest()[:16] + self.shard_suffix
+
+    @property
+    def shard_suffix(self) -> str:
+        """Suffix telling apart the files derived from each shard of the catalogue"""
+        return f".shard{self.shard[0]}of{self.shard[1]}" if self.shard else ""
+
+    def _scan(self) -> Iterator:
+        """Yield (offset, length, parsed line) for every non-empty line of this store's shard"""
+        index, count = self.shard or (0, 1)
+        offset = 0
+        listing = 0
+        self.mapping.seek(0)
+        while True:
+            line = self.mapping.readline()
+            if not line:
+                break
+            if line.strip():
+                # Lines of other shards are counted but never parsed
+                if listing % count == index:
+                    yield offset, len(line), json.loads(line)
+                listing += 1
+            offset += len(line)
+
+    def _file_stat(self) -> Tuple[int, int]:
+        stat = os.fstat(self.file.fileno())
+        return stat.st_size, stat.st_mtime_ns
+
+    def materialize(self, record: InternshipRecord) -> Dict[str, Any]:
+        """Full internship dict for a record, read from the catalogue file"""
+        if record.source is not None:
+            return json.loads(record.source)
+        line = os.pread(self.file.fileno(), record.length, record.offset)
+        # Checked after reading: an unchanged file means the line read is the one scanned
+        if self._file_stat() != self.file_stat:
+            raise CatalogueFileChangedError(
+                f"Catalogue file {self.path} was modified in place; replace it atomically "
+                "(write a new file, then rename it over the old one) and reload the catalogue")
+        return json.loads(line)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def close(self):
+        if self.mapping is not None:
+            self.mapping.close()
+        self.file.close()
@@ -1,15 +1,46 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse, Response
+from pydantic import BaseModel, Field, ValidationError
+from typing import Dict, List, Optional
+from collections import OrderedDict
+import asyncio
 import json
+import logging
 import os
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
 from recommendation_engine import RecommendationEngine
+from scoring_pool import ScoringPool, PoolSaturatedError
+from recommendation_cache import (RecommendationCache, LocalCacheBackend, SharedCacheBackend,
+                                  canonical_profile, profile_cache_key)
+from request_coalescing import RequestCoalescer
+from profile_sessions import ProfileSessionStore
+from response_fragments import dumps
+from catalogue import start_catalogue_watcher, StaleCursorError
+from reranking import DiversityReranker, MAX_CANDIDATES
+from response_fragments import recommendations_body, body_result_count, recommendation_response
+from metrics import LatencyHistogram, prometheus_histogram
+from structured_logging import configure_logging, request_context, annotate_request, RequestLogSampler
+
+# LOG_LEVEL, LOG_FORMAT and LOG_QUEUE_SIZE configure logging; records are written by a background thread
+logging_setup = configure_logging()
+logger = logging.getLogger("yuvasetu.api")
+access_logger = logging.getLogger("yuvasetu.access")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Stops the scoring workers, engine, catalogue watcher and log writer when the server shuts down"""
+    yield
+    shutdown_services()
 
 app = FastAPI(
     title="YuvaSetu.AI Recommendation Engine",
     description="AI-powered internship recommendation system for PM Internship Scheme",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware for frontend integration
@@ -25,17 +56,200 @@ app.add_middleware(
         "*"  # Allow all origins for development - remove in production
     ],
     allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
 )
 
-# Initialize recommendation engine
+class RequestTimingMiddleware:
+    """Records request latency per endpoint and writes sampled access log lines.
+
+    Pure ASGI middleware, so streaming responses are timed to the end. Each
+    request gets an id (the ``X-Request-ID`` header, or a new one) that is
+    returned in the response and attached to every record logged for it.
+    """
+
+    def __init__(self, app, latency: Dict[str, LatencyHistogram], sampler: RequestLogSampler):
+        self.app = app
+        self.latency = latency
+        self.sampler = sampler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+        context = {"request_id": request_id or uuid.uuid4().hex}
+        token = request_context.set(context)
+        status = 500
+
+        async def send_with_request_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {**message, "headers": [*message.get("headers", []),
+                                                  (b"x-request-id", context["request_id"].encode("latin-1"))]}
+            await send(message)
+
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            # The router stores the matched endpoint in the scope; label by its name to keep cardinality bounded
+            endpoint = scope.get("endpoint")
+            name = getattr(endpoint, "__name__", "unmatched")
+            histogram = self.latency.get(name)
+            if histogram is None:
+                histogram = self.latency.setdefault(name, LatencyHistogram())
+            histogram.observe(elapsed)
+
+            level = self.sampler.level(status, elapsed)
+            if level is not None:
+                access_logger.log(level, "request", extra={
+                    **context, "method": scope["method"], "path": scope["path"], "endpoint": name,
+                    "status": status, "latency_ms": round(elapsed * 1000, 3)})
+            request_context.reset(token)
+
+# Request latency per endpoint, reported by /metrics
+request_latency: Dict[str, LatencyHistogram] = {}
+# LOG_REQUEST_SAMPLE_RATE and LOG_SLOW_REQUEST_MS select which requests get an access log line
+app.add_middleware(RequestTimingMiddleware, latency=request_latency, sampler=RequestLogSampler.from_env())
+
+# Recommendation engine settings, shared with scoring worker processes
+engine_kwargs = {
+    # VECTORIZED_SCORING=1 switches to the NumPy batch scoring path
+    "vectorized": os.getenv("VECTORIZED_SCORING", "").lower() in ("1", "true", "yes"),
+    # ANN_RETRIEVAL=1 scores only a shortlist from the ANN text index and the categorical ranking
+    "retrieval": os.getenv("ANN_RETRIEVAL", "").lower() in ("1", "true", "yes"),
+    # PROFILE_SAMPLE_RATE=0.005 times the scoring stages of 0.5% of requests (see /metrics)
+    "profile_sample_rate": float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+    # ENGINE_SNAPSHOT_PATH loads prebuilt engine state (written there after a build when missing or stale)
+    "snapshot_path": os.getenv("ENGINE_SNAPSHOT_PATH") or None,
+    # SCORING_CONFIG_PATH replaces the bundled data/scoring.json (weights, thresholds and rule tables)
+    "scoring_path": os.getenv("SCORING_CONFIG_PATH") or None,
+    # SCORING_SHARDS=4 splits the catalogue over 4 shard processes that score every /recommend request together
+    "shards": int(os.getenv("SCORING_SHARDS", "1"))
+}
+recommendation_engine: Optional[RecommendationEngine] = None
+scoring_pool: Optional[ScoringPool] = None
+catalogue_watcher = None
+# Set once the engine is loaded (or failed to load); /health reports not ready until then
+service_ready = threading.Event()
+service_status = {"status": "starting", "startup_time": None}
+
+def initialize_service():
+    """Load the engine, then start the scoring pool and the catalogue watcher"""
+    global recommendation_engine, scoring_pool, catalogue_watcher
+    start_time = time.perf_counter()
+    try:
+        engine = RecommendationEngine(**engine_kwargs)
+        # Scoring runs on a bounded worker pool so the event loop stays responsive
+        scoring_pool = ScoringPool(
+            engine,
+            workers=int(os.getenv("SCORING_WORKERS", "4")),
+            queue_depth=int(os.getenv("SCORING_QUEUE_DEPTH", "64")),
+            mode=os.getenv("SCORING_EXECUTOR", "thread"),
+            # Executor processes already score in parallel, each over the whole catalogue
+            engine_kwargs=dict(engine_kwargs, shards=1),
+            # Worker processes hold their own engine copies, each follows catalogue changes itself
+            worker_setup=start_catalogue_watcher
+        )
+        recommendation_engine = engine
+    except Exception as e:
+        logger.exception("Error initializing recommendation engine: %s", e)
+        service_status["status"] = "failed"
+        service_ready.set()
+        return
+    
+    start_watching_catalogue()
+    service_status.update(status="ready", startup_time=round(time.perf_counter() - start_time, 3),
+                          loaded_from=engine.loaded_from)
+    logger.info("Service ready", extra=service_status)
+    service_ready.set()
+
+def start_watching_catalogue():
+    # CATALOGUE_WATCH=1 reloads the catalogue file when it changes; CATALOGUE_DELTAS_PATH applies appended deltas
+    # SCORING_CONFIG_WATCH=1 reloads the scoring config file when it changes
+    global catalogue_watcher
+    try:
+        catalogue_watcher = start_catalogue_watcher(recommendation_engine)
+    except Exception as e:
+        logger.warning("Catalogue watcher disabled: %s", e)
+        catalogue_watcher = None
+
+# ENGINE_LOADING=background (default) serves /health while the engine loads; "blocking" loads during import
+if os.getenv("ENGINE_LOADING", "background").lower() == "blocking":
+    initialize_service()
+else:
+    threading.Thread(target=initialize_service, name="engine-loader", daemon=True).start()
+
+def create_recommendation_cache() -> Optional[RecommendationCache]:
+    """Response cache for /recommend; RECOMMENDATION_CACHE_URL selects a shared Redis backend"""
+    ttl = float(os.getenv("RECOMMENDATION_CACHE_TTL", "300"))
+    cache_url = os.getenv("RECOMMENDATION_CACHE_URL")
+    if cache_url:
+        return RecommendationCache(SharedCacheBackend.from_url(cache_url, ttl=ttl))
+    max_size = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "4096"))
+    if max_size <= 0:
+        return None
+    return RecommendationCache(LocalCacheBackend(max_size=max_size, ttl=ttl))
+
+try:
+    recommendation_cache = create_recommendation_cache()
+except Exception as e:
+    logger.warning("Recommendation cache disabled: %s", e)
+    recommendation_cache = None
+
+def create_request_coalescer() -> Optional[RequestCoalescer]:
+    """Single-flight deduplication for /recommend; REQUEST_COALESCING=0 turns it off"""
+    if os.getenv("REQUEST_COALESCING", "1").lower() in ("0", "false", "no"):
+        return None
+    return RequestCoalescer(timeout=float(os.getenv("REQUEST_COALESCING_TIMEOUT", "30")))
+
+try:
+    request_coalescer = create_request_coalescer()
+except Exception as e:
+    logger.warning("Request coalescing disabled: %s", e)
+    request_coalescer = None
+
+def create_profile_sessions() -> Optional[ProfileSessionStore]:
+    """Store of /recommend/sessions; PROFILE_SESSION_MEMORY_MB bounds its size (0 disables sessions)"""
+    max_bytes = int(float(os.getenv("PROFILE_SESSION_MEMORY_MB", "64")) * 1024 * 1024)
+    if max_bytes <= 0:
+        return None
+    return ProfileSessionStore(max_bytes=max_bytes)
+
 try:
-    recommendation_engine = RecommendationEngine()
-    print("✅ Recommendation engine initialized successfully")
+    profile_sessions = create_profile_sessions()
 except Exception as e:
-    print(f"⚠️  Error initializing recommendation engine: {e}")
-    recommendation_engine = None
+    logger.warning("Profile sessions disabled: %s", e)
+    profile_sessions = None
+
+def shutdown_services():
+    if scoring_pool:
+        scoring_pool.shutdown()
+    if recommendation_engine:
+        recommendation_engine.close()
+    if catalogue_watcher:
+        catalogue_watcher.stop()
+    logging_setup.stop()
+
+def service_busy(error: PoolSaturatedError) -> HTTPException:
+    """503 response telling clients to back off while the scoring queue is full"""
+    logger.warning("Rejecting request: %s", error)
+    return HTTPException(status_code=503, detail="Recommendation service is busy, please retry shortly",
+                         headers={"Retry-After": "1"})
+
+def require_engine():
+    """503 while the engine is still loading, 500 if it failed to load"""
+    if not service_ready.is_set():
+        raise HTTPException(status_code=503, detail="Recommendation engine is starting, please retry shortly",
+                            headers={"Retry-After": "2"})
+    if not recommendation_engine:
+        raise HTTPException(status_code=500, detail="Recommendation engine not available")
 
 class CandidateProfile(BaseModel):
     age: str
@@ -44,8 +258,57 @@ class CandidateProfile(BaseModel):
     sectors: List[str]
     location: str
 
+class Internship(BaseModel):
+    id: str
+    title: str
+    company: str
+    sector: str
+    skills: List[str]
+    location: str
+    duration: str
+    stipend: str
+    description: str
+    requirements: List[str]
+    education_level: str
+    age_range: str
+
+class CatalogueDeltas(BaseModel):
+    upsert: List[Internship] = []
+    delete: List[str] = []
+
+class DiversityOptions(BaseModel):
+    """Diversity re-ranking of the best-scored listings (maximal marginal relevance)"""
+    relevance_weight: float = Field(0.7, ge=0.0, le=1.0)
+    company_weight: float = Field(1.0, ge=0.0)
+    sector_weight: float = Field(0.5, ge=0.0)
+    location_weight: float = Field(0.5, ge=0.0)
+    max_per_company: Optional[int] = Field(None, ge=1)
+    candidates: int = Field(50, ge=1, le=MAX_CANDIDATES)
+    budget_ms: float = Field(5.0, gt=0.0)
+
 class RecommendationRequest(BaseModel):
     profile: CandidateProfile
+    diversity: Optional[DiversityOptions] = None
+    # Named scoring config to rank with (the config file's default when omitted)
+    scoring: Optional[str] = None
+
+class ProfileChanges(BaseModel):
+    """Fields of a session's candidate profile to change; omitted fields keep their value"""
+    age: Optional[str] = None
+    education: Optional[str] = None
+    skills: Optional[List[str]] = None
+    sectors: Optional[List[str]] = None
+    location: Optional[str] = None
+
+# Results per profile of /recommend/batch: the default and the most a request may ask for
+BATCH_TOP_K = 5
+MAX_BATCH_TOP_K = 100
+
+class BatchRecommendationRequest(BaseModel):
+    profiles: List[CandidateProfile]
+    # Same setting as the top_k query parameter; either may be given
+    top_k: Optional[int] = Field(None, ge=1, le=MAX_BATCH_TOP_K)
+    scoring: Optional[str] = None
 
 class InternshipRecommendation(BaseModel):
     id: str
@@ -66,6 +329,32 @@ class RecommendationResponse(BaseModel):
     total_matches: int
     processing_time: float
 
+class SessionRecommendationResponse(RecommendationResponse):
+    session: str
+
+class BatchRecommendationResult(BaseModel):
+    recommendations: List[InternshipRecommendation]
+    total_matches: int
+
+class BatchRecommendationResponse(BaseModel):
+    results: List[BatchRecommendationResult]
+    total_profiles: int
+    processing_time: float
+
+# Profiles scored per engine call when streaming NDJSON batches
+NDJSON_CHUNK_SIZE = 256
+
+class DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse whose body iterator may keep reading the request body.
+
+    The default implementation listens for disconnects on ``receive`` while
+    streaming, which would swallow request body chunks that are still arriving.
+    """
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
 @app.get("/")
 async def root():
     return {
@@ -76,59 +365,326 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "recommendation-engine"}
+    # Load balancers should route traffic only once this answers 200
+    if not recommendation_engine:
+        return JSONResponse({"status": service_status["status"], "service": "recommendation-engine"},
+                            status_code=503)
+    return {"status": "healthy", "service": "recommendation-engine",
+            "startup_time": service_status["startup_time"], "loaded_from": service_status["loaded_from"],
+            "catalogue_version": recommendation_engine.catalogue_version}
+
+def scoring_rules(name: Optional[str]):
+    """Rules of the named scoring config, 400 for a name the config file does not define"""
+    try:
+        return recommendation_engine.scoring.get(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/recommend", response_model=RecommendationResponse)
 async def get_recommendations(request: RecommendationRequest):
     """
     Get personalized internship recommendations based on candidate profile
     """
-    if not recommendation_engine:
-        raise HTTPException(status_code=500, detail="Recommendation engine not available")
+    require_engine()
+    rules = scoring_rules(request.scoring)
     
     try:
         import time
         start_time = time.time()
         
-        print(f"📝 Processing recommendation request for profile: {request.profile.model_dump()}")
+        # Identical profiles (after normalization) share cached response bodies
+        profile = canonical_profile(**request.profile.model_dump())
+        reranker = None
+        if request.diversity is not None:
+            reranker = DiversityReranker(**request.diversity.model_dump())
+        # Results differ per scoring config and set of diversity options
+        request_profile = dict(profile, scoring=rules.key)
+        if reranker is not None:
+            request_profile["diversity"] = request.diversity.model_dump()
+        cache_key = None
+        body = None
+        if recommendation_cache:
+            cache_key = recommendation_cache.key(request_profile, 5, recommendation_engine.catalogue_version)
+            body = recommendation_cache.get(cache_key)
+        cached = body is not None
+        coalesced = False
         
-        # Get recommendations from the engine
-        recommendations = recommendation_engine.get_recommendations(
-            age=request.profile.age,
-            education=request.profile.education,
-            skills=request.profile.skills,
-            sectors=request.profile.sectors,
-            location=request.profile.location
-        )
+        if body is None:
+            async def compute() -> bytes:
+                # Serialized recommendations from the engine (canonical skill order, so cached and fresh results agree)
+                recommendations = await scoring_pool.call(
+                    "get_recommendations",
+                    age=request.profile.age,
+                    education=request.profile.education,
+                    skills=profile["skills"],
+                    sectors=request.profile.sectors,
+                    location=request.profile.location,
+                    serialized=True,
+                    reranker=reranker,
+                    scoring=request.scoring
+                )
+                computed = recommendations_body(recommendations)
+                if cache_key:
+                    recommendation_cache.set(cache_key, computed)
+                return computed
+            
+            if request_coalescer:
+                # Identical requests arriving while this one is scored wait for its result
+                flight_key = f"{recommendation_engine.catalogue_version}:{profile_cache_key(request_profile, 5)}"
+                try:
+                    body, coalesced = await request_coalescer.run(flight_key, compute)
+                except asyncio.TimeoutError:
+                    logger.warning("Timed out waiting for recommendations after %ss", request_coalescer.timeout)
+                    raise
+            else:
+                body = await compute()
         
         processing_time = time.time() - start_time
         
-        print(f"✅ Generated {len(recommendations)} recommendations in {processing_time:.3f}s")
+        # Profiles are personal data: only counts are logged
+        annotate_request(result_count=body_result_count(body), skill_count=len(profile["skills"]), cached=cached,
+                         coalesced=coalesced)
+        
+        # The body is already the JSON of a RecommendationResponse, so it is sent without re-validating it
+        return Response(content=recommendation_response(body, round(processing_time, 3)),
+                        media_type="application/json")
         
-        return RecommendationResponse(
-            recommendations=recommendations,
-            total_matches=len(recommendations),
+    except PoolSaturatedError as e:
+        raise service_busy(e)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Timed out generating recommendations")
+    except Exception as e:
+        logger.exception("Error generating recommendations: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
+
+def require_sessions():
+    """404 when profile sessions are disabled, 409 when scoring does not run on this process's engine"""
+    require_engine()
+    if profile_sessions is None:
+        raise HTTPException(status_code=404, detail="Profile sessions are disabled")
+    if not scoring_pool.shares_engine:
+        # Sessions live in this process; worker processes could not reuse their scores
+        raise HTTPException(status_code=409, detail="Profile sessions are not available in process executor mode")
+
+def session_fields(fields: Dict) -> Dict:
+    """Profile fields as sessions keep them: skills in canonical order, as /recommend scores them"""
+    if "skills" in fields:
+        fields["skills"] = canonical_profile(age="", education="", skills=fields["skills"], sectors=[],
+                                             location="")["skills"]
+    return fields
+
+async def score_session(session, changes: Optional[Dict] = None) -> Response:
+    """Recommendations of a profile session after ``changes``, with its token"""
+    start_time = time.time()
+    try:
+        reranker = DiversityReranker(**session.diversity) if session.diversity is not None else None
+        recommendations = await scoring_pool.call("get_session_recommendations", session, changes, serialized=True,
+                                                  reranker=reranker)
+        profile_sessions.store(session, new=changes is None)
+    except PoolSaturatedError as e:
+        raise service_busy(e)
+    except Exception as e:
+        logger.exception("Error generating session recommendations: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
+    
+    body = recommendations_body(recommendations) + b',"session":' + dumps(session.token)
+    # Field names only: profiles are personal data
+    annotate_request(result_count=len(recommendations), changed=sorted(changes) if changes else None)
+    return Response(content=recommendation_response(body, round(time.time() - start_time, 3)),
+                    media_type="application/json")
+
+@app.post("/recommend/sessions", response_model=SessionRecommendationResponse)
+async def create_profile_session(request: RecommendationRequest):
+    """
+    Start a profile session: recommendations for a full profile, plus a session token for later edits
+    """
+    require_sessions()
+    scoring_rules(request.scoring)
+    diversity = request.diversity.model_dump() if request.diversity is not None else None
+    session = profile_sessions.create(session_fields(request.profile.model_dump()), request.scoring, diversity)
+    return await score_session(session)
+
+@app.patch("/recommend/sessions/{token}", response_model=SessionRecommendationResponse)
+async def update_profile_session(token: str, changes: ProfileChanges):
+    """
+    Recommendations after changing some fields of a session's profile; only their scores are recomputed
+    """
+    require_sessions()
+    session = profile_sessions.get(token)
+    if session is None:
+        # Unknown, deleted or evicted: the client starts a new session with its full profile
+        raise HTTPException(status_code=404, detail="Profile session not found")
+    return await score_session(session, session_fields(changes.model_dump(exclude_none=True)))
+
+@app.delete("/recommend/sessions/{token}")
+async def delete_profile_session(token: str):
+    require_sessions()
+    if not profile_sessions.delete(token):
+        raise HTTPException(status_code=404, detail="Profile session not found")
+    return {"status": "deleted"}
+
+@app.post("/recommend/batch")
+async def get_recommendations_batch(
+    request: Request,
+    top_k: Optional[int] = Query(None, ge=1, le=MAX_BATCH_TOP_K, description="Results per profile (default 5)"),
+    scoring: Optional[str] = None
+):
+    """
+    Get recommendations for many candidate profiles in one call.
+
+    Send ``application/json`` with ``{"profiles": [...], "top_k": 5}`` for a single
+    JSON response, or ``application/x-ndjson`` with one profile per line to stream
+    one result line per profile back (in input order) with flat memory use.
+    ``top_k`` may be given as a query parameter in both modes.
+    """
+    require_engine()
+    
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type:
+        scoring_rules(scoring)
+        return DuplexStreamingResponse(_stream_batch_recommendations(request, top_k or BATCH_TOP_K, scoring),
+                                       media_type="application/x-ndjson")
+    
+    try:
+        batch = BatchRecommendationRequest.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
+    if batch.top_k is not None and top_k is not None and batch.top_k != top_k:
+        raise HTTPException(status_code=400, detail="top_k differs between the query string and the request body")
+    top_k = batch.top_k or top_k or BATCH_TOP_K
+    scoring_rules(batch.scoring)
+    
+    try:
+        import time
+        start_time = time.time()
+        
+        batch_results = await scoring_pool.call(
+            "get_recommendations_batch", [profile.model_dump() for profile in batch.profiles], top_k=top_k,
+            scoring=batch.scoring)
+        results = [
+            BatchRecommendationResult(recommendations=recommendations, total_matches=len(recommendations))
+            for recommendations in batch_results
+        ]
+        
+        processing_time = time.time() - start_time
+        annotate_request(profile_count=len(results))
+        
+        return BatchRecommendationResponse(
+            results=results,
+            total_profiles=len(results),
             processing_time=round(processing_time, 3)
         )
         
+    except PoolSaturatedError as e:
+        raise service_busy(e)
     except Exception as e:
-        print(f"❌ Error generating recommendations: {str(e)}")
+        logger.exception("Error generating batch recommendations: %s", e)
         raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
 
+async def _stream_batch_recommendations(request: Request, top_k: int, scoring: Optional[str] = None):
+    """Read NDJSON profiles from the request body and yield one NDJSON result line per profile"""
+    # Score columns can only be shared across chunks when workers use this process's engine
+    column_cache = OrderedDict() if scoring_pool.shares_engine else None
+    chunk = []
+    index = 0
+    buffer = b""
+    
+    async def score_chunk(chunk):
+        valid = [profile for _, profile in chunk if not isinstance(profile, str)]
+        while True:
+            try:
+                results = iter(await scoring_pool.call(
+                    "get_recommendations_batch", valid, top_k=top_k, column_cache=column_cache, scoring=scoring))
+                break
+            except PoolSaturatedError:
+                # The response is already streaming, so wait for capacity instead of failing
+                await asyncio.sleep(0.05)
+        lines = []
+        for line_index, profile in chunk:
+            if isinstance(profile, str):
+                result = {"index": line_index, "error": profile}
+            else:
+                recommendations = next(results)
+                result = {"index": line_index, "recommendations": recommendations,
+                          "total_matches": len(recommendations)}
+            lines.append(json.dumps(result, ensure_ascii=False) + "\n")
+        return "".join(lines)
+    
+    async def read_lines():
+        nonlocal buffer
+        async for data in request.stream():
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                yield line
+        if buffer:
+            yield buffer
+    
+    async for line in read_lines():
+        if not line.strip():
+            continue
+        try:
+            profile = CandidateProfile.model_validate_json(line).model_dump()
+        except ValidationError as e:
+            profile = f"Invalid profile: {e.errors()[0]['msg']}"
+        chunk.append((index, profile))
+        index += 1
+        if len(chunk) >= NDJSON_CHUNK_SIZE:
+            yield await score_chunk(chunk)
+            chunk = []
+    
+    if chunk:
+        yield await score_chunk(chunk)
+    annotate_request(profile_count=index)
+
+# Internships serialized per chunk when exporting NDJSON
+EXPORT_CHUNK_SIZE = 500
+
+def _export_internships(internships):
+    """Group exported internships into NDJSON chunks"""
+    lines = []
+    for internship in internships:
+        lines.append(json.dumps(internship, ensure_ascii=False) + "\n")
+        if len(lines) >= EXPORT_CHUNK_SIZE:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
 @app.get("/internships")
-async def get_all_internships():
+async def get_all_internships(
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,title,company"),
+    sector: Optional[str] = None,
+    location: Optional[str] = Query(None, description="City, state or full location"),
+    education: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$")
+):
     """
-    Get all available internships (for debugging/admin purposes)
+    Browse available internships page by page, or export them all as NDJSON (format=ndjson)
     """
-    if not recommendation_engine:
-        raise HTTPException(status_code=500, detail="Recommendation engine not available")
+    require_engine()
+    
+    field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    filters = {"sector": sector, "location": location, "education_level": education}
     
     try:
-        internships = recommendation_engine.get_all_internships()
-        print(f"✅ Retrieved {len(internships)} internships")
-        return {"internships": internships, "total": len(internships)}
+        if format == "ndjson":
+            # Streamed from one catalogue snapshot, memory use does not grow with the catalogue
+            internships = recommendation_engine.iter_internships(cursor, field_list, filters)
+            return StreamingResponse(_export_internships(internships), media_type="application/x-ndjson")
+        
+        page = recommendation_engine.get_internships_page(cursor, limit, field_list, filters)
+        annotate_request(result_count=len(page["internships"]))
+        return page
+    except StaleCursorError as e:
+        # Positions were renumbered by a reload or compaction: paging restarts from the first page
+        raise HTTPException(status_code=410, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"❌ Error fetching internships: {str(e)}")
+        logger.exception("Error fetching internships: %s", e)
         raise HTTPException(status_code=500, detail=f"Error fetching internships: {str(e)}")
 
 @app.get("/stats")
@@ -136,17 +692,203 @@ async def get_stats():
     """
     Get system statistics
     """
-    if not recommendation_engine:
-        raise HTTPException(status_code=500, detail="Recommendation engine not available")
+    require_engine()
     
     try:
         stats = recommendation_engine.get_stats()
-        print("✅ Retrieved system stats")
+        stats["reranking"] = dict(recommendation_engine.rerank_counts)
+        stats["scoring"] = recommendation_engine.scoring.summary()
+        similarity = recommendation_engine.snapshot.skill_index.similarity
+        stats["skill_similarity"] = similarity.summary() if similarity is not None else None
+        stats["scoring_pool"] = scoring_pool.stats()
+        stats["shards"] = recommendation_engine.shards
+        stats["recommendation_cache"] = recommendation_cache.stats() if recommendation_cache else None
+        stats["coalescing"] = request_coalescer.stats() if request_coalescer else None
+        stats["profile_sessions"] = profile_sessions.stats() if profile_sessions else None
         return stats
     except Exception as e:
-        print(f"❌ Error fetching stats: {str(e)}")
+        logger.exception("Error fetching stats: %s", e)
         raise HTTPException(status_code=500, detail=f"Error fetching stats: {str(e)}")
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Request, scoring pool, cache, coalescing and scoring stage metrics in the Prometheus text format
+    """
+    lines = prometheus_histogram("http_request_duration_seconds", "Request latency per endpoint",
+                                 (({"endpoint": name}, histogram) for name, histogram in request_latency.items()))
+    if scoring_pool:
+        lines += scoring_pool.prometheus()
+    if recommendation_cache:
+        cache_stats = recommendation_cache.stats()
+        for name in ("hits", "misses"):
+            lines += [f"# HELP recommendation_cache_{name}_total Recommendation cache {name}",
+                      f"# TYPE recommendation_cache_{name}_total counter",
+                      f"recommendation_cache_{name}_total {cache_stats[name]}"]
+    if request_coalescer:
+        lines += request_coalescer.prometheus()
+    lines += ["# HELP log_records_dropped_total Log records dropped because the log queue was full",
+              "# TYPE log_records_dropped_total counter",
+              f"log_records_dropped_total {logging_setup.dropped}"]
+    if recommendation_engine:
+        lines += ["# HELP recommendation_rerank_total Requests re-ranked after scoring, by outcome",
+                  "# TYPE recommendation_rerank_total counter"]
+        lines += [f'recommendation_rerank_total{{outcome="{outcome}"}} {count}'
+                  for outcome, count in recommendation_engine.rerank_counts.items()]
+    if recommendation_engine and recommendation_engine.profiler:
+        lines += recommendation_engine.profiler.prometheus()
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+def require_admin(token: Optional[str]):
+    """Admin endpoints are enabled by setting ADMIN_TOKEN and sending it as X-Admin-Token"""
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token or token != admin_token:
+        raise HTTPException(status_code=403, detail="Admin access denied")
+    require_engine()
+    if not scoring_pool.shares_engine:
+        # Worker processes hold their own engines; they follow CATALOGUE_DELTAS_PATH instead
+        raise HTTPException(status_code=409,
+                            detail="Use CATALOGUE_DELTAS_PATH to update the catalogue in process executor mode")
+
+async def apply_catalogue_deltas(deltas: List) -> Dict:
+    if recommendation_engine.shard_pool is not None:
+        # Shards hold the listings of fixed lines of the catalogue file
+        raise HTTPException(status_code=409,
+                            detail="Catalogue deltas are not supported with SCORING_SHARDS, reload the catalogue file")
+    try:
+        # Index updates are CPU work, keep them off the event loop
+        summary = await asyncio.get_running_loop().run_in_executor(
+            None, recommendation_engine.apply_deltas, deltas)
+    except Exception as e:
+        logger.exception("Error updating catalogue: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error updating catalogue: {str(e)}")
+    logger.info("Applied catalogue changes", extra={"changes": len(deltas),
+                                                     "update_ms": round(summary["update_time"] * 1000, 3)})
+    return summary
+
+@app.put("/admin/internships/{internship_id}")
+async def upsert_internship(internship_id: str, internship: Internship,
+                            x_admin_token: Optional[str] = Header(None)):
+    """
+    Add or replace one internship in the live catalogue
+    """
+    require_admin(x_admin_token)
+    if internship.id != internship_id:
+        raise HTTPException(status_code=400, detail="Internship id does not match the URL")
+    return await apply_catalogue_deltas([("upsert", internship.model_dump())])
+
+@app.delete("/admin/internships/{internship_id}")
+async def delete_internship(internship_id: str, x_admin_token: Optional[str] = Header(None)):
+    """
+    Remove one internship from the live catalogue
+    """
+    require_admin(x_admin_token)
+    summary = await apply_catalogue_deltas([("delete", internship_id)])
+    if summary["missing"]:
+        raise HTTPException(status_code=404, detail=f"Internship {internship_id} not found")
+    return summary
+
+@app.post("/admin/internships/deltas")
+async def apply_internship_deltas(deltas: CatalogueDeltas, x_admin_token: Optional[str] = Header(None)):
+    """
+    Apply a batch of upserts and deletes to the live catalogue in one snapshot swap
+    """
+    require_admin(x_admin_token)
+    changes = [("upsert", internship.model_dump()) for internship in deltas.upsert]
+    changes += [("delete", internship_id) for internship_id in deltas.delete]
+    return await apply_catalogue_deltas(changes)
+
+@app.post("/admin/reload")
+async def reload_catalogue(x_admin_token: Optional[str] = Header(None)):
+    """
+    Reload the catalogue file from disk and rebuild every index
+    """
+    require_admin(x_admin_token)
+    try:
+        import time
+        start_time = time.time()
+        await asyncio.get_running_loop().run_in_executor(None, recommendation_engine.reload)
+        logger.info("Reloaded internship catalogue")
+        return {"version": recommendation_engine.catalogue_version,
+                "total_internships": recommendation_engine.snapshot.live_count,
+                "reload_time": round(time.time() - start_time, 3)}
+    except Exception as e:
+        logger.exception("Error reloading catalogue: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error reloading catalogue: {str(e)}")
+
+@app.post("/admin/scoring/reload")
+async def reload_scoring(x_admin_token: Optional[str] = Header(None)):
+    """
+    Reload the scoring config file; an invalid file is rejected and the current rules stay in use
+    """
+    require_admin(x_admin_token)
+    try:
+        recommendation_engine.reload_scoring()
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid scoring config: {str(e)}")
+    logger.info("Reloaded scoring config", extra={"scoring_version": recommendation_engine.scoring.version})
+    return recommendation_engine.scoring.summary()
+
+def serve_preforked(host: str, port: int, workers: int):
+    """Load the engine once, then fork ``workers`` server processes sharing its memory and one listening socket"""
+    import gc
+    import signal
+    import socket
+    import uvicorn
+
+    service_ready.wait()
+    if not recommendation_engine:
+        raise SystemExit("Recommendation engine failed to load")
+    if recommendation_engine.shard_pool is not None:
+        # Shard processes belong to the process that started them and cannot be shared by forked servers
+        raise SystemExit("SCORING_SHARDS needs a single server process (each shard already uses its own core)")
+    # Each server process runs its own watcher; the loaded engine stays shared copy-on-write until it changes
+    if catalogue_watcher:
+        catalogue_watcher.stop()
+    # Keep the collector from touching (and so copying) the pages of the loaded objects in every child
+    gc.freeze()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    sock.listen(2048)
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            start_watching_catalogue()
+            server = uvicorn.Server(uvicorn.Config(app, log_config=None, access_log=False))
+            server.run(sockets=[sock])
+            os._exit(0)
+        children.append(pid)
+    logger.info("Started server processes", extra={"workers": workers, "pids": children, "port": port})
+
+    def forward(signum, frame):
+        for child in children:
+            try:
+                os.kill(child, signum)
+            except ProcessLookupError:
+                pass
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for child in children:
+        os.waitpid(child, 0)
+    logging_setup.stop()
+
 if __name__ == "__main__":
+    import argparse
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+
+    parser = argparse.ArgumentParser(description="YuvaSetu.AI recommendation API server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")),
+                        help="Server processes forked after the engine is loaded")
+    args = parser.parse_args()
+    if args.workers > 1:
+        serve_preforked(args.host, args.port, args.workers)
+    else:
+        # Logging is configured by configure_logging, and the access log is written by the request middleware
+        uvicorn.run(app, host=args.host, port=args.port, log_config=None, access_log=False)
@@ -0,0 +1,77 @@
+import threading
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is unbounded
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with O(1) observations and a bounded memory footprint"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        index = 0
+        while index < len(self.buckets) and seconds > self.buckets[index]:
+            index += 1
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of observations (capped at the maximum)"""
+        target = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target and bucket_count:
+                return min(self.buckets[index], self.max) if index < len(self.buckets) else self.max
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        with self.lock:
+            if not self.count:
+                return {"count": 0}
+            buckets = {f"le_{bound * 1000:g}ms": count for bound, count in zip(self.buckets, self.counts)}
+            buckets["le_inf"] = self.counts[-1]
+            return {
+                "count": self.count,
+                "mean_ms": round(self.total / self.count * 1000, 3),
+                "p50_ms": round(self.percentile(0.50) * 1000, 3),
+                "p90_ms": round(self.percentile(0.90) * 1000, 3),
+                "p99_ms": round(self.percentile(0.99) * 1000, 3),
+                "max_ms": round(self.max * 1000, 3),
+                "buckets": buckets,
+            }
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    return ",".join(f'{name}="{value}"' for name, value in labels.items())
+
+
+def prometheus_histogram(name: str, help_text: str,
+                         series: Iterable[Tuple[Dict[str, str], LatencyHistogram]]) -> List[str]:
+    """Histograms (in seconds) in the Prometheus text exposition format, one series per label set"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, histogram in series:
+        with histogram.lock:
+            counts, total, count = list(histogram.counts), histogram.total, histogram.count
+        label_text = _labels(labels)
+        prefix = f"{label_text}," if label_text else ""
+        cumulative = 0
+        for bound, bucket_count in zip(histogram.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {count}')
+        suffix = f"{{{label_text}}}" if label_text else ""
+        lines.append(f"{name}_sum{suffix} {total:.9g}")
+        lines.append(f"{name}_count{suffix} {count}")
+    return lines
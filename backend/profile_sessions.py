@@ -0,0 +1,110 @@
+import array
+import secrets
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Estimated memory of a session besides its columns: the profile, token, lock and store entry. Counted
+# against the store's budget so that sessions over small catalogues cannot grow without bound.
+SESSION_OVERHEAD_BYTES = 4096
+
+
+class ProfileSession:
+    """Component scores of one candidate profile against every listing of the catalogue.
+
+    ``columns`` maps each profile component (skills, sectors, location,
+    education, age) to its score for every catalogue position, as scored for
+    ``catalogue_version`` under the scoring rules ``rules_key``. When one field
+    of the profile changes, only its column is scored again and the totals are
+    recombined from the others. Columns are stored as flat float64 arrays (the
+    engine's NumPy arrays, or ``array.array`` for lists) to keep a session at 8
+    bytes per listing and component, plus ``SESSION_OVERHEAD_BYTES``.
+
+    ``lock`` serializes updates of the same session from concurrent requests.
+    """
+
+    def __init__(self, token: str, profile: Dict[str, Any], scoring: Optional[str] = None,
+                 diversity: Optional[Dict[str, Any]] = None):
+        self.token = token
+        self.profile = dict(profile)
+        self.scoring = scoring
+        # Options of the diversity re-ranking stage, kept for every update
+        self.diversity = diversity
+        self.catalogue_version: Optional[str] = None
+        self.rules_key: Optional[str] = None
+        self.columns: Dict[str, Any] = {}
+        self.lock = threading.Lock()
+        # Size last accounted for by the store
+        self.stored_nbytes = 0
+
+    def set_column(self, component: str, column: Any):
+        self.columns[component] = array.array("d", column) if isinstance(column, list) else column
+
+    @property
+    def nbytes(self) -> int:
+        return SESSION_OVERHEAD_BYTES + sum(len(column) * column.itemsize for column in self.columns.values())
+
+
+class ProfileSessionStore:
+    """In-process profile sessions, least recently used evicted first once they hold more than ``max_bytes``.
+
+    A session larger than the whole budget is evicted as soon as it is stored;
+    clients recreate evicted sessions from their full profile.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.sessions: "OrderedDict[str, ProfileSession]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.nbytes = 0
+        self.created = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def create(self, profile: Dict[str, Any], scoring: Optional[str] = None,
+               diversity: Optional[Dict[str, Any]] = None) -> ProfileSession:
+        """New empty session; ``store`` it once its columns are scored"""
+        with self.lock:
+            self.created += 1
+        return ProfileSession(secrets.token_urlsafe(16), profile, scoring, diversity)
+
+    def get(self, token: str) -> Optional[ProfileSession]:
+        with self.lock:
+            session = self.sessions.get(token)
+            if session is None:
+                self.misses += 1
+                return None
+            self.sessions.move_to_end(token)
+            self.hits += 1
+            return session
+
+    def store(self, session: ProfileSession, new: bool = False):
+        """Account for a session's current columns; sessions deleted or evicted meanwhile stay gone unless ``new``"""
+        with self.lock:
+            stored = self.sessions.get(session.token) is session
+            if not new and not stored:
+                return
+            if stored:
+                self.nbytes -= session.stored_nbytes
+            session.stored_nbytes = session.nbytes
+            self.nbytes += session.stored_nbytes
+            self.sessions[session.token] = session
+            self.sessions.move_to_end(session.token)
+            while self.sessions and self.nbytes > self.max_bytes:
+                _, evicted = self.sessions.popitem(last=False)
+                self.nbytes -= evicted.stored_nbytes
+                self.evictions += 1
+
+    def delete(self, token: str) -> bool:
+        with self.lock:
+            session = self.sessions.pop(token, None)
+            if session is None:
+                return False
+            self.nbytes -= session.stored_nbytes
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {"sessions": len(self.sessions), "bytes": self.nbytes, "max_bytes": self.max_bytes,
+                "created": self.created, "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions}
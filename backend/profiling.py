@@ -0,0 +1,133 @@
+import random
+import threading
+import time
+from typing import Any, Dict, List
+
+from metrics import LatencyHistogram, prometheus_histogram
+
+# Stage times are often far below a millisecond, so the buckets start at 10µs
+STAGE_LATENCY_BUCKETS = (0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                         0.1, 0.25, 0.5, 1.0)
+
+# Engine methods timed in profiled requests. Times are inclusive: a stage includes the stages it calls.
+PROFILED_STAGES = (
+    "get_recommendations",
+    "_rank",
+    "_rank_vectorized",
+    "_profile_terms",
+    "_related_skills",
+    "_semantic_matches",
+    "_related_positions",
+    "_calculate_skill_match_score",
+    "_calculate_sector_scores",
+    "_calculate_location_scores",
+    "_calculate_education_match_score",
+    "_calculate_age_match_score",
+    "_build_recommendation",
+    "_serialize_recommendation",
+    "_rerank",
+)
+
+
+class _ProfiledEngine:
+    """Stand-in for the engine during one sampled request.
+
+    Engine methods are looked up on the engine's class and bound to this
+    object, so calls between them (``self._calculate_...``) come back here and
+    the profiled stages are timed. Other attributes are read from the engine.
+    Unsampled requests never see this class, so they pay no timing overhead.
+    """
+
+    def __init__(self, engine, timings: Dict[str, List[float]]):
+        self.__dict__["_engine"] = engine
+        self.__dict__["_timings"] = timings
+        # Nested calls must not start another profiled run
+        self.__dict__["profiler"] = None
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(type(self._engine), name, None)
+        if not callable(attribute) or isinstance(attribute, type):
+            return getattr(self._engine, name)
+
+        method = attribute.__get__(self)
+        if name in PROFILED_STAGES:
+            method = self._timed(name, method)
+        # Bind each method once per request
+        self.__dict__[name] = method
+        return method
+
+    def _timed(self, stage: str, method):
+        timing = self._timings.setdefault(stage, [0.0, 0])
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                timing[0] += perf_counter() - start
+                timing[1] += 1
+
+        return timed
+
+
+class StageProfiler:
+    """Per-stage time and call counts for a sample of engine requests.
+
+    ``sample_rate`` is the fraction of requests profiled (1.0 profiles every
+    request). Each profiled request adds its time per stage to a latency
+    histogram and its calls to a counter, so memory stays bounded however many
+    requests are profiled.
+    """
+
+    def __init__(self, sample_rate: float = 1.0):
+        self.sample_rate = min(1.0, max(0.0, sample_rate))
+        self.stage_seconds: Dict[str, LatencyHistogram] = {stage: LatencyHistogram(STAGE_LATENCY_BUCKETS)
+                                                             for stage in PROFILED_STAGES}
+        self.stage_calls: Dict[str, int] = {stage: 0 for stage in PROFILED_STAGES}
+        self.profiled_requests = 0
+        self.lock = threading.Lock()
+
+    def sampled(self) -> bool:
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def run(self, engine, method: str, *args, **kwargs) -> Any:
+        """Call ``engine.<method>`` with its profiled stages timed"""
+        timings: Dict[str, List[float]] = {}
+        proxy = _ProfiledEngine(engine, timings)
+        try:
+            return getattr(proxy, method)(*args, **kwargs)
+        finally:
+            self.record(timings)
+
+    def record(self, timings: Dict[str, List[float]]):
+        with self.lock:
+            self.profiled_requests += 1
+            for stage, (seconds, calls) in timings.items():
+                if calls:
+                    self.stage_calls[stage] += calls
+        for stage, (seconds, calls) in timings.items():
+            if calls:
+                self.stage_seconds[stage].observe(seconds)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "sample_rate": self.sample_rate,
+            "profiled_requests": self.profiled_requests,
+            "stages": {stage: {"calls": self.stage_calls[stage], **self.stage_seconds[stage].summary()}
+                       for stage in PROFILED_STAGES if self.stage_calls[stage]},
+        }
+
+    def prometheus(self) -> List[str]:
+        """Stage metrics in the Prometheus text exposition format"""
+        lines = ["# HELP recommendation_profiled_requests_total Engine requests profiled by stage",
+                 "# TYPE recommendation_profiled_requests_total counter",
+                 f"recommendation_profiled_requests_total {self.profiled_requests}",
+                 "# HELP recommendation_stage_calls_total Calls of each scoring stage in profiled requests",
+                 "# TYPE recommendation_stage_calls_total counter"]
+        lines += [f'recommendation_stage_calls_total{{stage="{stage}"}} {calls}'
+                  for stage, calls in self.stage_calls.items()]
+        lines += prometheus_histogram(
+            "recommendation_stage_seconds", "Time per profiled request spent in each scoring stage (inclusive)",
+            (({"stage": stage}, histogram) for stage, histogram in self.stage_seconds.items()))
+        return lines
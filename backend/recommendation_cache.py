@@ -0,0 +1,193 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Prefix of bytes values in the shared cache; JSON values never start with it
+RAW_MARKER = b"\x00"
+
+
+def canonical_profile(age: str, education: str, skills: List[str], sectors: List[str],
+                      location: str) -> Dict[str, Any]:
+    """Canonical form of a candidate profile, equal for profiles the engine scores identically.
+
+    Skills are lowercased and sorted (duplicates kept, they count in scoring),
+    sectors are lowercased, deduplicated and sorted, the location is reduced to
+    the (city, state) pair the engine compares, education is lowercased and the
+    age is parsed to an int when possible.
+    """
+    if location:
+        parts = location.split(',')
+        location_key = [parts[0].strip().lower(), parts[-1].strip().lower()]
+    else:
+        location_key = None
+
+    try:
+        age_key = int(age)
+    except (TypeError, ValueError):
+        age_key = None
+
+    return {
+        "age": age_key,
+        "education": education.lower(),
+        "skills": sorted(skill.lower() for skill in skills),
+        "sectors": sorted({sector.lower() for sector in sectors}),
+        "location": location_key,
+    }
+
+
+def profile_cache_key(profile: Dict[str, Any], top_k: int) -> str:
+    """Stable hash of a canonical profile and the requested result count"""
+    payload = json.dumps([profile, top_k], sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class LocalCacheBackend:
+    """In-process LRU cache with a per-entry TTL"""
+
+    def __init__(self, max_size: int = 4096, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                self.expirations += 1
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "local", "size": len(self.entries), "max_size": self.max_size,
+                "evictions": self.evictions, "expirations": self.expirations}
+
+
+class SharedCacheBackend:
+    """Cache stored in a Redis-compatible server, shared by every worker.
+
+    Entries expire through the server's TTL and LRU eviction is left to the
+    server's ``maxmemory-policy`` (use ``allkeys-lru``). Keys embed the catalogue
+    version, so old entries simply stop being read after the dataset changes.
+    Bytes values (serialized responses) are stored as they are, anything else as JSON.
+    """
+
+    def __init__(self, client, ttl: float = 300.0, prefix: str = "yuvasetu:recommend:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, ttl: float = 300.0) -> "SharedCacheBackend":
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("The redis package is required for a shared recommendation cache (pip install redis)")
+        return cls(redis.Redis.from_url(url), ttl=ttl)
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            return None
+        return value[len(RAW_MARKER):] if value.startswith(RAW_MARKER) else json.loads(value)
+
+    def set(self, key: str, value: Any):
+        payload = RAW_MARKER + value if isinstance(value, bytes) else json.dumps(value, ensure_ascii=False)
+        self.client.set(self.prefix + key, payload, ex=max(1, int(self.ttl)))
+
+    def clear(self):
+        pass  # Versioned keys make old entries unreachable; the server expires them
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "shared", "ttl": self.ttl}
+
+
+class InMemorySharedStore:
+    """Local stand-in for a Redis client (``get``/``set`` with ``ex``), for tests and single-process runs"""
+
+    def __init__(self):
+        self.values: Dict[str, Tuple[Optional[float], bytes]] = {}
+        self.lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[bytes]:
+        with self.lock:
+            entry = self.values.get(name)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self.values[name]
+                return None
+            return value
+
+    def set(self, name: str, value: str, ex: Optional[int] = None):
+        with self.lock:
+            expires_at = time.monotonic() + ex if ex else None
+            self.values[name] = (expires_at, value.encode("utf-8") if isinstance(value, str) else value)
+
+
+class RecommendationCache:
+    """Recommendation cache keyed by canonical profile and catalogue version.
+
+    The catalogue version is part of every key and a version change clears the
+    backend, so cached results never outlive the dataset they were computed on.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.catalogue_version: Optional[str] = None
+
+    def key(self, profile: Dict[str, Any], top_k: int, catalogue_version: str) -> str:
+        if catalogue_version != self.catalogue_version:
+            self.invalidate(catalogue_version)
+        return f"{catalogue_version}:{profile_cache_key(profile, top_k)}"
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any):
+        self.backend.set(key, value)
+
+    def invalidate(self, catalogue_version: Optional[str] = None):
+        """Drop cached results, e.g. after the internship dataset changed"""
+        self.backend.clear()
+        self.catalogue_version = catalogue_version
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "catalogue_version": self.catalogue_version,
+            **self.backend.stats(),
+        }
@@ -1,15 +1,90 @@
 import json
+import logging
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Sequence, Tuple
 import re
-from datetime import datetime
+import heapq
+import itertools
 import math
-from collections import Counter
+import threading
+import time
+from collections import Counter, OrderedDict
+from synonyms import SynonymEngine
+from canonical import ProfileTerms, canonical_city
+from internship_store import InternshipStore, InternshipRecord
+from catalogue import CatalogueSnapshot, Delta
+from engine_snapshot import load_engine_snapshot, save_engine_snapshot
+from categorical_index import CATEGORICAL_FIELDS, CategoricalIndex
+from skill_index import SkillIndex
+from profiling import StageProfiler
+from profile_sessions import ProfileSession
+from sharding import ShardPool
+from response_fragments import FragmentCache, render_recommendation
+from reranking import Reranker
+from scoring_config import ScoringConfig, ScoringRules
+from text_retrieval import profile_text
+
+logger = logging.getLogger(__name__)
+
+# Profile fields scored independently of each other, in weighted-total order
+PROFILE_COMPONENTS = ("skills", "sectors", "location", "education", "age")
+
+# Profile components scored per distinct catalogue value, and the record field each is compared with
+CATEGORICAL_COMPONENTS = {"sectors": "sector", "location": "location", "education": "education_level",
+                          "age": "age_range"}
 
 class RecommendationEngine:
-    def __init__(self):
-        self.internships_data = self._load_internships_data()
-        print("✅ Lightweight recommendation engine initialized successfully")
+    def __init__(self, vectorized: bool = False, data_path: Optional[str] = None, retrieval: bool = False,
+                 profile_sample_rate: float = 0.0, snapshot_path: Optional[str] = None,
+                 scoring_path: Optional[str] = None, shards: int = 1, shard: Optional[Tuple[int, int]] = None):
+        self.data_path = data_path
+        # (index, count) when this engine holds one shard of the catalogue (see ShardPool)
+        self.shard = shard
+        # Optional prebuilt engine snapshot, loaded instead of building the indexes (and saved after a build)
+        self.snapshot_path = snapshot_path
+        if snapshot_path and shard:
+            self.snapshot_path = f"{snapshot_path}.shard{shard[0]}of{shard[1]}"
+        # "snapshot" or "build": how the current catalogue snapshot was obtained
+        self.loaded_from = None
+        # Optional NumPy scoring path, scores every internship with array operations
+        self.vectorized = vectorized
+        # Optional ANN text retrieval stage, only a shortlist of internships is scored
+        self.retrieval = retrieval
+        self.synonyms = SynonymEngine.from_file()
+        # Weights, thresholds and rule tables, compiled per named config; replaced as a whole on reload
+        self.scoring = ScoringConfig.from_file(scoring_path)
+        # Optional per-stage timing of a sample of requests
+        self.profiler = StageProfiler(profile_sample_rate) if profile_sample_rate > 0 else None
+        # Serialized catalogue fields of recently recommended internships, for serialized results
+        self.fragments = FragmentCache()
+        # Requests re-ranked after scoring, and how many of them fell back to the plain ranking
+        self.rerank_counts = {"reranked": 0, "fallback": 0}
+        # With several shards, worker processes score their part of the catalogue for every request
+        self.shards = max(1, shards)
+        self.shard_pool = None
+        if self.shards > 1:
+            self.shard_pool = ShardPool(type(self), {
+                "vectorized": vectorized, "data_path": data_path, "retrieval": retrieval,
+                "snapshot_path": snapshot_path, "scoring_path": self.scoring.path}, self.shards)
+            # Shards load alongside this engine's own copy of the catalogue
+            shards_loaded = self.shard_pool.submit_all("get_stats")
+        # Catalogue and derived indexes; replaced as a whole (copy-on-write) on updates
+        self.snapshot = self._load_internships_data()
+        self._update_lock = threading.Lock()
+        if self.shard_pool is not None:
+            for future in shards_loaded:
+                future.result()
+        logger.info("Recommendation engine initialized", extra={"internships": self.snapshot.live_count,
+                                                                "loaded_from": self.loaded_from})
+    
+    @property
+    def internships_data(self) -> List[Optional[InternshipRecord]]:
+        """Catalogue records of the current snapshot (``None`` marks a deleted listing)"""
+        return self.snapshot.records
+    
+    @property
+    def catalogue_version(self) -> str:
+        return self.snapshot.version
         
     def _calculate_text_similarity(self, text1: str, text2: str) -> float:
         """Calculate text similarity using cosine similarity with word frequency"""
@@ -35,317 +110,175 @@ class RecommendationEngine:
         
         return dot_product / (magnitude1 * magnitude2)
     
-    def _load_internships_data(self) -> List[Dict[str, Any]]:
-        """Load comprehensive internship dataset"""
-        return [
-            {
-                "id": "1",
-                "title": "Digital Marketing Intern",
-                "company": "TechCorp India",
-                "sector": "Technology",
-                "skills": ["Digital Marketing", "Social Media", "Content Writing", "SEO", "Analytics"],
-                "location": "Mumbai, Maharashtra",
-                "duration": "3 months",
-                "stipend": "₹15,000/month",
-                "description": "Join our dynamic marketing team to create engaging digital campaigns and grow our online presence. Learn modern marketing tools and strategies.",
-                "requirements": ["Basic knowledge of social media platforms", "Good communication skills", "Creative mindset", "Basic understanding of marketing concepts"],
-                "education_level": "Graduate",
-                "age_range": "21-24",
-                "experience_level": "Entry"
-            },
-            {
-                "id": "2",
-                "title": "Software Development Intern",
-                "company": "InnovateTech Solutions",
-                "sector": "Technology",
-                "skills": ["JavaScript", "React", "Node.js", "Python", "Database Management"],
-                "location": "Bangalore, Karnataka",
-                "duration": "6 months",
-                "stipend": "₹20,000/month",
-                "description": "Work with our engineering team to build cutting-edge web applications and learn modern development practices.",
-                "requirements": ["Knowledge of JavaScript", "Understanding of web development concepts", "Problem-solving skills", "Basic programming experience"],
-                "education_level": "Graduate",
-                "age_range": "21-24",
-                "experience_level": "Entry"
-            },
-            {
-                "id": "3",
-                "title": "Graphic Design Intern",
-                "company": "Creative Studio Pro",
-                "sector": "Design",
-                "skills": ["Graphic Design", "Adobe Creative Suite", "UI/UX Design", "Illustration", "Branding"],
-                "location": "Delhi, Delhi",
-                "duration": "4 months",
-                "stipend": "₹12,000/month",
-                "description": "Create visually stunning designs for digital and print media while learning from experienced designers.",
-                "requirements": ["Proficiency in design software", "Creative portfolio", "Attention to detail", "Understanding of design principles"],
-                "education_level": "Graduate",
-                "age_range": "21-24",
-                "experience_level": "Entry"
-            },
-            {
-                "id": "4",
-                "title": "Business Analyst Intern",
-                "company": "FinanceFirst Consulting",
-                "sector": "Finance",
-                "skills": ["Data Analysis", "Excel", "Business Intelligence", "SQL", "Reporting"],
-                "location": "Pune, Maharashtra",
-                "duration": "3 months",
-                "stipend": "₹18,000/month",
-                "description": "Analyze business processes and help optimize operations through data-driven insights.",
-                "requirements": ["Strong analytical skills", "Proficiency in Excel", "Business acumen", "Attention to detail"],
-                "education_level": "Graduate",
-                "age_range": "21-24",
-                "experience_level": "Entry"
-            },
-            {
-                "id": "5",
-                "title": "Content Writing Intern",
-                "company": "MediaMagnet Agency",
-                "sector": "Media",
-                "skills": ["Content Writing", "SEO", "Research", "Social Media", "Copywriting"],
-                "location": "Chennai, Tamil Nadu",
-                "duration": "2 months",
-                "stipend": "₹10,000/month",
-                "description": "Create engaging content for various digital platforms and learn SEO best practices.",
-                "requirements": ["Excellent writing skills", "Research abilities", "Creativity", "Understanding of digital media"],
-                "education_level": "Graduate",
-                "age_range": "21-24",
-                "experience_level": "Entry"
-            },
-            {
-                "id": "6",
-                "title": "Data Science Intern",
-                "company": "Analytics Pro",
-                "sector": "Technology",
-                "skills": ["Python", "Machine Learning", "Data Analysis", "Statistics", "SQL"],
-                "location": "Hyderabad, Telangana",
-                "duration": "6 months",
-                "stipend": "₹25,000/month",
-                "description": "Work on real-world data science projects and learn advanced analytics techniques.",
-                "requirements": ["Strong mathematical background", "Python programming", "Understanding of statistics", "Problem-solving skills"],
-                "education_level": "Post Graduate",
-                "age_range": "22-24",
-                "experience_level": "Entry"
-            },
-            {
-                "id": "7",
-                "title": "HR Operations Intern",
-                "company": "PeopleFirst Corp",
-                "sector": "Human Resources",
-                "skills": ["HR Management", "Recruitment", "Employee Relations", "Communication", "Organization"],
-                "location": "Kolkata, West Bengal",
-                "duration": "3 months",
-                "stipend": "₹14,000/month",
-                "description": "Learn HR operations, recruitment processes, and employee management systems.",
-                "requirements": ["Good communication skills", "Organizational abilities", "Interest in human resources", "Basic computer skills"],
-                "education_level": "Graduate",
-                "age_range": "21-24",
-                "experience_level": "Entry"
-            },
-            {
-                "id": "8",
-                "title": "Sales & Marketing Intern",
-                "company": "GrowthMax Solutions",
-                "sector": "Sales",
-                "skills": ["Sales", "Marketing", "Customer Relations", "Communication", "Negotiation"],
-                "location": "Ahmedabad, Gujarat",
-                "duration": "4 months",
-                "stipend": "₹16,000/month",
-                "description": "Develop sales and marketing skills while working with real clients and projects.",
-                "requirements": ["Excellent communication skills", "Sales aptitude", "Customer service orientation", "Goal-oriented mindset"],
-                "education_level": "Graduate",
-                "age_range": "21-24",
-                "experience_level": "Entry"
-            },
-            {
-                "id": "9",
-                "title": "Finance Intern",
-                "company": "CapitalEdge Financial",
-                "sector": "Finance",
-                "skills": ["Financial Analysis", "Accounting", "Excel", "Financial Modeling", "Reporting"],
-                "location": "Mumbai, Maharashtra",
-                "duration": "3 months",
-                "stipend": "₹19,000/month",
-                "description": "Gain hands-on experience in financial analysis, accounting, and financial reporting.",
-                "requirements": ["Strong analytical skills", "Understanding of accounting principles", "Excel proficiency", "Attention to detail"],
-                "education_level": "Graduate",
-                "age_range": "21-24",
-                "experience_level": "Entry"
-            },
-            {
-                "id": "10",
-                "title": "Operations Intern",
-                "company": "EfficiencyMax Ltd",
-                "sector": "Operations",
-                "skills": ["Operations Management", "Process Improvement", "Project Management", "Analytics", "Communication"],
-                "location": "Pune, Maharashtra",
-                "duration": "4 months",
-                "stipend": "₹17,000/month",
-                "description": "Learn operations management, process optimization, and project coordination.",
-                "requirements": ["Analytical thinking", "Process orientation", "Communication skills", "Problem-solving abilities"],
-                "education_level": "Graduate",
-                "age_range": "21-24",
-                "experience_level": "Entry"
-            },
-            {
-                "id": "11",
-                "title": "Healthcare Admin Intern",
-                "company": "HealthCare Plus",
-                "sector": "Healthcare",
-                "skills": ["Healthcare Management", "Administration", "Patient Care", "Medical Records", "Communication"],
-                "location": "Delhi, Delhi",
-                "duration": "3 months",
-                "stipend": "₹13,000/month",
-                "description": "Learn healthcare administration, patient management, and medical record systems.",
-                "requirements": ["Interest in healthcare", "Administrative skills", "Communication abilities", "Compassionate nature"],
-                "education_level": "Graduate",
-                "age_range": "21-24",
-                "experience_level": "Entry"
-            },
-            {
-                "id": "12",
-                "title": "Education Technology Intern",
-                "company": "EduTech Innovations",
-                "sector": "Education",
-                "skills": ["Educational Technology", "Content Development", "Learning Management", "Digital Tools", "Communication"],
-                "location": "Bangalore, Karnataka",
-                "duration": "4 months",
-                "stipend": "₹15,000/month",
-                "description": "Work on educational technology solutions and digital learning platforms.",
-                "requirements": ["Interest in education technology", "Content creation skills", "Digital literacy", "Communication abilities"],
-                "education_level": "Graduate",
-                "age_range": "21-24",
-                "experience_level": "Entry"
-            }
-        ]
+    def _load_internships_data(self) -> CatalogueSnapshot:
+        """Load the internship catalogue from the memory-mapped data store and build its indexes"""
+        if self.snapshot_path:
+            snapshot = load_engine_snapshot(self, self.snapshot_path, self.data_path)
+            if snapshot is not None:
+                self.loaded_from = "snapshot"
+                return snapshot
+        
+        snapshot = CatalogueSnapshot.build(self, InternshipStore(self.data_path, shard=self.shard), self.vectorized,
+                                           retrieval=self.retrieval)
+        self.loaded_from = "build"
+        if self.snapshot_path:
+            try:
+                save_engine_snapshot(self, snapshot, self.snapshot_path)
+            except OSError as e:
+                logger.warning("Could not save engine snapshot: %s", e)
+        return snapshot
+    
+    def reload(self):
+        """Reload the catalogue file and rebuild every index, swapping the result in atomically"""
+        snapshot = self._load_internships_data()
+        if self.shard_pool is not None:
+            self.shard_pool.call_all("reload")
+        with self._update_lock:
+            self.snapshot = snapshot
+    
+    def reload_scoring(self):
+        """Reload the scoring config file; requests already running keep the rules they started with"""
+        self.scoring = ScoringConfig.from_file(self.scoring.path)
+        if self.shard_pool is not None:
+            self.shard_pool.call_all("reload_scoring")
+    
+    def close(self):
+        """Stop the shard worker processes"""
+        if self.shard_pool is not None:
+            self.shard_pool.shutdown()
+    
+    def apply_deltas(self, deltas: List[Delta]) -> Dict[str, Any]:
+        """Apply add/update/delete deltas to the live catalogue.
+        
+        ``deltas`` is a list of ``("upsert", internship_dict)`` or ``("delete", internship_id)``.
+        Indexes are updated incrementally into a new snapshot; requests already
+        running keep using the previous one.
+        """
+        if self.shard_pool is not None or self.shard is not None:
+            # Listings are assigned to shards by their line in the catalogue file
+            raise ValueError("Catalogue deltas are not supported with sharded scoring, reload the catalogue file instead")
+        start_time = time.perf_counter()
+        with self._update_lock:
+            snapshot, summary = self.snapshot.with_deltas(self, deltas)
+            self.snapshot = snapshot
+        summary["version"] = snapshot.version
+        summary["total_internships"] = snapshot.live_count
+        summary["update_time"] = time.perf_counter() - start_time
+        return summary
     
-    def _calculate_skill_match_score(self, candidate_skills: List[str], internship_skills: List[str]) -> float:
-        """Calculate skill matching score using lightweight algorithms"""
-        if not candidate_skills or not internship_skills:
+    def _calculate_skill_match_score(self, profile: ProfileTerms, skill_index: SkillIndex, position: int,
+                                     semantic_matches: Optional[float] = None) -> float:
+        """Calculate skill matching score using lightweight algorithms
+
+        Scores the internship at ``position`` of ``skill_index``, comparing skills
+        by term id. ``semantic_matches`` can be passed in when it was already
+        computed through the skill index; otherwise every skill pair is compared.
+        """
+        internship_skill_ids = skill_index.skill_ids[position]
+        if not profile.skills or not internship_skill_ids:
             return 0.0
         
-        # Convert to lowercase for case-insensitive matching
-        candidate_skills_lower = [skill.lower() for skill in candidate_skills]
-        internship_skills_lower = [skill.lower() for skill in internship_skills]
-        
         # Calculate exact matches
-        exact_matches = len(set(candidate_skills_lower) & set(internship_skills_lower))
+        exact_matches = len(profile.skill_ids & skill_index.skill_id_sets[position])
         
         # Calculate semantic matches using lightweight similarity
+        rules = profile.rules
+        if semantic_matches is None:
+            semantic_matches = self._calculate_semantic_matches(profile.skills, skill_index.skills_lower[position],
+                                                                rules)
+        
+        # Enhanced keyword matching: the weights of every (candidate, internship) skill pair, in loop order
+        keyword_matches = 0
+        for weights in profile.keyword_weights:
+            if weights:
+                for skill_id in internship_skill_ids:
+                    weight = weights.get(skill_id)
+                    if weight:
+                        keyword_matches += weight
+        
+        # Calculate total score
+        total_skills = len(internship_skill_ids)
+        exact_score = (exact_matches / total_skills) * rules.exact_share
+        semantic_score = (semantic_matches / total_skills) * rules.semantic_share
+        keyword_score = (keyword_matches / total_skills) * rules.keyword_share
+        
+        return min(exact_score + semantic_score + keyword_score, 1.0)
+    
+    def _calculate_semantic_matches(self, candidate_skills: List[str], internship_skills: List[str],
+                                    rules: ScoringRules) -> float:
+        """Sum the best semantic match of each candidate skill against one internship"""
         semantic_matches = 0
-        for candidate_skill in candidate_skills_lower:
-            for internship_skill in internship_skills_lower:
+        for candidate_skill in candidate_skills:
+            for internship_skill in internship_skills:
                 if candidate_skill == internship_skill:
                     continue  # Skip exact matches
                 
                 # Calculate text similarity
                 similarity = self._calculate_text_similarity(candidate_skill, internship_skill)
-                if similarity > 0.6:  # Threshold for semantic match
+                if similarity > rules.semantic_threshold:
                     semantic_matches += similarity
                     break  # Only count the best match per candidate skill
         
-        # Enhanced keyword matching
-        keyword_matches = self._calculate_keyword_matches(candidate_skills_lower, internship_skills_lower)
-        
-        # Calculate total score
-        total_skills = len(internship_skills_lower)
-        exact_score = (exact_matches / total_skills) * 0.6
-        semantic_score = (semantic_matches / total_skills) * 0.25
-        keyword_score = (keyword_matches / total_skills) * 0.15
-        
-        return min(exact_score + semantic_score + keyword_score, 1.0)
+        return semantic_matches
     
-    def _calculate_keyword_matches(self, candidate_skills: List[str], internship_skills: List[str]) -> float:
-        """Calculate matches based on skill synonyms and related terms"""
-        # Comprehensive skill synonyms and related terms
-        skill_synonyms = {
-            'javascript': ['js', 'node.js', 'react', 'vue', 'angular', 'typescript', 'frontend', 'web development'],
-            'python': ['django', 'flask', 'fastapi', 'data science', 'machine learning', 'backend', 'ai'],
-            'java': ['spring', 'hibernate', 'android', 'backend', 'enterprise'],
-            'web development': ['html', 'css', 'javascript', 'frontend', 'backend', 'full stack', 'responsive'],
-            'digital marketing': ['seo', 'social media', 'content marketing', 'online marketing', 'google ads', 'ppc'],
-            'graphic design': ['photoshop', 'illustrator', 'ui design', 'visual design', 'adobe creative', 'logo design'],
-            'data analysis': ['excel', 'sql', 'analytics', 'statistics', 'business intelligence', 'tableau', 'power bi'],
-            'content writing': ['copywriting', 'blogging', 'technical writing', 'seo writing', 'content creation'],
-            'sales': ['business development', 'customer relations', 'account management', 'crm', 'lead generation'],
-            'finance': ['accounting', 'financial analysis', 'investment', 'banking', 'excel', 'financial modeling'],
-            'ui design': ['ux design', 'figma', 'sketch', 'adobe xd', 'user experience', 'user interface', 'wireframing'],
-            'ux design': ['ui design', 'user research', 'prototyping', 'usability testing', 'user experience'],
-            'mobile development': ['android', 'ios', 'react native', 'flutter', 'swift', 'kotlin', 'app development'],
-            'machine learning': ['ai', 'data science', 'python', 'tensorflow', 'pytorch', 'deep learning', 'neural networks'],
-            'data science': ['machine learning', 'ai', 'python', 'statistics', 'analytics', 'big data'],
-            'backend development': ['api', 'database', 'server', 'microservices', 'cloud', 'devops'],
-            'frontend development': ['html', 'css', 'javascript', 'react', 'vue', 'angular', 'responsive design'],
-            'cloud computing': ['aws', 'azure', 'gcp', 'docker', 'kubernetes', 'devops', 'microservices'],
-            'devops': ['docker', 'kubernetes', 'ci/cd', 'jenkins', 'git', 'cloud computing', 'automation']
-        }
-        
+    def _calculate_keyword_matches(self, candidate_skills: List[str], internship_skills: List[str],
+                                   rules: ScoringRules) -> float:
+        """Calculate matches based on skill synonyms and related terms
+
+        Reference rule for lowercased skill strings; scoring by term id uses the
+        per-pair weights of ``SkillIndex.related_skills``.
+        """
         keyword_score = 0
         for candidate_skill in candidate_skills:
+            candidate_groups = self.synonyms.groups(candidate_skill)
             for internship_skill in internship_skills:
                 # Skip exact matches (already counted)
                 if candidate_skill == internship_skill:
                     continue
                 
                 # Substring matching for compound skills
-                if len(candidate_skill) > 4 and len(internship_skill) > 4:
+                if len(candidate_skill) >= rules.substring_min_length and \
+                        len(internship_skill) >= rules.substring_min_length:
                     if candidate_skill in internship_skill or internship_skill in candidate_skill:
-                        keyword_score += 0.7
+                        keyword_score += rules.substring_weight
                         continue
                 
-                # Synonym matching
-                for base_skill, synonyms in skill_synonyms.items():
-                    # Check if candidate skill matches base or synonyms
-                    candidate_match = (candidate_skill == base_skill or 
-                                     candidate_skill in synonyms or 
-                                     any(syn in candidate_skill for syn in synonyms if len(syn) > 3))
-                    
-                    internship_match = (internship_skill == base_skill or 
-                                      internship_skill in synonyms or 
-                                      any(syn in internship_skill for syn in synonyms if len(syn) > 3))
-                    
-                    if candidate_match and internship_match:
-                        keyword_score += 0.8
-                        break
+                # Synonym matching: both skills belong to a common base skill group
+                if candidate_groups and candidate_groups & self.synonyms.groups(internship_skill):
+                    keyword_score += rules.synonym_weight
         
         return keyword_score
     
-    def _calculate_sector_match_score(self, candidate_sectors: List[str], internship_sector: str) -> float:
+    def _calculate_sector_match_score(self, candidate_sectors: List[str], internship_sector: str,
+                                      rules: ScoringRules) -> float:
         """Calculate sector matching score"""
         if not candidate_sectors:
-            return 0.0
+            return rules.sector_other
         
         # Direct match
         if internship_sector.lower() in [sector.lower() for sector in candidate_sectors]:
-            return 1.0
-        
-        # Related sectors mapping
-        related_sectors = {
-            "technology": ["design", "media"],
-            "finance": ["business", "operations"],
-            "healthcare": ["education"],
-            "education": ["technology", "media"],
-            "media": ["technology", "design"],
-            "design": ["technology", "media"],
-            "sales": ["marketing", "business"],
-            "marketing": ["sales", "media"],
-            "operations": ["business", "finance"],
-            "human resources": ["business", "operations"]
-        }
+            return rules.sector_match
         
+        # Related sectors
+        internship_sector_lower = internship_sector.lower()
         for candidate_sector in candidate_sectors:
-            candidate_sector_lower = candidate_sector.lower()
-            if candidate_sector_lower in related_sectors:
-                if internship_sector.lower() in related_sectors[candidate_sector_lower]:
-                    return 0.7
+            if internship_sector_lower in rules.related_sectors.get(candidate_sector.lower(), ()):
+                return rules.sector_related
         
-        return 0.0
+        return rules.sector_other
     
-    def _calculate_location_match_score(self, candidate_location: str, internship_location: str) -> float:
+    def _calculate_sector_scores(self, categories: CategoricalIndex, profile: ProfileTerms) -> List[float]:
+        """Sector score of every distinct catalogue sector (by value id), by term id"""
+        rules = profile.rules
+        match, related, other = rules.sector_match, rules.sector_related, rules.sector_other
+        return [match if sector_id in profile.sector_ids else related if sector_id in profile.related_sector_ids
+                else other for sector_id in categories.sector_terms]
+    
+    def _calculate_location_match_score(self, candidate_location: str, internship_location: str,
+                                        rules: ScoringRules) -> float:
         """Calculate location matching score"""
         if not candidate_location or not internship_location:
-            return 0.5  # Neutral score if location not specified
+            return rules.location_unspecified  # Neutral score if location not specified
         
         # Extract state from location
         candidate_state = candidate_location.split(',')[-1].strip().lower()
@@ -353,59 +286,56 @@ class RecommendationEngine:
         
         # Same state
         if candidate_state == internship_state:
-            return 1.0
+            return rules.location_same
         
         # Same city
         candidate_city = candidate_location.split(',')[0].strip().lower()
         internship_city = internship_location.split(',')[0].strip().lower()
         if candidate_city == internship_city:
-            return 1.0
+            return rules.location_same
         
         # Major cities in same region
-        major_cities = {
-            "mumbai": ["pune", "nashik"],
-            "delhi": ["gurgaon", "noida"],
-            "bangalore": ["mysore", "mangalore"],
-            "hyderabad": ["secunderabad"],
-            "chennai": ["coimbatore", "madurai"]
-        }
+        if (candidate_city, internship_city) in rules.nearby_city_pairs:
+            return rules.location_nearby
         
-        for city, nearby_cities in major_cities.items():
-            if (candidate_city == city and internship_city in nearby_cities) or \
-               (internship_city == city and candidate_city in nearby_cities):
-                return 0.8
-        
-        return 0.3  # Different location
+        return rules.location_other  # Different location
+    
+    def _calculate_location_scores(self, categories: CategoricalIndex, profile: ProfileTerms) -> List[float]:
+        """Location score of every distinct catalogue location (by value id), by term id"""
+        rules = profile.rules
+        if not profile.has_location:
+            return [rules.location_unspecified] * len(categories.location_terms)
+        scores = []
+        for location_terms in categories.location_terms:
+            if location_terms is None:
+                scores.append(rules.location_unspecified)  # Neutral score if location not specified
+            elif location_terms[1] == profile.state_id or location_terms[0] == profile.city_id:
+                scores.append(rules.location_same)  # Same state or same city
+            elif location_terms[0] in profile.nearby_city_ids:
+                scores.append(rules.location_nearby)  # Major cities in same region
+            else:
+                scores.append(rules.location_other)
+        return scores
     
-    def _calculate_education_match_score(self, candidate_education: str, internship_education: str) -> float:
+    def _calculate_education_match_score(self, candidate_education: str, internship_education: str,
+                                         rules: ScoringRules) -> float:
         """Calculate education matching score"""
-        education_hierarchy = {
-            "10th pass": 1,
-            "12th pass": 2,
-            "diploma": 3,
-            "graduate": 4,
-            "post graduate": 5,
-            "phd": 6
-        }
-        
-        candidate_level = education_hierarchy.get(candidate_education.lower(), 3)
-        internship_level = education_hierarchy.get(internship_education.lower(), 3)
+        candidate_level = rules.education_levels.get(candidate_education.lower(), rules.education_default_level)
+        internship_level = rules.education_levels.get(internship_education.lower(), rules.education_default_level)
         
         # Exact match
         if candidate_level == internship_level:
-            return 1.0
+            return rules.education_equal
         
         # Higher education than required
         if candidate_level > internship_level:
-            return 0.9
+            return rules.education_higher
         
         # Lower education than required
-        if candidate_level < internship_level:
-            return 0.3
-        
-        return 0.5
+        return rules.education_lower
     
-    def _calculate_age_match_score(self, candidate_age: str, internship_age_range: str) -> float:
+    def _calculate_age_match_score(self, candidate_age: str, internship_age_range: str,
+                                   rules: ScoringRules) -> float:
         """Calculate age matching score"""
         try:
             candidate_age_num = int(candidate_age)
@@ -414,84 +344,546 @@ class RecommendationEngine:
             if '-' in internship_age_range:
                 min_age, max_age = map(int, internship_age_range.split('-'))
                 if min_age <= candidate_age_num <= max_age:
-                    return 1.0
+                    return rules.age_in_range
                 else:
-                    return 0.5
+                    return rules.age_out_of_range
             else:
-                return 0.5
+                return rules.age_out_of_range
         except:
-            return 0.5
+            return rules.age_out_of_range
+    
+    def _related_skills(self, snapshot: CatalogueSnapshot, rules: ScoringRules,
+                        skills: List[str]) -> List[Dict[int, float]]:
+        """Keyword weights by skill term id of each (lowercased) profile skill, from the skill index"""
+        return [snapshot.skill_index.related_skills(skill, self.synonyms, rules) for skill in skills]
+    
+    def _semantic_matches(self, snapshot: CatalogueSnapshot, profile: ProfileTerms,
+                          positions: Optional[Iterable[int]] = None) -> Dict[int, float]:
+        """Semantic skill match sums by catalogue position, from the skill index"""
+        return snapshot.skill_index.semantic_matches(profile.skills, profile.rules.semantic_threshold, positions)
+    
+    def _related_positions(self, snapshot: CatalogueSnapshot, profile: ProfileTerms) -> set:
+        """Catalogue positions with a keyword relation to the profile's skills, from the skill index"""
+        return snapshot.skill_index.related_positions(profile.skills, self.synonyms, profile.rules)
+    
+    def _profile_terms(self, snapshot: CatalogueSnapshot, rules: ScoringRules, skills: List[str], sectors: List[str],
+                       location: str, keywords: bool = True) -> ProfileTerms:
+        """Convert a profile's skills, sectors and location to term ids under ``rules``, once per request
+        
+        ``keywords`` also looks up the keyword weights of every skill (needed for skill scoring).
+        """
+        terms = snapshot.terms
+        profile = ProfileTerms(rules)
+        profile.skills = [skill.lower() for skill in skills]
+        profile.skill_ids = frozenset(terms.lookup("skill", skill) for skill in skills)
+        if keywords:
+            profile.keyword_weights = self._related_skills(snapshot, rules, profile.skills)
+        profile.sector_ids = frozenset(terms.lookup("sector", sector) for sector in sectors)
+        profile.related_sector_ids = frozenset(terms.lookup("sector", related) for sector in sectors
+                                               for related in rules.related_sectors.get(sector.lower(), ()))
+        if location:
+            profile.has_location = True
+            profile.city_id = terms.lookup("city", location)
+            profile.state_id = terms.lookup("state", location)
+            profile.nearby_city_ids = frozenset(terms.lookup("city", nearby)
+                                                for nearby in rules.nearby_cities.get(canonical_city(location), ()))
+        return profile
+    
+    def _build_recommendation(self, snapshot: CatalogueSnapshot, record: InternshipRecord, profile: ProfileTerms,
+                              total_score: float, sector_score: float, location_score: float) -> Dict[str, Any]:
+        """Build the response dict for a recommended internship"""
+        # Only recommended internships are materialized into full dicts
+        internship = snapshot.materialize(record)
+        
+        # Find matching skills
+        matching_skills = []
+        if profile.skills:
+            terms = snapshot.terms
+            matching_skills = [skill for skill in internship['skills']
+                               if terms.lookup("skill", skill) in profile.skill_ids]
+        
+        rules = profile.rules
+        return {
+            "id": internship['id'],
+            "title": internship['title'],
+            "company": internship['company'],
+            "sector": internship['sector'],
+            "skills": internship['skills'],
+            "location": internship['location'],
+            "duration": internship['duration'],
+            "stipend": internship['stipend'],
+            "description": internship['description'],
+            "requirements": internship['requirements'],
+            "match_score": round(total_score * 100, 1),
+            "match_reason": {
+                "skills": matching_skills,
+                "sector": internship['sector'] if sector_score > rules.reason_sector else None,
+                "location": self._location_reason(rules, location_score)
+            }
+        }
+    
+    def _serialize_recommendation(self, snapshot: CatalogueSnapshot, record: InternshipRecord, profile: ProfileTerms,
+                                  total_score: float, sector_score: float, location_score: float) -> bytes:
+        """JSON bytes of the response dict for a recommended internship, spliced onto its cached catalogue fields"""
+        fragment = self.fragments.get(record, snapshot.materialize)
+        
+        # Find matching skills (the record holds the listing's skills as stored)
+        matching_skills = []
+        if profile.skills:
+            terms = snapshot.terms
+            matching_skills = [skill for skill in record.skills if terms.lookup("skill", skill) in profile.skill_ids]
+        
+        return render_recommendation(
+            fragment, round(total_score * 100, 1), matching_skills, sector_score > profile.rules.reason_sector,
+            self._location_reason(profile.rules, location_score))
+    
+    @staticmethod
+    def _location_reason(rules: ScoringRules, location_score: float) -> Optional[str]:
+        """Match reason shown for a location score, per the cut-offs of ``rules``"""
+        if location_score > rules.reason_same_location:
+            return "Same location"
+        if location_score > rules.reason_nearby_location:
+            return "Nearby location"
+        return None
     
     def get_recommendations(self, age: str, education: str, skills: List[str], 
-                          sectors: List[str], location: str, top_k: int = 5) -> List[Dict[str, Any]]:
-        """Get personalized recommendations based on candidate profile"""
-        
-        recommendations = []
-        
-        for internship in self.internships_data:
-            # Calculate individual scores
-            skill_score = self._calculate_skill_match_score(skills, internship['skills'])
-            sector_score = self._calculate_sector_match_score(sectors, internship['sector'])
-            location_score = self._calculate_location_match_score(location, internship['location'])
-            education_score = self._calculate_education_match_score(education, internship['education_level'])
-            age_score = self._calculate_age_match_score(age, internship['age_range'])
+                          sectors: List[str], location: str, top_k: int = 5,
+                          serialized: bool = False, reranker: Optional[Reranker] = None,
+                          scoring: Optional[str] = None) -> List[Any]:
+        """Get personalized recommendations based on candidate profile
+        
+        With ``serialized`` every recommendation is returned as its JSON bytes instead of a dict.
+        A ``reranker`` reorders the best-scored candidates (only when ``top_k`` is positive).
+        ``scoring`` names the scoring config to rank with (the default config when None).
+        """
+        if self.profiler is not None and self.profiler.sampled():
+            return self.profiler.run(self, "get_recommendations", age, education, skills, sectors, location, top_k,
+                                     serialized, reranker, scoring)
+        if self.shard_pool is not None:
+            return self._get_recommendations_sharded(age, education, skills, sectors, location, top_k, serialized,
+                                                     reranker, scoring)
+        
+        # One consistent catalogue view and set of scoring rules for the whole request
+        snapshot = self.snapshot
+        rules = self.scoring.get(scoring)
+        
+        # A re-ranking stage picks from a larger pool of the best-scored listings
+        if reranker is None or top_k <= 0:
+            reranker = None
+            pool_size = top_k
+        else:
+            pool_size = reranker.pool_size(top_k)
+        
+        profile, ranked = self._rank(snapshot, rules, age, education, skills, sectors, location, pool_size)
+        if reranker is not None:
+            order = self._rerank(snapshot, reranker, [(position, total_score) for position, total_score, _, _ in ranked],
+                                 top_k)
+            ranked = [ranked[index] for index in order]
+        build = self._serialize_recommendation if serialized else self._build_recommendation
+        return [build(snapshot, snapshot.records[position], profile, total_score, sector_score, location_score)
+                for position, total_score, sector_score, location_score in ranked[:top_k]]
+    
+    def get_shard_candidates(self, age: str, education: str, skills: List[str], sectors: List[str], location: str,
+                             pool_size: int, serialized: bool = False,
+                             scoring: Optional[str] = None) -> List[Tuple[float, int, float, Tuple[str, str, str], Any]]:
+        """The ``pool_size`` best listings of this engine's catalogue shard, for the coordinator to merge.
+        
+        Each is (match score, position in the full catalogue, total score, (company, sector, location),
+        recommendation), best first.
+        """
+        snapshot = self.snapshot
+        profile, ranked = self._rank(snapshot, self.scoring.get(scoring), age, education, skills, sectors, location,
+                                     pool_size)
+        index, count = self.shard or (0, 1)
+        build = self._serialize_recommendation if serialized else self._build_recommendation
+        candidates = []
+        for position, total_score, sector_score, location_score in ranked:
+            record = snapshot.records[position]
+            candidates.append((round(total_score * 100, 1), position * count + index, total_score,
+                               (record.company, record.sector, record.location),
+                               build(snapshot, record, profile, total_score, sector_score, location_score)))
+        return candidates
+    
+    def _get_recommendations_sharded(self, age: str, education: str, skills: List[str], sectors: List[str],
+                                     location: str, top_k: int, serialized: bool = False,
+                                     reranker: Optional[Reranker] = None, scoring: Optional[str] = None) -> List[Any]:
+        """Same ranking as get_recommendations, scored by every catalogue shard at once"""
+        # Unknown config names fail here rather than in every shard
+        self.scoring.get(scoring)
+        if reranker is None or top_k <= 0:
+            reranker = None
+            pool_size = top_k
+        else:
+            pool_size = reranker.pool_size(top_k)
+        
+        shard_candidates = self.shard_pool.call_all(
+            "get_shard_candidates", age=age, education=education, skills=skills, sectors=sectors, location=location,
+            pool_size=pool_size, serialized=serialized, scoring=scoring)
+        # Each shard's best listings are a superset of its share of the overall best, ranked the same way
+        # (score, then catalogue position), so merging them gives the ranking of the whole catalogue
+        candidates = list(heapq.merge(*shard_candidates, key=lambda candidate: (-candidate[0], candidate[1])))
+        if pool_size > 0:
+            candidates = candidates[:pool_size]
+        if reranker is not None:
+            order, fell_back = reranker.select([candidate[3] for candidate in candidates],
+                                               [candidate[2] for candidate in candidates], top_k)
+            self._count_rerank(reranker, len(candidates), fell_back)
+            candidates = [candidates[index] for index in order]
+        return [candidate[4] for candidate in candidates[:top_k]]
+    
+    def _rank(self, snapshot: CatalogueSnapshot, rules: ScoringRules, age: str, education: str, skills: List[str],
+              sectors: List[str], location: str,
+              pool_size: int) -> Tuple[ProfileTerms, List[Tuple[int, float, float, float]]]:
+        """Profile terms and the ``pool_size`` best listings (every listing above the minimum score when not positive).
+        
+        Listings are (position, total score, sector score, location score), highest score first, ties in
+        catalogue order.
+        """
+        shortlist = None
+        if snapshot.text_retriever is not None:
+            shortlist = snapshot.text_retriever.search(profile_text(skills, sectors))
+        if shortlist is None and snapshot.vectorized_scorer is not None:
+            return self._rank_vectorized(snapshot, rules, age, education, skills, sectors, location, pool_size)
+        
+        # Running top-k as a min-heap keyed like the final ranking: score, then earlier catalogue position
+        bounded = pool_size > 0
+        heap = []
+        
+        def offer(entry):
+            """Add an entry to the running top-k; False when it ranks below the current k-th best"""
+            if not bounded or len(heap) < pool_size:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+            else:
+                return False
+            return True
+        
+        profile = self._profile_terms(snapshot, rules, skills, sectors, location)
+        
+        # Non-skill scores depend only on the listing's categorical values: score each distinct value once
+        categories = snapshot.categorical_index
+        sector_scores = self._calculate_sector_scores(categories, profile)
+        location_scores = self._calculate_location_scores(categories, profile)
+        education_scores = categories.value_scores("education_level", lambda value: self._calculate_education_match_score(education, value, rules))
+        age_scores = categories.value_scores("age_range", lambda value: self._calculate_age_match_score(age, value, rules))
+        
+        # The rules' weights and threshold as locals for the loops below
+        skill_weight, sector_weight, location_weight = rules.skill_weight, rules.sector_weight, rules.location_weight
+        education_weight, age_weight, min_score = rules.education_weight, rules.age_weight, rules.min_score
+        
+        # Listings without skill matches score by their categorical group alone
+        group_totals = []
+        for key, positions in categories.groups.items():
+            sector_id, location_id, education_id, age_id = key
+            total_score = 0.0 * skill_weight + sector_scores[sector_id] * sector_weight + \
+                location_scores[location_id] * location_weight + education_scores[education_id] * education_weight + \
+                age_scores[age_id] * age_weight
+            if total_score > min_score:
+                group_totals.append((round(total_score * 100, 1), total_score, key, positions))
+        group_totals.sort(key=lambda group: group[0], reverse=True)
+        
+        if shortlist is None:
+            # Semantic skill matches only exist for internships sharing a token with the profile
+            semantic_by_position = self._semantic_matches(snapshot, profile)
+            
+            # Only listings with an exact, semantic or keyword relation to the profile's skills can have a
+            # non-zero skill score; they are scored one by one
+            skill_positions = set(semantic_by_position)
+            skill_positions.update(self._related_positions(snapshot, profile))
+        else:
+            # Approximate retrieval: the ANN text shortlist plus as many of the listings ranked best by
+            # their categorical fields, all scored in full; nothing else is considered
+            skill_positions = set(shortlist)
+            structured = 0
+            for _, _, _, positions in group_totals:
+                if structured >= snapshot.text_retriever.candidates:
+                    break
+                skill_positions.update(positions[:snapshot.text_retriever.candidates - structured])
+                structured += len(positions)
+            semantic_by_position = self._semantic_matches(snapshot, profile, skill_positions)
+        
+        for position in sorted(skill_positions):
+            internship = snapshot.records[position]
+            sector_id, location_id, education_id, age_id = categories.keys[position]
+            sector_score = sector_scores[sector_id]
+            location_score = location_scores[location_id]
+            education_score = education_scores[education_id]
+            age_score = age_scores[age_id]
+            
+            # Best possible total (skill score of 1.0), accumulated in the same order as the
+            # real total so it is an exact upper bound. Skip skill scoring when even that
+            # cannot pass the threshold or displace the current k-th best (a tie loses,
+            # as this listing comes later in the catalogue).
+            upper_bound = 1.0 * skill_weight + sector_score * sector_weight + location_score * location_weight + \
+                education_score * education_weight + age_score * age_weight
+            if upper_bound <= min_score:
+                continue
+            if bounded and len(heap) == pool_size and (round(upper_bound * 100, 1), -position) <= heap[0][:2]:
+                continue
+            
+            skill_score = self._calculate_skill_match_score(profile, snapshot.skill_index, position,
+                                                            semantic_by_position.get(position, 0))
             
             # Calculate weighted total score
             total_score = (
-                skill_score * 0.35 +      # Skills are most important
-                sector_score * 0.25 +     # Sector preference
-                location_score * 0.20 +   # Location preference
-                education_score * 0.15 +  # Education match
-                age_score * 0.05          # Age match
+                skill_score * skill_weight +          # Skills are most important
+                sector_score * sector_weight +        # Sector preference
+                location_score * location_weight +    # Location preference
+                education_score * education_weight +  # Education match
+                age_score * age_weight                # Age match
             )
             
-            # Only include internships with score > 0.3
-            if total_score > 0.3:
-                # Find matching skills
-                matching_skills = []
-                if skills:
-                    candidate_skills_lower = [skill.lower() for skill in skills]
-                    internship_skills_lower = [skill.lower() for skill in internship['skills']]
-                    matching_skills = [skill for skill in internship['skills'] 
-                                     if skill.lower() in candidate_skills_lower]
-                
-                recommendation = {
-                    "id": internship['id'],
-                    "title": internship['title'],
-                    "company": internship['company'],
-                    "sector": internship['sector'],
-                    "skills": internship['skills'],
-                    "location": internship['location'],
-                    "duration": internship['duration'],
-                    "stipend": internship['stipend'],
-                    "description": internship['description'],
-                    "requirements": internship['requirements'],
-                    "match_score": round(total_score * 100, 1),
-                    "match_reason": {
-                        "skills": matching_skills,
-                        "sector": internship['sector'] if sector_score > 0.5 else None,
-                        "location": "Same location" if location_score > 0.8 else "Nearby location" if location_score > 0.5 else None
-                    }
-                }
-                
-                recommendations.append(recommendation)
-        
-        # Sort by match score and return top recommendations
-        recommendations.sort(key=lambda x: x['match_score'], reverse=True)
-        return recommendations[:top_k]
+            # Only include internships above the minimum score
+            if total_score > min_score:
+                offer((round(total_score * 100, 1), -position, internship, total_score, sector_score, location_score))
+        
+        # Every other listing has a skill score of 0, so its total is fixed by its categorical group.
+        # Visit groups from the best score down, listings of equal score in catalogue order.
+        for rounded, same_score in itertools.groupby(group_totals if shortlist is None else (),
+                                                     key=lambda group: group[0]):
+            if bounded and len(heap) == pool_size and rounded < heap[0][0]:
+                break
+            same_score = list(same_score)
+            # zip binds each group now; a generator expression would see only the last group
+            listings = heapq.merge(*[zip(group[3], itertools.repeat(group)) for group in same_score])
+            for position, (_, total_score, key, _) in listings:
+                if position in skill_positions:
+                    continue
+                entry = (rounded, -position, snapshot.records[position], total_score,
+                         sector_scores[key[0]], location_scores[key[1]])
+                if not offer(entry):
+                    break  # Later listings with this score rank lower still
+        
+        # Highest score first, ties in catalogue order; responses are built for the winners only
+        return profile, [(-position, total_score, sector_score, location_score)
+                         for _, position, _, total_score, sector_score, location_score
+                         in sorted(heap, key=lambda entry: entry[:2], reverse=True)]
+    
+    def _rank_vectorized(self, snapshot: CatalogueSnapshot, rules: ScoringRules, age: str, education: str,
+                         skills: List[str], sectors: List[str], location: str,
+                         pool_size: int) -> Tuple[ProfileTerms, List[Tuple[int, float, float, float]]]:
+        """Same ranking as _rank, scored with the NumPy column arrays"""
+        scorer = snapshot.vectorized_scorer
+        total_score, sector_score, location_score = scorer.score(rules, age, education, skills, sectors, location)
+        profile = self._profile_terms(snapshot, rules, skills, sectors, location, keywords=False)
+        ranked = scorer.top_k(total_score, pool_size if pool_size > 0 else scorer.size, rules.min_score)
+        return profile, [(position, float(total_score[position]), float(sector_score[position]),
+                          float(location_score[position])) for position, _ in ranked]
+    
+    def _rerank(self, snapshot: CatalogueSnapshot, reranker: Reranker, candidates: List[Tuple[int, float]],
+                top_k: int) -> List[int]:
+        """Indexes into the ranked ``candidates`` of the final recommendations, in order"""
+        order, fell_back = reranker.rerank(snapshot, candidates, top_k)
+        self._count_rerank(reranker, len(candidates), fell_back)
+        return order
+    
+    def _count_rerank(self, reranker: Reranker, candidates: int, fell_back: bool):
+        self.rerank_counts["fallback" if fell_back else "reranked"] += 1
+        if fell_back:
+            logger.debug("Re-ranking exceeded its latency budget, plain ranking used",
+                         extra={"candidates": candidates, "reranker": type(reranker).__name__})
+    
+    def _score_component(self, snapshot: CatalogueSnapshot, rules: ScoringRules, component: str,
+                         value: Any) -> Sequence[float]:
+        """Score one profile field against every internship (deleted listings score 0)"""
+        scorer = snapshot.vectorized_scorer
+        internships = snapshot.records
+        
+        if component == "skills":
+            if scorer is not None:
+                return scorer.skill_scores(rules, value)
+            profile = self._profile_terms(snapshot, rules, value, [], "")
+            semantic_by_position = self._semantic_matches(snapshot, profile)
+            # Listings without any skill relation to the profile score exactly 0
+            column = [0.0] * len(internships)
+            for position in set(semantic_by_position).union(self._related_positions(snapshot, profile)):
+                column[position] = self._calculate_skill_match_score(profile, snapshot.skill_index, position,
+                                                                     semantic_by_position.get(position, 0))
+            return column
+        if scorer is not None:
+            if component == "sectors":
+                return scorer.sector_scores(rules, value)
+            if component == "location":
+                return scorer.location_scores(rules, value)
+            if component == "education":
+                return scorer.education_scores(rules, value)
+            if component == "age":
+                return scorer.age_scores(rules, value)
+        
+        field = CATEGORICAL_COMPONENTS.get(component)
+        if field is not None:
+            # Score each distinct value once and map it onto the listings through their group keys
+            categories = snapshot.categorical_index
+            if component == "sectors":
+                value_scores = self._calculate_sector_scores(categories,
+                                                             self._profile_terms(snapshot, rules, [], value, ""))
+            elif component == "location":
+                value_scores = self._calculate_location_scores(categories,
+                                                               self._profile_terms(snapshot, rules, [], [], value))
+            else:
+                score = {
+                    "education": self._calculate_education_match_score,
+                    "age": self._calculate_age_match_score,
+                }[component]
+                value_scores = categories.value_scores(field, lambda internship_value: score(value, internship_value,
+                                                                                             rules))
+            field_index = CATEGORICAL_FIELDS.index(field)
+            return [value_scores[key[field_index]] if key is not None else 0.0
+                    for key in snapshot.categorical_index.keys]
+        raise ValueError(f"Unknown profile component: {component}")
+    
+    def get_recommendations_batch(self, profiles: Iterable[Dict[str, Any]], top_k: int = 5,
+                                  column_cache: Optional[OrderedDict] = None,
+                                  cache_size: int = 32,
+                                  scoring: Optional[str] = None) -> Iterator[List[Dict[str, Any]]]:
+        """Yield recommendations for many profiles, in input order
+        
+        Profiles are consumed lazily, so any iterable (including a stream) works.
+        Each profile field is scored against the whole catalogue as a column and
+        columns are reused across profiles sharing the same field value (same
+        skills, location, education, ...). Pass the same ``column_cache`` to
+        several calls to share columns between chunks of one stream.
+        ``scoring`` names the scoring config every profile is ranked with.
+        """
+        if column_cache is None:
+            column_cache = OrderedDict()
+        snapshot = self.snapshot
+        rules = self.scoring.get(scoring)
+        
+        for profile in profiles:
+            columns = []
+            for component in PROFILE_COMPONENTS:
+                value = profile[component]
+                # Columns are only valid for the catalogue version and scoring rules they were scored with
+                key = (snapshot.version, rules.key, component, tuple(value) if isinstance(value, list) else value)
+                column = column_cache.get(key)
+                if column is None:
+                    column = self._score_component(snapshot, rules, component, value)
+                    column_cache[key] = column
+                    if len(column_cache) > cache_size:
+                        column_cache.popitem(last=False)
+                else:
+                    column_cache.move_to_end(key)
+                columns.append(column)
+            
+            terms = self._profile_terms(snapshot, rules, profile["skills"], [], "", keywords=False)
+            yield [
+                self._build_recommendation(snapshot, snapshot.records[position], terms, total_score, sector_score,
+                                           location_score)
+                for position, total_score, sector_score, location_score
+                in self._rank_columns(snapshot, rules, columns, top_k)
+            ]
+    
+    def _rank_columns(self, snapshot: CatalogueSnapshot, rules: ScoringRules, columns: List[Sequence[float]],
+                      top_k: int) -> List[Tuple[int, float, float, float]]:
+        """The ``top_k`` best listings given one score column per profile component, ranked like _rank"""
+        skill_scores, sector_scores, location_scores, education_scores, age_scores = columns
+        scorer = snapshot.vectorized_scorer
+        if scorer is not None:
+            total_scores = scorer.total_scores(rules, *columns)
+            ranked = scorer.top_k(total_scores, top_k, rules.min_score)
+        else:
+            skill_weight, sector_weight, location_weight = rules.skill_weight, rules.sector_weight, \
+                rules.location_weight
+            education_weight, age_weight = rules.education_weight, rules.age_weight
+            total_scores = [
+                skill_score * skill_weight + sector_score * sector_weight + location_score * location_weight +
+                education_score * education_weight + age_score * age_weight
+                for skill_score, sector_score, location_score, education_score, age_score in zip(*columns)
+            ]
+            ranked = [(position, round(total_score * 100, 1))
+                      for position, total_score in enumerate(total_scores) if total_score > rules.min_score]
+            ranked.sort(key=lambda item: item[1], reverse=True)
+            ranked = ranked[:top_k]
+        return [(position, float(total_scores[position]), float(sector_scores[position]),
+                 float(location_scores[position])) for position, _ in ranked]
+    
+    def get_session_recommendations(self, session: ProfileSession, changes: Optional[Dict[str, Any]] = None,
+                                    top_k: int = 5, serialized: bool = False,
+                                    reranker: Optional[Reranker] = None) -> List[Any]:
+        """Recommendations for a profile session after applying ``changes`` (profile field -> new value)
+        
+        The session keeps the score column of every profile component. Only the columns of fields whose
+        value changed are scored again, or all of them when the catalogue or the scoring config changed
+        since the session was last scored. Every listing is scored (approximate retrieval does not apply),
+        so the ranking is that of get_recommendations without it.
+        """
+        with session.lock:
+            snapshot = self.snapshot
+            rules = self.scoring.get(session.scoring)
+            profile = dict(session.profile, **(changes or {}))
+            current = session.catalogue_version == snapshot.version and session.rules_key == rules.key
+            for component in PROFILE_COMPONENTS:
+                if current and component in session.columns and profile[component] == session.profile[component]:
+                    continue
+                session.set_column(component, self._score_component(snapshot, rules, component, profile[component]))
+            session.profile, session.catalogue_version, session.rules_key = profile, snapshot.version, rules.key
+            # Columns are replaced rather than modified, so these stay consistent after the lock is released
+            columns = [session.columns[component] for component in PROFILE_COMPONENTS]
+        
+        if reranker is None or top_k <= 0:
+            reranker = None
+            pool_size = top_k
+        else:
+            pool_size = reranker.pool_size(top_k)
+        ranked = self._rank_columns(snapshot, rules, columns, pool_size)
+        if reranker is not None:
+            order = self._rerank(snapshot, reranker, [(position, total_score) for position, total_score, _, _ in ranked],
+                                 top_k)
+            ranked = [ranked[index] for index in order]
+        terms = self._profile_terms(snapshot, rules, profile["skills"], [], "", keywords=False)
+        build = self._serialize_recommendation if serialized else self._build_recommendation
+        return [build(snapshot, snapshot.records[position], terms, total_score, sector_score, location_score)
+                for position, total_score, sector_score, location_score in ranked[:top_k]]
     
     def get_all_internships(self) -> List[Dict[str, Any]]:
         """Get all available internships"""
-        return self.internships_data
-    
-    def get_stats(self) -> Dict[str, Any]:
-        """Get system statistics"""
+        snapshot = self.snapshot
+        return [snapshot.materialize(record) for record in snapshot.live_records()]
+
+    def _project_internship(self, snapshot: CatalogueSnapshot, record: InternshipRecord,
+                            fields: Optional[List[str]]) -> Dict[str, Any]:
+        """Internship dict limited to ``fields``; read from the record alone when it holds them all"""
+        if fields and all(field in InternshipRecord.FIELDS or field == "skills" for field in fields):
+            return {field: list(record.skills) if field == "skills" else record[field] for field in fields}
+        internship = snapshot.materialize(record)
+        if not fields:
+            return internship
+        return {field: internship[field] for field in fields if field in internship}
+
+    def get_internships_page(self, cursor: Optional[str] = None, limit: int = 100, fields: Optional[List[str]] = None,
+                             filters: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """One page of internships in catalogue order.
+
+        ``cursor`` is the ``next_cursor`` of the previous page (None for the first page).
+        Cursors stay valid across incremental catalogue updates, which keep positions
+        stable. A reload or a compaction renumbers positions, after which older
+        cursors raise ``StaleCursorError`` instead of skipping or repeating listings.
+        ``filters`` maps sector/location/education_level to a case-insensitive value.
+        """
+        snapshot = self.snapshot
+        internships = []
+        next_cursor = None
+        for position in snapshot.matching_positions(snapshot.cursor_position(cursor), filters):
+            if len(internships) == limit:
+                next_cursor = snapshot.cursor(position)
+                break
+            internships.append(self._project_internship(snapshot, snapshot.records[position], fields))
+
         return {
-            "total_internships": len(self.internships_data),
-            "sectors": list(set(internship['sector'] for internship in self.internships_data)),
-            "locations": list(set(internship['location'] for internship in self.internships_data)),
-            "avg_stipend": sum([int(re.findall(r'\d+', internship['stipend'])[0]) 
-                              for internship in self.internships_data 
-                              if re.findall(r'\d+', internship['stipend'])]) / len(self.internships_data),
-            "last_updated": datetime.now().isoformat()
-        }
\ No newline at end of file
+            "internships": internships,
+            "total": snapshot.count_matching(filters),
+            "next_cursor": next_cursor,
+        }
+
+    def iter_internships(self, cursor: Optional[str] = None, fields: Optional[List[str]] = None,
+                         filters: Optional[Dict[str, str]] = None) -> Iterator[Dict[str, Any]]:
+        """Lazily yield every matching internship from ``cursor`` on, for exports (the cursor is checked right away)"""
+        snapshot = self.snapshot
+        return (self._project_internship(snapshot, snapshot.records[position], fields)
+                for position in snapshot.matching_positions(snapshot.cursor_position(cursor), filters))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get system statistics (maintained incrementally with the catalogue)"""
+        return dict(self.snapshot.stats.summary())
@@ -0,0 +1,76 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+
+class RequestCoalescer:
+    """Single-flight deduplication of concurrent identical requests.
+
+    The first request for a key starts the computation as a task (the flight).
+    Requests with the same key arriving while it runs await that task instead
+    of computing again. Every waiter gets its result, or the exception it raised.
+    Each flight has a deadline of ``timeout`` seconds from its start, shared by
+    all of its waiters, after which they get ``asyncio.TimeoutError``. The
+    computation itself keeps running (a cancelled waiter never cancels it), but
+    later requests start a new flight instead of joining an expired one.
+    Flights are forgotten as soon as they finish, so results are never served
+    after the fact; caching stays the job of the recommendation cache.
+
+    Used from the event loop only, so the flight table needs no lock.
+    """
+
+    def __init__(self, timeout: float = 30.0):
+        self.timeout = timeout
+        # Key -> (deadline on the loop clock, running computation)
+        self.flights: Dict[str, Tuple[float, "asyncio.Future"]] = {}
+        self.started = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    async def run(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Result of ``compute()`` for ``key``, and whether it was shared with an earlier request"""
+        loop = asyncio.get_running_loop()
+        flight = self.flights.get(key)
+        coalesced = flight is not None and flight[0] > loop.time()
+        if coalesced:
+            deadline, task = flight
+            self.coalesced += 1
+        else:
+            deadline, task = loop.time() + self.timeout, asyncio.ensure_future(compute())
+            self.flights[key] = (deadline, task)
+            task.add_done_callback(lambda done: self._finished(key, done))
+            self.started += 1
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), max(0.0, deadline - loop.time())), coalesced
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+
+    def _finished(self, key: str, task: "asyncio.Future"):
+        flight = self.flights.get(key)
+        if flight is not None and flight[1] is task:
+            del self.flights[key]
+        # Reading the exception also keeps asyncio from warning when every waiter timed out
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"timeout": self.timeout, "in_flight": len(self.flights), "started": self.started,
+                "coalesced": self.coalesced, "timeouts": self.timeouts, "errors": self.errors}
+
+    def prometheus(self) -> List[str]:
+        """Coalescing metrics in the Prometheus text exposition format"""
+        lines = []
+        for name, kind, help_text, value in (
+                ("recommendation_flights_in_flight", "gauge", "Distinct /recommend computations running",
+                 len(self.flights)),
+                ("recommendation_flights_total", "counter", "/recommend computations started", self.started),
+                ("recommendation_coalesced_total", "counter",
+                 "/recommend calls served by another identical call's computation", self.coalesced),
+                ("recommendation_flight_timeouts_total", "counter",
+                 "/recommend calls that gave up waiting for a computation", self.timeouts),
+                ("recommendation_flight_errors_total", "counter", "/recommend computations that failed",
+                 self.errors)):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        return lines
@@ -0,0 +1,110 @@
+import time
+from typing import Hashable, List, Optional, Tuple
+
+from catalogue import CatalogueSnapshot
+
+# Largest candidate pool a request may ask to re-rank
+MAX_CANDIDATES = 500
+
+
+class Reranker:
+    """Re-ranking stage run after scoring, on the best-scored candidates of a request.
+
+    ``candidates`` are (catalogue position, total score) pairs ranked best first.
+    ``rerank`` returns the indexes into ``candidates`` of the final recommendations
+    in order, and whether it gave up and fell back to the plain ranking.
+    Subclasses implement ``select``, which sees every candidate as its
+    (company, sector, location) values and its score, so candidates merged from
+    several catalogue shards are re-ranked the same way.
+    """
+
+    # Best-scored listings handed to the stage
+    candidates = 50
+
+    def pool_size(self, top_k: int) -> int:
+        return max(top_k, min(self.candidates, MAX_CANDIDATES))
+
+    def rerank(self, snapshot: CatalogueSnapshot, candidates: List[Tuple[int, float]],
+               top_k: int) -> Tuple[List[int], bool]:
+        # Companies are interned strings; sectors and locations compare by categorical value id
+        keys = snapshot.categorical_index.keys
+        features = [(snapshot.records[position].company, keys[position][0], keys[position][1])
+                    for position, _ in candidates]
+        return self.select(features, [score for _, score in candidates], top_k)
+
+    def select(self, features: List[Tuple[Hashable, Hashable, Hashable]], scores: List[float],
+               top_k: int) -> Tuple[List[int], bool]:
+        raise NotImplementedError
+
+
+class DiversityReranker(Reranker):
+    """Maximal marginal relevance over company, sector and location, with per-company caps.
+
+    Recommendations are picked greedily: each step takes the candidate with the
+    best ``relevance_weight * score - (1 - relevance_weight) * similarity``, where
+    the similarity to the listings already picked is the weighted share of equal
+    company, sector and location (the highest over the picked listings). Earlier
+    candidates win ties. A company already at ``max_per_company`` picks is skipped,
+    so fewer than ``top_k`` recommendations may be returned.
+
+    Each step updates the similarity of the remaining candidates with the listing
+    just picked, so a request costs O(top_k * candidates). When ``budget_ms`` runs
+    out, the plain score ranking is returned instead.
+    """
+
+    def __init__(self, relevance_weight: float = 0.7, company_weight: float = 1.0, sector_weight: float = 0.5,
+                 location_weight: float = 0.5, max_per_company: Optional[int] = None, candidates: int = 50,
+                 budget_ms: float = 5.0):
+        self.relevance_weight = relevance_weight
+        self.company_weight = company_weight
+        self.sector_weight = sector_weight
+        self.location_weight = location_weight
+        self.max_per_company = max_per_company
+        self.candidates = candidates
+        self.budget_ms = budget_ms
+
+    def select(self, features: List[Tuple[Hashable, Hashable, Hashable]], scores: List[float],
+               top_k: int) -> Tuple[List[int], bool]:
+        deadline = time.perf_counter() + self.budget_ms / 1000
+
+        weight_total = (self.company_weight + self.sector_weight + self.location_weight) or 1.0
+        company_weight = self.company_weight / weight_total
+        sector_weight = self.sector_weight / weight_total
+        location_weight = self.location_weight / weight_total
+        diversity_weight = 1.0 - self.relevance_weight
+
+        similarity = [0.0] * len(scores)
+        remaining = list(range(len(scores)))
+        picked: List[int] = []
+        per_company = {}
+
+        while remaining and len(picked) < top_k:
+            if time.perf_counter() > deadline:
+                return list(range(min(top_k, len(scores)))), True
+
+            best, best_value = remaining[0], None
+            for index in remaining:
+                value = self.relevance_weight * scores[index] - diversity_weight * similarity[index]
+                if best_value is None or value > best_value:
+                    best, best_value = index, value
+            picked.append(best)
+
+            company, sector, location = features[best]
+            per_company[company] = per_company.get(company, 0) + 1
+            capped = self.max_per_company is not None and per_company[company] >= self.max_per_company
+
+            still_remaining = []
+            for index in remaining:
+                if index == best:
+                    continue
+                other_company, other_sector, other_location = features[index]
+                if capped and other_company == company:
+                    continue
+                pair_similarity = company_weight * (other_company == company) + \
+                    sector_weight * (other_sector == sector) + location_weight * (other_location == location)
+                if pair_similarity > similarity[index]:
+                    similarity[index] = pair_similarity
+                still_remaining.append(index)
+            remaining = still_remaining
+
+        return picked, False
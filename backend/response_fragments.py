@@ -0,0 +1,86 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson only makes serialization faster; the output is the same
+    orjson = None
+
+from internship_store import InternshipRecord
+
+# Catalogue fields of a recommendation, in response order (match_score and match_reason follow)
+STATIC_FIELDS = ("id", "title", "company", "sector", "skills", "location", "duration", "stipend", "description",
+                 "requirements")
+
+# Internships whose serialized fields are kept
+FRAGMENT_CACHE_SIZE = 16384
+
+
+def dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON, byte-for-byte what FastAPI's JSONResponse writes"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FragmentCache:
+    """Pre-serialized static fields of recently recommended internships.
+
+    A fragment is the JSON of a recommendation up to its match fields
+    (``{"id":...,"requirements":[...],``) together with the serialized sector
+    used in ``match_reason``, so building a response splices bytes instead of
+    copying, validating and re-encoding the catalogue text on every request.
+    Entries are keyed by record object: records are immutable and an updated
+    listing gets a new one. The least recently used entries are evicted first.
+    """
+
+    def __init__(self, max_size: int = FRAGMENT_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries: "OrderedDict[InternshipRecord, Tuple[bytes, bytes]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, record: InternshipRecord,
+            materialize: Callable[[InternshipRecord], Dict[str, Any]]) -> Tuple[bytes, bytes]:
+        """(static fields prefix, serialized sector) of a record, serialized on first use"""
+        with self.lock:
+            fragment = self.entries.get(record)
+            if fragment is not None:
+                self.entries.move_to_end(record)
+                return fragment
+
+        internship = materialize(record)
+        fragment = (dumps({field: internship[field] for field in STATIC_FIELDS})[:-1] + b",",
+                    dumps(internship["sector"]))
+        with self.lock:
+            self.entries[record] = fragment
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return fragment
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+def render_recommendation(fragment: Tuple[bytes, bytes], match_score: float, matching_skills: List[str],
+                          sector_matched: bool, location_reason: Any) -> bytes:
+    """JSON of one recommendation: the cached static fields followed by its match fields"""
+    static, sector = fragment
+    return b"".join((static, b'"match_score":', dumps(match_score), b',"match_reason":{"skills":',
+                     dumps(matching_skills), b',"sector":', sector if sector_matched else b"null",
+                     b',"location":', dumps(location_reason), b"}}"))
+
+
+def recommendations_body(recommendations: List[bytes]) -> bytes:
+    """/recommend response without its processing time (the part that can be cached)"""
+    return b'{"recommendations":[%s],"total_matches":%d' % (b",".join(recommendations), len(recommendations))
+
+
+def body_result_count(body: bytes) -> int:
+    return int(body.rsplit(b":", 1)[1])
+
+
+def recommendation_response(body: bytes, processing_time: float) -> bytes:
+    """Complete /recommend response, as ``RecommendationResponse`` would serialize"""
+    return body + b',"processing_time":' + dumps(processing_time) + b"}"
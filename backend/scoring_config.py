@@ -0,0 +1,175 @@
+import copy
+import hashlib
+import json
+import os
+from types import MappingProxyType
+from typing import Any, Dict, Optional
+
+DEFAULT_SCORING_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "scoring.json")
+DEFAULT_MATCH_REASON = {"sector": 0.5, "same_location": 0.8, "nearby_location": 0.5}
+
+
+def _merged(base: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """``base`` with ``overrides`` applied; nested objects are merged key by key, anything else replaced"""
+    merged = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merged(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+class ScoringRules:
+    """One named scoring config compiled into an immutable object.
+
+    Weights, thresholds and per-rule scores become plain float attributes and
+    the lookup tables frozen mappings, built once per config file load. Scoring
+    code binds what it needs to locals, so the per-internship loops never look
+    anything up in the config.
+    """
+
+    __slots__ = ("name", "key", "rules",
+                 "skill_weight", "sector_weight", "location_weight", "education_weight", "age_weight", "min_score",
+                 "exact_share", "semantic_share", "keyword_share", "semantic_threshold",
+                 "substring_min_length", "substring_weight", "synonym_weight", "keyword_rule",
+                 "sector_match", "sector_related", "sector_other", "related_sectors",
+                 "location_same", "location_nearby", "location_other", "location_unspecified",
+                 "nearby_cities", "nearby_city_pairs",
+                 "education_equal", "education_higher", "education_lower", "education_default_level",
+                 "education_levels", "age_in_range", "age_out_of_range",
+                 "reason_sector", "reason_same_location", "reason_nearby_location")
+
+    def __init__(self, name: str, rules: Dict[str, Any], key: Optional[str] = None):
+        try:
+            self._compile(name, rules, key or name)
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            raise ValueError(f"Invalid scoring config '{name}': {e!r}") from e
+
+    def _compile(self, name: str, rules: Dict[str, Any], key: str):
+        def set_(attribute: str, value: Any):
+            object.__setattr__(self, attribute, value)
+
+        set_("name", name)
+        # Identifies these rules across reloads: equal keys score identically
+        set_("key", key)
+        set_("rules", copy.deepcopy(rules))
+
+        weights = rules["weights"]
+        set_("skill_weight", float(weights["skills"]))
+        set_("sector_weight", float(weights["sectors"]))
+        set_("location_weight", float(weights["location"]))
+        set_("education_weight", float(weights["education"]))
+        set_("age_weight", float(weights["age"]))
+        set_("min_score", float(rules["min_score"]))
+
+        skills = rules["skills"]
+        set_("exact_share", float(skills["exact"]))
+        set_("semantic_share", float(skills["semantic"]))
+        set_("keyword_share", float(skills["keyword"]))
+        set_("semantic_threshold", float(skills["semantic_threshold"]))
+        set_("substring_min_length", int(skills["substring_min_length"]))
+        set_("substring_weight", float(skills["substring_weight"]))
+        set_("synonym_weight", float(skills["synonym_weight"]))
+        # Everything the keyword weight of a skill pair depends on, for caches of those weights
+        set_("keyword_rule", (self.substring_min_length, self.substring_weight, self.synonym_weight))
+
+        sectors = rules["sectors"]
+        set_("sector_match", float(sectors["match"]))
+        set_("sector_related", float(sectors["related"]))
+        set_("sector_other", float(sectors["other"]))
+        set_("related_sectors", MappingProxyType(
+            {sector.lower(): frozenset(related.lower() for related in related_sectors)
+             for sector, related_sectors in sectors["related_sectors"].items()}))
+
+        location = rules["location"]
+        set_("location_same", float(location["same"]))
+        set_("location_nearby", float(location["nearby"]))
+        set_("location_other", float(location["other"]))
+        set_("location_unspecified", float(location["unspecified"]))
+        # Nearby cities are listed per major city and apply in both directions
+        pairs = frozenset(pair for city, nearby_cities in location["nearby_cities"].items()
+                          for nearby in nearby_cities for pair in ((city.lower(), nearby.lower()),
+                                                                   (nearby.lower(), city.lower())))
+        set_("nearby_city_pairs", pairs)
+        nearby: Dict[str, set] = {}
+        for city, other in pairs:
+            nearby.setdefault(city, set()).add(other)
+        set_("nearby_cities", MappingProxyType({city: frozenset(cities) for city, cities in nearby.items()}))
+
+        education = rules["education"]
+        set_("education_equal", float(education["equal"]))
+        set_("education_higher", float(education["higher"]))
+        set_("education_lower", float(education["lower"]))
+        set_("education_default_level", int(education["default_level"]))
+        set_("education_levels", MappingProxyType({level.lower(): int(rank)
+                                                   for level, rank in education["levels"].items()}))
+
+        age = rules["age"]
+        set_("age_in_range", float(age["in_range"]))
+        set_("age_out_of_range", float(age["out_of_range"]))
+
+        # Component scores above which a recommendation names its sector or location as a match reason.
+        # Config files written before these cut-offs were configurable keep the fixed ones they had.
+        match_reason = _merged(DEFAULT_MATCH_REASON, rules.get("match_reason", {}))
+        set_("reason_sector", float(match_reason["sector"]))
+        set_("reason_same_location", float(match_reason["same_location"]))
+        set_("reason_nearby_location", float(match_reason["nearby_location"]))
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("ScoringRules are immutable")
+
+    def __reduce__(self):
+        return ScoringRules, (self.name, self.rules, self.key)
+
+    def __repr__(self) -> str:
+        return f"ScoringRules({self.key!r})"
+
+
+class ScoringConfig:
+    """Named scoring rules loaded from a JSON config file.
+
+    The file holds a ``version``, the name of the ``default`` config and the
+    ``configs`` themselves. The default config must be complete; every other
+    config only lists what it changes and is merged over the default, which
+    keeps ranking variants for A/B tests short. A config is loaded as a whole
+    and replaced as a whole on reload.
+    """
+
+    def __init__(self, config: Dict[str, Any], path: Optional[str] = None, fingerprint: Optional[str] = None):
+        self.path = path
+        self.fingerprint = fingerprint or hashlib.sha1(
+            json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        self.version = str(config.get("version", self.fingerprint))
+        try:
+            self.default = config["default"]
+            configs = config["configs"]
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Scoring config needs a 'default' name and 'configs': {e!r}") from e
+        if self.default not in configs:
+            raise ValueError(f"Default scoring config '{self.default}' is not defined")
+
+        base = configs[self.default]
+        self.rules: Dict[str, ScoringRules] = {
+            name: ScoringRules(name, rules if name == self.default else _merged(base, rules),
+                               key=f"{self.fingerprint}:{name}")
+            for name, rules in configs.items()
+        }
+
+    @classmethod
+    def from_file(cls, path: str = None) -> "ScoringConfig":
+        path = path or os.getenv("SCORING_CONFIG_PATH", DEFAULT_SCORING_PATH)
+        with open(path, "rb") as f:
+            data = f.read()
+        return cls(json.loads(data), path=path, fingerprint=hashlib.sha1(data).hexdigest()[:16])
+
+    def get(self, name: Optional[str] = None) -> ScoringRules:
+        """Rules of the config called ``name`` (the default config when None)"""
+        rules = self.rules.get(name or self.default)
+        if rules is None:
+            raise ValueError(f"Unknown scoring config: {name}")
+        return rules
+
+    def summary(self) -> Dict[str, Any]:
+        return {"version": self.version, "fingerprint": self.fingerprint, "default": self.default,
+                "configs": sorted(self.rules)}
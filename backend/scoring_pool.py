@@ -0,0 +1,131 @@
+import asyncio
+import functools
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Type
+
+from metrics import LatencyHistogram, prometheus_histogram
+
+EXECUTOR_MODES = ("thread", "process", "inline")
+
+# Engine used by pool workers: the shared engine in thread mode, a per-process copy in process mode
+_engine = None
+
+
+class PoolSaturatedError(Exception):
+    """Raised when the scoring queue is full and a request should be retried later"""
+
+
+def _init_worker(engine_class: Type, engine_kwargs: Dict[str, Any], worker_setup: Optional[Callable] = None):
+    global _engine
+    _engine = engine_class(**engine_kwargs)
+    if worker_setup is not None:
+        worker_setup(_engine)
+
+
+def call_engine(method: str, *args, **kwargs) -> Any:
+    """Call an engine method in a worker; generators are materialized so results can cross processes"""
+    result = getattr(_engine, method)(*args, **kwargs)
+    if isinstance(result, Iterator):
+        result = list(result)
+    return result
+
+
+class ScoringPool:
+    """Runs CPU-bound engine calls off the asyncio event loop.
+
+    At most ``workers`` calls run at once and up to ``queue_depth`` more may wait;
+    beyond that ``call`` raises ``PoolSaturatedError`` so the API can answer 503
+    instead of queueing without bound. Modes:
+
+    - ``thread``: worker threads sharing the engine. Keeps the event loop (and
+      ``/health``) responsive, but scoring is still serialized by the GIL.
+    - ``process``: worker processes, each building its own engine, for parallel scoring.
+      ``worker_setup(engine)`` runs in each worker after its engine is built.
+    - ``inline``: score directly on the event loop (previous behaviour, for comparison).
+    """
+
+    def __init__(self, engine, workers: int = 4, queue_depth: int = 64, mode: str = "thread",
+                 engine_kwargs: Optional[Dict[str, Any]] = None, worker_setup: Optional[Callable] = None):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown scoring executor mode: {mode} (expected one of {', '.join(EXECUTOR_MODES)})")
+
+        global _engine
+        _engine = engine
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.queue_depth = max(0, queue_depth)
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        # Engine call latency per method, including time spent queued for a worker
+        self.latency: Dict[str, LatencyHistogram] = {}
+
+        self.executor: Optional[Executor] = None
+        if mode == "thread":
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scoring")
+        elif mode == "process":
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                initargs=(type(engine), engine_kwargs or {}, worker_setup))
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_depth
+
+    @property
+    def shares_engine(self) -> bool:
+        """Whether calls run against the caller's engine object (and may share its caches)"""
+        return self.mode != "process"
+
+    async def call(self, method: str, *args, **kwargs) -> Any:
+        """Run ``engine.<method>(*args, **kwargs)`` on the pool"""
+        if self.pending >= self.capacity:
+            self.rejected += 1
+            raise PoolSaturatedError(f"Scoring queue is full ({self.capacity} requests pending)")
+
+        self.pending += 1
+        start_time = time.perf_counter()
+        try:
+            if self.executor is None:
+                result = call_engine(method, *args, **kwargs)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(
+                    self.executor, functools.partial(call_engine, method, *args, **kwargs))
+            self.completed += 1
+            histogram = self.latency.get(method)
+            if histogram is None:
+                histogram = self.latency.setdefault(method, LatencyHistogram())
+            histogram.observe(time.perf_counter() - start_time)
+            return result
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "pending": self.pending,
+            "queued": max(0, self.pending - self.workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "latency": {method: histogram.summary() for method, histogram in self.latency.items()},
+        }
+
+    def prometheus(self) -> List[str]:
+        """Pool metrics in the Prometheus text exposition format"""
+        lines = []
+        for name, kind, help_text, value in (
+                ("scoring_pool_pending", "gauge", "Engine calls running or queued", self.pending),
+                ("scoring_pool_completed_total", "counter", "Engine calls completed", self.completed),
+                ("scoring_pool_rejected_total", "counter", "Engine calls rejected with 503", self.rejected)):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        lines += prometheus_histogram(
+            "scoring_pool_call_seconds", "Engine call latency per method, including time queued for a worker",
+            (({"method": method}, histogram) for method, histogram in self.latency.items()))
+        return lines
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
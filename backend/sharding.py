@@ -0,0 +1,46 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, List, Type
+
+# Engine of the shard held by this worker process
+_engine = None
+
+
+def _init_shard(engine_class: Type, engine_kwargs: Dict[str, Any]):
+    global _engine
+    _engine = engine_class(**engine_kwargs)
+
+
+def _call_shard(method: str, kwargs: Dict[str, Any]) -> Any:
+    return getattr(_engine, method)(**kwargs)
+
+
+class ShardPool:
+    """Catalogue shards held by worker processes, one process per shard.
+
+    Shard ``index`` of ``count`` is an engine over listings ``index``,
+    ``index + count``, ``index + 2 * count``... of the catalogue file, so every
+    shard gets a similar mix of listings. Shards map the same catalogue file
+    (and, with a snapshot path, their own engine snapshot files), so listing
+    text and column arrays are shared through the page cache instead of being
+    copied into each process. Calls run on every shard at once.
+    """
+
+    def __init__(self, engine_class: Type, engine_kwargs: Dict[str, Any], count: int):
+        self.count = count
+        self.executors = [
+            ProcessPoolExecutor(max_workers=1, initializer=_init_shard,
+                                initargs=(engine_class, dict(engine_kwargs, shards=1, shard=(index, count))))
+            for index in range(count)
+        ]
+
+    def submit_all(self, method: str, **kwargs) -> List[Future]:
+        """Start ``engine.<method>(**kwargs)`` on every shard"""
+        return [executor.submit(_call_shard, method, kwargs) for executor in self.executors]
+
+    def call_all(self, method: str, **kwargs) -> List[Any]:
+        """Results of ``engine.<method>(**kwargs)`` on every shard, in shard order"""
+        return [future.result() for future in self.submit_all(method, **kwargs)]
+
+    def shutdown(self):
+        for executor in self.executors:
+            executor.shutdown(wait=False, cancel_futures=True)
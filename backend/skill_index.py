@@ -0,0 +1,265 @@
+import bisect
+import math
+import re
+from collections import Counter
+from typing import List, Dict, Any, Tuple, Optional, Iterable
+
+from canonical import TermTable
+
+TOKEN_PATTERN = re.compile(r'\b\w+\b')
+
+# Candidate skills whose related catalogue skills are remembered per index
+RELATED_CACHE_SIZE = 4096
+
+
+def tokenize(text: str) -> List[str]:
+    """Split lowercased text into word tokens (same rules as the engine's text similarity)"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class SkillVector:
+    """Term-frequency vector of a single skill string with its precomputed norm"""
+
+    __slots__ = ("terms", "norm")
+
+    def __init__(self, text: str):
+        self.terms = Counter(tokenize(text))
+        self.norm = math.sqrt(sum(count * count for count in self.terms.values()))
+
+    def cosine(self, other: "SkillVector") -> float:
+        """Cosine similarity between two cached vectors"""
+        if self.norm == 0 or other.norm == 0:
+            return 0.0
+
+        # Iterate over the smaller vector, missing terms contribute nothing
+        small, large = (self.terms, other.terms) if len(self.terms) <= len(other.terms) else (other.terms, self.terms)
+        dot_product = sum(count * large[word] for word, count in small.items() if word in large)
+
+        return dot_product / (self.norm * other.norm)
+
+
+class SkillIndex:
+    """Skill index built once per catalogue.
+
+    Holds the lowercased skills of every internship with their term ids, a
+    cached term vector per distinct skill string and an inverted index from
+    token to the internships (and skill positions) containing it, so semantic
+    matching only visits internships that share at least one token with the
+    candidate profile. With a ``SkillSimilarity`` (see ``skill_similarity``)
+    semantic matching looks the similar catalogue skills of a candidate skill
+    up by id instead of comparing term vectors.
+    """
+
+    def __init__(self, internships: List[Optional[Dict[str, Any]]], terms: TermTable, similarity=None):
+        self.terms = terms
+        self.similarity = similarity
+        self.skills_lower: List[List[str]] = []
+        # Skill term ids of every internship, in listing order and as a set
+        self.skill_ids: List[Tuple[int, ...]] = []
+        self.skill_id_sets: List[frozenset] = []
+        self.vectors: Dict[str, SkillVector] = {}
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        # Skill id -> sorted positions of the internships listing it
+        self.skill_postings: Dict[int, List[int]] = {}
+        # (candidate skill, keyword rule) -> related catalogue skill ids, valid for this index's vocabulary only
+        self.related_cache: Dict[Tuple[str, tuple], Dict[int, float]] = {}
+
+        owned_tokens, owned_skills = set(), set()
+        for position, internship in enumerate(internships):
+            self.skills_lower.append([])
+            self.skill_ids.append(())
+            self.skill_id_sets.append(frozenset())
+            self._add(position, internship, owned_tokens, owned_skills)
+
+    def _add(self, position: int, internship: Optional[Dict[str, Any]], owned_tokens: set, owned_skills: set):
+        """Index one internship at ``position`` (``None`` marks a deleted listing)"""
+        if internship is None:
+            self.skills_lower[position] = []
+            self.skill_ids[position] = ()
+            self.skill_id_sets[position] = frozenset()
+            return
+
+        self.skill_ids[position] = tuple(self.terms.intern("skill", skill) for skill in internship['skills'])
+        self.skill_id_sets[position] = frozenset(self.skill_ids[position])
+        # Lowercased skills are the table's canonical strings, shared by every listing using them
+        skill_terms = self.terms.terms["skill"]
+        skills = self.skills_lower[position] = [skill_terms[skill_id] for skill_id in self.skill_ids[position]]
+
+        for skill_id in self.skill_id_sets[position]:
+            bisect.insort(self._owned_postings(self.skill_postings, skill_id, owned_skills), position)
+
+        for skill_position, skill in enumerate(skills):
+            for token in self.vector(skill).terms:
+                self._owned_postings(self.postings, token, owned_tokens).append((position, skill_position))
+
+    @staticmethod
+    def _owned_postings(postings: Dict[Any, list], key: Any, owned: set) -> list:
+        """Posting list of ``key`` that is safe to modify (copied once if shared with an older index)"""
+        if key not in owned:
+            postings[key] = list(postings.get(key, ()))
+            owned.add(key)
+        return postings[key]
+
+    def updated(self, internships: List[Optional[Dict[str, Any]]], positions: Iterable[int]) -> "SkillIndex":
+        """Copy-on-write update: a new index with the given catalogue positions re-indexed.
+
+        Only the posting lists of affected tokens are copied, so the current index
+        stays valid for requests still using it.
+        """
+        new = SkillIndex.__new__(SkillIndex)
+        new.terms = self.terms
+        new.similarity = self.similarity
+        new.skills_lower = list(self.skills_lower)
+        new.skill_ids = list(self.skill_ids)
+        new.skill_id_sets = list(self.skill_id_sets)
+        # Vectors are immutable and keyed by skill string, so the cache is shared
+        new.vectors = self.vectors
+        new.postings = dict(self.postings)
+        new.skill_postings = dict(self.skill_postings)
+        new.related_cache = {}
+        owned_tokens, owned_skills = set(), set()
+        positions = sorted(set(positions))
+
+        # Drop the postings of the previous versions of these listings, one pass per token
+        removed: Dict[str, set] = {}
+        for position in positions:
+            if position < len(new.skills_lower):
+                for skill in set(new.skills_lower[position]):
+                    for token in self.vector(skill).terms:
+                        removed.setdefault(token, set()).add(position)
+                for skill_id in new.skill_id_sets[position]:
+                    skill_postings = self._owned_postings(new.skill_postings, skill_id, owned_skills)
+                    del skill_postings[bisect.bisect_left(skill_postings, position)]
+                    if not skill_postings:
+                        del new.skill_postings[skill_id]
+                        owned_skills.discard(skill_id)
+        for token, removed_positions in removed.items():
+            postings = [posting for posting in new.postings.get(token, ()) if posting[0] not in removed_positions]
+            if postings:
+                new.postings[token] = postings
+                owned_tokens.add(token)
+            else:
+                new.postings.pop(token, None)
+
+        for position in positions:
+            if position >= len(new.skills_lower):
+                grow = position + 1 - len(new.skills_lower)
+                new.skills_lower.extend([] for _ in range(grow))
+                new.skill_ids.extend(() for _ in range(grow))
+                new.skill_id_sets.extend(frozenset() for _ in range(grow))
+            new._add(position, internships[position], owned_tokens, owned_skills)
+
+        return new
+
+    def vector(self, skill: str) -> SkillVector:
+        """Return the cached term vector for a lowercased skill string"""
+        vector = self.vectors.get(skill)
+        if vector is None:
+            vector = self.vectors[skill] = SkillVector(skill)
+        return vector
+
+    def related_skills(self, candidate_skill: str, synonyms, rules) -> Dict[int, float]:
+        """Ids of the catalogue skills that can give ``candidate_skill`` an exact or keyword match.
+
+        Mirrors the engine's keyword rules and maps each related skill to the
+        keyword weight of the pair under ``rules``: 0 for the equal skill (an
+        exact match), the substring weight when both skills are long enough and
+        one contains the other, and the synonym weight for a shared synonym group.
+        """
+        cache_key = (candidate_skill, rules.keyword_rule)
+        related = self.related_cache.get(cache_key)
+        if related is None:
+            min_length, substring_weight, synonym_weight = rules.keyword_rule
+            candidate_groups = synonyms.groups(candidate_skill)
+            skill_terms = self.terms.terms["skill"]
+            related = {}
+            for skill_id in self.skill_postings:
+                skill = skill_terms[skill_id]
+                if skill == candidate_skill:
+                    related[skill_id] = 0.0
+                elif len(candidate_skill) >= min_length and len(skill) >= min_length and \
+                        (candidate_skill in skill or skill in candidate_skill):
+                    related[skill_id] = substring_weight
+                elif candidate_groups and candidate_groups & synonyms.groups(skill):
+                    related[skill_id] = synonym_weight
+            if len(self.related_cache) >= RELATED_CACHE_SIZE:
+                self.related_cache.clear()
+            self.related_cache[cache_key] = related
+        return related
+
+    def related_positions(self, candidate_skills: List[str], synonyms, rules) -> set:
+        """Positions of internships with an exact or keyword match for any lowercased candidate skill"""
+        positions = set()
+        for candidate_skill in set(candidate_skills):
+            for skill_id in self.related_skills(candidate_skill, synonyms, rules):
+                positions.update(self.skill_postings[skill_id])
+        return positions
+
+    def semantic_matches(self, candidate_skills: List[str], threshold: float,
+                         positions: Optional[Iterable[int]] = None) -> Dict[int, float]:
+        """Semantic match totals per internship position for lowercased candidate skills.
+
+        For every candidate skill the first internship skill (in catalogue order)
+        with similarity above ``threshold`` is counted, exactly like the pairwise loop in
+        ``_calculate_skill_match_score``. Skill pairs without a shared token have
+        zero similarity, so only internships found through the similarity rows
+        (or the inverted index) are visited, restricted to ``positions`` when
+        given. Internships without any semantic match are left out.
+        """
+        if self.similarity is None or not self.similarity.covers(threshold):
+            return self._vector_semantic_matches(candidate_skills, threshold, positions)
+
+        totals: Dict[int, float] = {}
+        for candidate_skill in candidate_skills:
+            row = self.similarity.row(candidate_skill)
+            if not row:
+                continue
+
+            if positions is None:
+                visited = set()
+                for skill_id, similarity in row.items():
+                    if similarity > threshold:
+                        visited.update(self.skill_postings.get(skill_id, ()))
+            else:
+                visited = positions
+
+            for position in visited:
+                # The row never holds the candidate skill itself, so exact matches are skipped
+                for skill_id in self.skill_ids[position]:
+                    similarity = row.get(skill_id)
+                    if similarity is not None and similarity > threshold:
+                        totals[position] = totals.get(position, 0) + similarity
+                        break  # Only count the best match per candidate skill
+
+        return totals
+
+    def _vector_semantic_matches(self, candidate_skills: List[str], threshold: float,
+                                 positions: Optional[Iterable[int]] = None) -> Dict[int, float]:
+        """``semantic_matches`` comparing term vectors, for thresholds below the similarity rows' own"""
+        totals: Dict[int, float] = {}
+        allowed = None if positions is None else set(positions)
+
+        for candidate_skill in candidate_skills:
+            # Candidate vectors are not cached so user input cannot grow the index
+            candidate_vector = self.vectors.get(candidate_skill) or SkillVector(candidate_skill)
+
+            # Collect the skill positions that share a token, per internship
+            shared: Dict[int, set] = {}
+            for token in candidate_vector.terms:
+                for position, skill_position in self.postings.get(token, ()):
+                    if allowed is None or position in allowed:
+                        shared.setdefault(position, set()).add(skill_position)
+
+            for position, skill_positions in shared.items():
+                skills = self.skills_lower[position]
+                for skill_position in sorted(skill_positions):
+                    internship_skill = skills[skill_position]
+                    if candidate_skill == internship_skill:
+                        continue  # Skip exact matches
+
+                    similarity = candidate_vector.cosine(self.vectors[internship_skill])
+                    if similarity > threshold:  # Threshold for semantic match
+                        totals[position] = totals.get(position, 0) + similarity
+                        break  # Only count the best match per candidate skill
+
+        return totals
@@ -0,0 +1,283 @@
+"""Persistent sparse pairwise similarity between skills.
+
+Semantic skill matching compares skills by the cosine similarity of their word
+counts, and only pairs above the semantic threshold count. Those pairs are few
+and the same ones come up on every request, so they are precomputed into a
+sparse matrix: for every skill of a vocabulary, the other skills scoring above
+the threshold. The matrix is stored in CSR form (row offsets, column skill ids,
+similarities) and memory-mapped in place, so every worker on a host shares one
+copy through the page cache.
+
+Layout: magic, header length, JSON header (format, threshold, byte order and
+the skill vocabulary in id order), then the aligned int64 row offsets, int32
+column ids and float64 similarities.
+
+Build the matrix offline for the skills of a catalogue and the synonym table with:
+
+    python -m skill_similarity --data data/internships.jsonl --out data/internships.jsonl.similarity
+"""
+import argparse
+import array
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from canonical import TermTable, canonical_skill
+from skill_index import SkillVector
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_MAGIC = b"YSSKLSIM"
+SIMILARITY_FORMAT_VERSION = 1
+# Lowest similarity kept, the semantic threshold of the default scoring config
+DEFAULT_THRESHOLD = 0.6
+# Skills whose similarity rows are kept decoded
+ROW_CACHE_SIZE = 16384
+_HEADER_LENGTH = struct.Struct("<I")
+_ALIGNMENT = 8
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+class SimilarityMatrix:
+    """Read-only CSR matrix of the skill pairs of a vocabulary with similarity above ``threshold``.
+
+    Row ``i`` lists, by increasing id, the other vocabulary skills similar to
+    ``vocabulary[i]``, computed as ``SkillVector(vocabulary[i]).cosine(...)``
+    exactly like the scoring loops do. Arrays are ``array.array`` objects when
+    built and memoryviews over the file mapping when loaded.
+    """
+
+    def __init__(self, vocabulary: List[str], threshold: float, offsets, columns, values):
+        self.vocabulary = vocabulary
+        self.ids = {skill: skill_id for skill_id, skill in enumerate(vocabulary)}
+        self.threshold = threshold
+        self.offsets = offsets
+        self.columns = columns
+        self.values = values
+
+    @classmethod
+    def build(cls, skills: Iterable[str], threshold: float = DEFAULT_THRESHOLD) -> "SimilarityMatrix":
+        vocabulary = sorted({canonical_skill(skill) for skill in skills})
+        vectors = [SkillVector(skill) for skill in vocabulary]
+        # Skills sharing no token have zero similarity, so only token neighbours are compared
+        token_ids: Dict[str, List[int]] = {}
+        for skill_id, vector in enumerate(vectors):
+            for token in vector.terms:
+                token_ids.setdefault(token, []).append(skill_id)
+
+        offsets, columns, values = array.array("q", [0]), array.array("i"), array.array("d")
+        for skill_id, vector in enumerate(vectors):
+            related = {other_id for token in vector.terms for other_id in token_ids[token]}
+            related.discard(skill_id)
+            for other_id in sorted(related):
+                similarity = vector.cosine(vectors[other_id])
+                if similarity > threshold:
+                    columns.append(other_id)
+                    values.append(similarity)
+            offsets.append(len(columns))
+        return cls(vocabulary, threshold, offsets, columns, values)
+
+    def save(self, path: str):
+        header = json.dumps({"format": SIMILARITY_FORMAT_VERSION, "threshold": self.threshold,
+                             "byteorder": sys.byteorder, "entries": len(self.columns),
+                             "vocabulary": self.vocabulary}).encode("utf-8")
+        # Written under a temporary name and renamed, so concurrent readers never see a partial file
+        partial_path = f"{path}.{os.getpid()}.partial"
+        with open(partial_path, "wb") as f:
+            f.write(SIMILARITY_MAGIC)
+            f.write(_HEADER_LENGTH.pack(len(header)))
+            f.write(header)
+            for values in (self.offsets, self.columns, self.values):
+                f.write(b"\x00" * (_aligned(f.tell()) - f.tell()))
+                f.write(values.tobytes() if isinstance(values, array.array) else bytes(values))
+        os.replace(partial_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["SimilarityMatrix"]:
+        """Memory-map a saved matrix; None when it is missing or was written in another format"""
+        try:
+            with open(path, "rb") as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        if mapping[:len(SIMILARITY_MAGIC)] != SIMILARITY_MAGIC:
+            return None
+        start = len(SIMILARITY_MAGIC) + _HEADER_LENGTH.size
+        (length,) = _HEADER_LENGTH.unpack_from(mapping, len(SIMILARITY_MAGIC))
+        header = json.loads(bytes(mapping[start:start + length]))
+        if header.get("format") != SIMILARITY_FORMAT_VERSION or header.get("byteorder") != sys.byteorder:
+            return None
+
+        view = memoryview(mapping)
+        arrays, offset = [], start + length
+        for code, count in (("q", len(header["vocabulary"]) + 1), ("i", header["entries"]),
+                            ("d", header["entries"])):
+            offset = _aligned(offset)
+            end = offset + count * struct.calcsize(code)
+            arrays.append(view[offset:end].cast(code))
+            offset = end
+        return cls(header["vocabulary"], header["threshold"], *arrays)
+
+    def row(self, skill: str) -> Optional[List[Tuple[str, float]]]:
+        """(skill, similarity) pairs of a canonical skill, or None when it is not in the vocabulary"""
+        skill_id = self.ids.get(skill)
+        if skill_id is None:
+            return None
+        vocabulary, values = self.vocabulary, self.values
+        start, end = self.offsets[skill_id], self.offsets[skill_id + 1]
+        return [(vocabulary[other_id], values[index])
+                for index, other_id in enumerate(self.columns[start:end], start)]
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+
+class SkillSimilarity:
+    """Similarity rows of skills against the interned catalogue skills of a ``TermTable``.
+
+    ``row(skill)`` maps the ids of the catalogue skills similar to ``skill``
+    (above ``threshold``, the skill itself excluded) to their similarity. Pairs
+    of skills that are both in the persisted matrix are read from it; any other
+    pair, such as a skill added to the catalogue after the matrix was built or
+    a candidate skill it does not know, is computed lazily against the
+    catalogue skills sharing a token. Decoded rows are kept in a bounded cache
+    and extended when the catalogue gains skills, so a row is only ever
+    computed once per skill.
+
+    The table is shared by successive snapshots, like the ``TermTable`` it
+    indexes. Pickling keeps the matrix path only; the file is mapped again on load.
+    """
+
+    def __init__(self, terms: TermTable, matrix: Optional[SimilarityMatrix] = None, path: Optional[str] = None,
+                 threshold: float = DEFAULT_THRESHOLD, cache_size: int = ROW_CACHE_SIZE):
+        self.terms = terms
+        self.matrix = matrix
+        self.path = path
+        self.threshold = matrix.threshold if matrix is not None else threshold
+        self.cache_size = cache_size
+        self._reset()
+
+    def _reset(self):
+        self.lock = threading.Lock()
+        # Skill -> (number of catalogue skills covered, row)
+        self.rows: Dict[str, Tuple[int, Dict[int, float]]] = {}
+        # Term vectors, token postings and matrix coverage of the catalogue skills seen so far
+        self.vectors: List[SkillVector] = []
+        self.token_ids: Dict[str, List[int]] = {}
+        self.unmatrixed: set = set()
+
+    @classmethod
+    def for_store(cls, store, terms: TermTable) -> "SkillSimilarity":
+        """Similarity over ``terms`` backed by the matrix file of a catalogue, if it was built"""
+        path = os.getenv("SKILL_SIMILARITY_PATH", f"{store.path}.similarity")
+        matrix = SimilarityMatrix.load(path)
+        if matrix is None:
+            logger.info("No skill similarity matrix, rows are computed on first use", extra={"path": path})
+        return cls(terms, matrix, path)
+
+    def covers(self, threshold: float) -> bool:
+        """Whether rows hold every pair above ``threshold``"""
+        return threshold >= self.threshold
+
+    def row(self, skill: str) -> Dict[int, float]:
+        """Catalogue skill id -> similarity above ``threshold`` for a canonical skill"""
+        size = len(self.terms.terms["skill"])
+        cached = self.rows.get(skill)
+        if cached is not None and cached[0] == size:
+            return cached[1]
+
+        with self.lock:
+            self._sync(size)
+            start, row = cached if cached is not None else (0, {})
+            row = dict(row)
+            skill_ids, skill_terms = self.terms.ids["skill"], self.terms.terms["skill"]
+            skill_id = skill_ids.get(skill)
+            vector = self.vectors[skill_id] if skill_id is not None and skill_id < size else SkillVector(skill)
+
+            matrix_row = self.matrix.row(skill) if self.matrix is not None else None
+            if matrix_row is not None:
+                for other, similarity in matrix_row:
+                    other_id = skill_ids.get(other)
+                    if other_id is not None and start <= other_id < size:
+                        row[other_id] = similarity
+
+            # Pairs the matrix does not hold
+            for other_id in {other_id for token in vector.terms for other_id in self.token_ids.get(token, ())
+                             if start <= other_id < size and (matrix_row is None or other_id in self.unmatrixed)}:
+                if skill_terms[other_id] == skill:
+                    continue
+                similarity = vector.cosine(self.vectors[other_id])
+                if similarity > self.threshold:
+                    row[other_id] = similarity
+
+            if len(self.rows) >= self.cache_size:
+                self.rows.clear()
+            self.rows[skill] = (size, row)
+        return row
+
+    def _sync(self, size: int):
+        """Index the catalogue skills interned since the last call"""
+        skill_terms = self.terms.terms["skill"]
+        for skill_id in range(len(self.vectors), size):
+            skill = skill_terms[skill_id]
+            vector = SkillVector(skill)
+            self.vectors.append(vector)
+            for token in vector.terms:
+                self.token_ids.setdefault(token, []).append(skill_id)
+            if self.matrix is None or skill not in self.matrix.ids:
+                self.unmatrixed.add(skill_id)
+
+    def summary(self) -> Dict[str, Any]:
+        matrix = self.matrix
+        return {"threshold": self.threshold, "matrix_loaded": matrix is not None,
+                "matrix_skills": len(matrix.vocabulary) if matrix is not None else 0,
+                "matrix_entries": len(matrix) if matrix is not None else 0,
+                "skills_outside_matrix": len(self.unmatrixed), "cached_rows": len(self.rows)}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"terms": self.terms, "path": self.path, "threshold": self.threshold, "cache_size": self.cache_size}
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self.matrix = SimilarityMatrix.load(self.path) if self.path else None
+        if self.matrix is not None:
+            self.threshold = self.matrix.threshold
+        self._reset()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=None, help="Catalogue file (defaults to INTERNSHIPS_DATA_PATH)")
+    parser.add_argument("--out", required=True, help="Matrix file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Lowest similarity kept; scoring configs with a lower semantic threshold do not use it")
+    args = parser.parse_args()
+
+    from internship_store import InternshipStore
+    from synonyms import DEFAULT_SYNONYMS_PATH
+    store = InternshipStore(args.data)
+    skills = {skill for record in store.records for skill in record.skills}
+    # Synonym table skills are common candidate skills, so their rows are precomputed too
+    with open(os.getenv("SKILL_SYNONYMS_PATH", DEFAULT_SYNONYMS_PATH), encoding="utf-8") as f:
+        for base_skill, synonyms in json.load(f).items():
+            skills.add(base_skill)
+            skills.update(synonyms)
+
+    start_time = time.perf_counter()
+    matrix = SimilarityMatrix.build(skills, args.threshold)
+    matrix.save(args.out)
+    print(json.dumps({"skills": len(matrix.vocabulary), "entries": len(matrix), "threshold": matrix.threshold,
+                      "build_time": round(time.perf_counter() - start_time, 2)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Structured, non-blocking logging for the backend.
+
+Records are written as JSON lines (or plain text with ``LOG_FORMAT=text``).
+Callers only put records on an in-memory queue; a background listener thread
+formats and writes them, so logging never blocks the event loop on stdout.
+When the queue is full, records are dropped and counted instead of waiting.
+
+Every record logged while a request is handled carries its ``request_id``.
+"""
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+# Fields of the request being handled (request id, result count, ...), set by the request middleware
+request_context: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "request_context", default=None)
+
+# LogRecord attributes that are not structured fields
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def annotate_request(**fields):
+    """Add fields (e.g. ``result_count``) to the current request's log line"""
+    context = request_context.get()
+    if context is not None:
+        context.update(fields)
+
+
+class RequestContextFilter(logging.Filter):
+    """Copies the current request id onto records, in the thread that logs them"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = request_context.get()
+        if context is not None and not hasattr(record, "request_id"):
+            record.request_id = context.get("request_id")
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and any structured fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that never blocks: records are dropped (and counted) when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback now, but keep the structured fields for the formatter
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RequestLogSampler:
+    """Decides which requests get an access log line.
+
+    Failed and slow requests are always logged; other requests with
+    probability ``sample_rate``.
+    """
+
+    def __init__(self, sample_rate: float = 0.01, slow_seconds: float = 1.0):
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_seconds
+
+    def level(self, status: int, seconds: float) -> Optional[int]:
+        """Log level for a finished request, or None to skip it"""
+        if status >= 500 or seconds >= self.slow_seconds:
+            return logging.WARNING
+        if self.sample_rate >= 1.0 or (self.sample_rate > 0 and random.random() < self.sample_rate):
+            return logging.INFO
+        return None
+
+    @classmethod
+    def from_env(cls) -> "RequestLogSampler":
+        return cls(sample_rate=float(os.getenv("LOG_REQUEST_SAMPLE_RATE", "0.01")),
+                   slow_seconds=float(os.getenv("LOG_SLOW_REQUEST_MS", "1000")) / 1000)
+
+
+class LoggingSetup:
+    """Handlers installed on the root logger by ``configure_logging``"""
+
+    def __init__(self, handler: logging.Handler, output: logging.Handler, queue_size: int):
+        self.handler = handler
+        self.output = output
+        self.queue_size = queue_size
+        self.listener: Optional[logging.handlers.QueueListener] = None
+        if queue_size > 0:
+            self.start()
+
+    def start(self):
+        """Start writing queued records on a fresh queue and listener thread"""
+        self.handler.queue = queue.Queue(maxsize=self.queue_size)
+        self.listener = logging.handlers.QueueListener(self.handler.queue, self.output)
+        self.listener.start()
+
+    @property
+    def dropped(self) -> int:
+        return getattr(self.handler, "dropped", 0)
+
+    def stop(self):
+        """Flush queued records and stop the listener thread"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+
+# Setup installed by the latest configure_logging call
+_active_setup: Optional[LoggingSetup] = None
+
+
+def configure_logging(level: Optional[str] = None, log_format: Optional[str] = None,
+                      queue_size: Optional[int] = None, stream=None) -> LoggingSetup:
+    """Install structured logging on the root logger.
+
+    Reads ``LOG_LEVEL`` (default ``INFO``), ``LOG_FORMAT`` (``json`` or
+    ``text``) and ``LOG_QUEUE_SIZE`` (``0`` writes synchronously instead of
+    through the background queue).
+    """
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    log_format = (log_format or os.getenv("LOG_FORMAT", "json")).lower()
+    queue_size = int(os.getenv("LOG_QUEUE_SIZE", "10000")) if queue_size is None else queue_size
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    if log_format == "text":
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    else:
+        output.setFormatter(JsonFormatter())
+
+    handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size)) if queue_size > 0 else output
+    handler.addFilter(RequestContextFilter())
+    handler.structured = True
+
+    # Configuring again (e.g. in tests or benchmarks) replaces the previous handler
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        if getattr(existing, "structured", False):
+            root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    global _active_setup
+    if _active_setup is not None:
+        _active_setup.stop()
+    _active_setup = LoggingSetup(handler, output, queue_size)
+    return _active_setup
+
+
+def _restart_after_fork():
+    # Forked processes (e.g. scoring pool workers) do not inherit the listener thread
+    if _active_setup is not None and _active_setup.listener is not None:
+        _active_setup.start()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
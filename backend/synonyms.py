@@ -0,0 +1,104 @@
+import json
+import os
+from collections import deque
+from functools import lru_cache
+from typing import Any, List, Dict, FrozenSet
+
+DEFAULT_SYNONYMS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "skill_synonyms.json")
+
+# Synonyms longer than this are also matched as substrings of a skill
+MIN_SUBSTRING_LENGTH = 3
+
+
+class SubstringMatcher:
+    """Aho-Corasick automaton returning the groups of every pattern found in a text"""
+
+    def __init__(self, patterns: Dict[str, FrozenSet[int]]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[FrozenSet[int]] = [frozenset()]
+
+        # Build the trie
+        for pattern, groups in patterns.items():
+            state = 0
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(frozenset())
+                state = next_state
+            self.output[state] = self.output[state] | groups
+
+        # Breadth-first pass to set failure links and merge outputs
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] | self.output[self.fail[next_state]]
+
+    def search(self, text: str) -> FrozenSet[int]:
+        """Return the union of groups of all patterns occurring in text"""
+        found = frozenset()
+        state = 0
+        for char in text:
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            if self.output[state]:
+                found |= self.output[state]
+        return found
+
+
+class SynonymEngine:
+    """Skill synonym table compiled once into a reverse lookup.
+
+    A skill belongs to a base-skill group when it equals the base skill, equals
+    one of its synonyms, or contains a synonym longer than three characters.
+    ``groups`` maps a lowercased skill to the ids of all groups it belongs to,
+    so two skills are synonyms when their group sets intersect.
+    """
+
+    def __init__(self, skill_synonyms: Dict[str, List[str]], cache_size: int = 65536):
+        self.base_skills = list(skill_synonyms)
+        exact: Dict[str, set] = {}
+        substrings: Dict[str, set] = {}
+
+        for group, (base_skill, synonyms) in enumerate(skill_synonyms.items()):
+            exact.setdefault(base_skill, set()).add(group)
+            for synonym in synonyms:
+                exact.setdefault(synonym, set()).add(group)
+                if len(synonym) > MIN_SUBSTRING_LENGTH:
+                    substrings.setdefault(synonym, set()).add(group)
+
+        self.exact = {skill: frozenset(groups) for skill, groups in exact.items()}
+        self.matcher = SubstringMatcher({pattern: frozenset(groups) for pattern, groups in substrings.items()})
+        self.cache_size = cache_size
+        self.groups = lru_cache(maxsize=cache_size)(self._lookup_groups)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The memoized lookup is rebuilt (empty) when unpickled
+        state = dict(self.__dict__)
+        del state["groups"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self.groups = lru_cache(maxsize=self.cache_size)(self._lookup_groups)
+
+    @classmethod
+    def from_file(cls, path: str = None) -> "SynonymEngine":
+        """Load the synonym table from a JSON file mapping base skill to synonyms"""
+        path = path or os.getenv("SKILL_SYNONYMS_PATH", DEFAULT_SYNONYMS_PATH)
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _lookup_groups(self, skill: str) -> FrozenSet[int]:
+        return self.exact.get(skill, frozenset()) | self.matcher.search(skill)
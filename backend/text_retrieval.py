@@ -0,0 +1,274 @@
+"""Approximate nearest-neighbour retrieval over internship text.
+
+Internships are embedded with hashed TF-IDF features (word unigrams and
+bigrams of the title, sector, skills, description and requirements) into a
+fixed number of dimensions, with no model downloads. An IVF index (k-means
+coarse clusters with inverted lists) is persisted as ``.npy`` files and
+memory-mapped at startup. A query probes the clusters closest to the
+profile's text and returns a shortlist of catalogue positions for the
+engine's weighted scoring.
+
+Build the index offline for a catalogue file with:
+
+    python -m text_retrieval --data data/internships.jsonl --out data/ann_index
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import shutil
+import time
+import zlib
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only required for ANN retrieval
+    np = None
+
+from skill_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+DEFAULT_DIMENSIONS = 512
+DEFAULT_CANDIDATES = 200
+DEFAULT_NPROBE = 8
+# Vectors used to fit the k-means clusters
+KMEANS_SAMPLE_SIZE = 20000
+KMEANS_ITERATIONS = 12
+
+
+def internship_text(internship: Dict[str, Any]) -> str:
+    """Text embedded for a listing"""
+    parts = [internship.get("title", ""), internship.get("sector", ""), " ".join(internship.get("skills", [])),
+             internship.get("description", ""), " ".join(internship.get("requirements", []))]
+    return " ".join(str(part) for part in parts)
+
+
+def profile_text(skills: List[str], sectors: List[str]) -> str:
+    """Text embedded for a candidate profile"""
+    return " ".join(list(skills) + list(sectors))
+
+
+def text_features(text: str) -> Counter:
+    """Word unigram and bigram counts"""
+    tokens = tokenize(text)
+    features = Counter(tokens)
+    features.update(f"{first} {second}" for first, second in zip(tokens, tokens[1:]))
+    return features
+
+
+def hashed_counts(text: str, dimensions: int) -> Dict[int, float]:
+    """Signed feature hashing (stable across processes, unlike ``hash``) with sublinear term frequency"""
+    buckets: Dict[int, float] = {}
+    for feature, count in text_features(text).items():
+        digest = zlib.crc32(feature.encode("utf-8"))
+        bucket = digest % dimensions
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        buckets[bucket] = buckets.get(bucket, 0.0) + sign * (1.0 + math.log(count))
+    return buckets
+
+
+class TextRetriever:
+    """Two-stage retrieval shortlist over a memory-mapped IVF index.
+
+    Listings changed after the index was built are marked stale in the base
+    index and kept, re-embedded, in a small in-memory overflow that is always
+    searched exhaustively. Updates return a new retriever (copy-on-write),
+    like the other catalogue snapshot indexes.
+    """
+
+    def __init__(self, vectors, idf, centroids, list_offsets, list_positions, meta: Dict[str, Any],
+                 candidates: int = DEFAULT_CANDIDATES, nprobe: int = DEFAULT_NPROBE):
+        if np is None:
+            raise ImportError("numpy is required for ANN retrieval (pip install numpy)")
+        self.vectors = vectors
+        self.idf = idf
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_positions = list_positions
+        self.meta = meta
+        self.dimensions = int(meta["dimensions"])
+        self.candidates = candidates
+        self.nprobe = nprobe
+        # Positions changed since the index was built, and re-embedded live listings among them
+        self.stale = np.zeros(0, dtype=np.int64)
+        self.extra_positions = np.zeros(0, dtype=np.int64)
+        self.extra_vectors = np.zeros((0, self.dimensions), dtype=np.float32)
+
+    def embed(self, text: str):
+        """L2-normalized TF-IDF vector of ``text``"""
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for bucket, weight in hashed_counts(text, self.dimensions).items():
+            vector[bucket] = weight * self.idf[bucket]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    @classmethod
+    def build(cls, texts: Iterable[Optional[str]], version: str, dimensions: int = DEFAULT_DIMENSIONS,
+              seed: int = 7, **kwargs) -> "TextRetriever":
+        """Embed catalogue texts (``None`` for deleted listings) and cluster them into an IVF index"""
+        if np is None:
+            raise ImportError("numpy is required for ANN retrieval (pip install numpy)")
+        hashed = [hashed_counts(text, dimensions) if text is not None else None for text in texts]
+        size = len(hashed)
+
+        document_frequency = np.zeros(dimensions, dtype=np.float64)
+        for buckets in hashed:
+            if buckets:
+                document_frequency[list(buckets)] += 1
+        idf = (np.log((1.0 + size) / (1.0 + document_frequency)) + 1.0).astype(np.float32)
+
+        vectors = np.zeros((size, dimensions), dtype=np.float32)
+        for position, buckets in enumerate(hashed):
+            if buckets:
+                columns = np.fromiter(buckets.keys(), dtype=np.int64, count=len(buckets))
+                vectors[position, columns] = np.fromiter(buckets.values(), dtype=np.float32, count=len(buckets))
+        vectors *= idf
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+        live = np.flatnonzero(norms[:, 0] > 0)
+        centroids = cls._kmeans(vectors[live], max(1, int(math.sqrt(len(live)))), seed)
+        assignments = np.argmax(vectors[live] @ centroids.T, axis=1) if len(live) else np.zeros(0, dtype=np.int64)
+        order = np.argsort(assignments, kind="stable")
+        list_positions = live[order].astype(np.int64)
+        list_offsets = np.searchsorted(assignments[order], np.arange(len(centroids) + 1)).astype(np.int64)
+
+        meta = {"format": INDEX_FORMAT_VERSION, "version": version, "dimensions": dimensions,
+                "size": size, "lists": len(centroids)}
+        return cls(vectors, idf, centroids, list_offsets, list_positions, meta, **kwargs)
+
+    @staticmethod
+    def _kmeans(vectors, clusters: int, seed: int):
+        """Spherical k-means on a sample of the (normalized) vectors"""
+        rng = np.random.default_rng(seed)
+        if len(vectors) == 0:
+            return np.zeros((1, vectors.shape[1]), dtype=np.float32)
+        sample = vectors[rng.choice(len(vectors), min(len(vectors), KMEANS_SAMPLE_SIZE), replace=False)]
+        clusters = min(clusters, len(sample))
+        centroids = sample[rng.choice(len(sample), clusters, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their previous centroid
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids).astype(np.float32)
+        return centroids
+
+    def save(self, path: str):
+        # Written to a temporary sibling directory and swapped in, so concurrent readers never see a partial
+        # index; processes that memory-mapped the previous index keep reading its (unlinked) files
+        partial_path = f"{path}.{os.getpid()}.partial"
+        shutil.rmtree(partial_path, ignore_errors=True)
+        os.makedirs(partial_path)
+        for name in ("vectors", "idf", "centroids", "list_offsets", "list_positions"):
+            np.save(os.path.join(partial_path, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(partial_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+
+        # A directory cannot replace a non-empty one, so the previous index is moved aside first
+        previous_path = f"{path}.{os.getpid()}.previous"
+        shutil.rmtree(previous_path, ignore_errors=True)
+        try:
+            os.replace(path, previous_path)
+        except FileNotFoundError:
+            previous_path = None
+        os.replace(partial_path, path)
+        if previous_path:
+            shutil.rmtree(previous_path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path: str, version: Optional[str] = None, **kwargs) -> Optional["TextRetriever"]:
+        """Memory-map a saved index; None when it is missing or was built for another catalogue version"""
+        try:
+            with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("format") != INDEX_FORMAT_VERSION or (version is not None and meta.get("version") != version):
+            return None
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+                  for name in ("vectors", "idf", "centroids", "list_offsets", "list_positions")}
+        return cls(meta=meta, **arrays, **kwargs)
+
+    @classmethod
+    def for_snapshot(cls, version: str, texts: Callable[[], Iterable[Optional[str]]],
+                     index_path: Optional[str] = None) -> "TextRetriever":
+        """Load the persisted index for this catalogue version, or build (and try to save) it"""
+        kwargs = {"candidates": int(os.getenv("ANN_CANDIDATES", DEFAULT_CANDIDATES)),
+                  "nprobe": int(os.getenv("ANN_NPROBE", DEFAULT_NPROBE))}
+        if index_path:
+            retriever = cls.load(index_path, version, **kwargs)
+            if retriever is not None:
+                return retriever
+
+        start_time = time.perf_counter()
+        retriever = cls.build(texts(), version, **kwargs)
+        logger.info("Built ANN text index", extra={"internships": retriever.meta["size"],
+                                                   "build_s": round(time.perf_counter() - start_time, 2)})
+        if index_path:
+            try:
+                retriever.save(index_path)
+            except OSError as e:
+                logger.warning("Could not save ANN text index: %s", e)
+        return retriever
+
+    def updated(self, texts: Dict[int, Optional[str]]) -> "TextRetriever":
+        """Copy-on-write update with the new text of changed positions (``None`` for deletions)"""
+        new = TextRetriever.__new__(TextRetriever)
+        new.__dict__.update(self.__dict__)
+        changed = np.fromiter(texts.keys(), dtype=np.int64, count=len(texts))
+        new.stale = np.union1d(self.stale, changed)
+
+        keep = ~np.isin(self.extra_positions, changed)
+        live = [position for position, text in texts.items() if text is not None]
+        new.extra_positions = np.concatenate([self.extra_positions[keep], np.array(live, dtype=np.int64)])
+        new.extra_vectors = np.concatenate([
+            self.extra_vectors[keep],
+            np.array([self.embed(texts[position]) for position in live], dtype=np.float32).reshape(-1, self.dimensions),
+        ])
+        return new
+
+    def search(self, text: str) -> Optional[List[int]]:
+        """Catalogue positions of the listings closest to ``text``, or None when the text has no features"""
+        query = self.embed(text)
+        if not query.any():
+            return None
+
+        lists = np.argsort(-(self.centroids @ query), kind="stable")[:self.nprobe]
+        members = np.concatenate([self.list_positions[self.list_offsets[cluster]:self.list_offsets[cluster + 1]]
+                                  for cluster in lists])
+        if len(self.stale):
+            members = members[~np.isin(members, self.stale)]
+        positions = np.concatenate([members, self.extra_positions])
+        similarities = np.concatenate([self.vectors[members] @ query, self.extra_vectors @ query])
+
+        if len(positions) > self.candidates:
+            best = np.argpartition(-similarities, self.candidates - 1)[:self.candidates]
+            positions = positions[best]
+        return positions.tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=None, help="Catalogue file (defaults to INTERNSHIPS_DATA_PATH)")
+    parser.add_argument("--out", required=True, help="Index directory")
+    parser.add_argument("--dimensions", type=int, default=DEFAULT_DIMENSIONS)
+    args = parser.parse_args()
+
+    from internship_store import InternshipStore
+    store = InternshipStore(args.data)
+    start_time = time.perf_counter()
+    retriever = TextRetriever.build((internship_text(store.materialize(record)) for record in store.records),
+                                    store.fingerprint, dimensions=args.dimensions)
+    retriever.save(args.out)
+    print(json.dumps({**retriever.meta, "build_time": round(time.perf_counter() - start_time, 2)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+import copy
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple, Iterable, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only required for the vectorized scoring mode
+    np = None
+
+from skill_index import SkillVector
+
+
+class VectorizedScorer:
+    """Column-oriented scorer computing every internship score with array operations.
+
+    Internship features are kept as arrays: categorical ids for sector, location
+    and education (scored once per distinct value with the engine's scalar
+    rules), parsed min/max ages and a zero-padded skill-id matrix. Per-vocabulary
+    similarity and keyword tables are cached per candidate skill and rule, and all
+    float accumulation follows the same order as the scalar path so scores
+    are bit-for-bit identical.
+    """
+
+    def __init__(self, engine, records: List[Any], cache_size: int = 4096, similarity=None):
+        if np is None:
+            raise ImportError("numpy is required for vectorized scoring (pip install numpy)")
+
+        self.engine = engine
+        self.cache_size = cache_size
+        # Shared ``SkillSimilarity`` rows, used for thresholds they cover
+        self.similarity = similarity
+        self.size = len(records)
+
+        # Skill vocabulary; id 0 is the padding slot and maps to zero in every lookup
+        self.skill_vocab: List[Optional[str]] = [None]
+        self.skill_ids: Dict[str, int] = {}
+        self.vocab_vectors: List[Optional[SkillVector]] = [None]
+        # Token -> vocabulary ids, to find skills with non-zero similarity
+        self.token_vocab: Dict[str, List[int]] = {}
+        self._owned_tokens = set()
+
+        # Categorical columns, scored once per distinct value
+        self.sector_values: List[str] = []
+        self.location_values: List[str] = []
+        self.education_values: List[str] = []
+        self.value_ids: Dict[str, Dict[str, int]] = {"sector": {}, "location": {}, "education_level": {}}
+
+        width = max((len(record['skills']) for record in records if record is not None), default=0)
+        self.skill_matrix = np.zeros((self.size, width), dtype=np.int32)
+        self.first_occurrence = np.zeros((self.size, width), dtype=bool)
+        self.skill_counts = np.zeros(self.size, dtype=np.int64)
+        self.sector_ids = np.zeros(self.size, dtype=np.int32)
+        self.location_ids = np.zeros(self.size, dtype=np.int32)
+        self.education_ids = np.zeros(self.size, dtype=np.int32)
+        self.min_age = np.zeros(self.size, dtype=np.int64)
+        self.max_age = np.zeros(self.size, dtype=np.int64)
+        self.has_age_range = np.zeros(self.size, dtype=bool)
+        # Deleted catalogue positions (tombstones) are never recommended
+        self.alive = np.zeros(self.size, dtype=bool)
+
+        for position, record in enumerate(records):
+            self._set_row(position, record)
+
+        self._reset_caches()
+
+    def _reset_caches(self):
+        self._similarity_row = lru_cache(maxsize=self.cache_size)(self._build_similarity_row)
+        self._keyword_row = lru_cache(maxsize=self.cache_size)(self._build_keyword_row)
+
+    def _skill_id(self, skill: str) -> int:
+        skill_id = self.skill_ids.get(skill)
+        if skill_id is None:
+            skill_id = self.skill_ids[skill] = len(self.skill_vocab)
+            self.skill_vocab.append(skill)
+            vector = SkillVector(skill)
+            self.vocab_vectors.append(vector)
+            for token in vector.terms:
+                if token not in self._owned_tokens:
+                    # Copy lists shared with an older scorer before appending
+                    self.token_vocab[token] = list(self.token_vocab.get(token, ()))
+                    self._owned_tokens.add(token)
+                self.token_vocab[token].append(skill_id)
+        return skill_id
+
+    def _value_id(self, field: str, value: str, values: List[str]) -> int:
+        ids = self.value_ids[field]
+        value_id = ids.get(value)
+        if value_id is None:
+            value_id = ids[value] = len(values)
+            values.append(value)
+        return value_id
+
+    def _set_row(self, position: int, record: Any):
+        """Write one record (or a tombstone for ``None``) into the column arrays"""
+        self.skill_matrix[position] = 0
+        self.first_occurrence[position] = False
+        if record is None:
+            self.alive[position] = False
+            self.skill_counts[position] = 0
+            self.has_age_range[position] = False
+            return
+
+        skills = [self._skill_id(skill.lower()) for skill in record['skills']]
+        if len(skills) > self.skill_matrix.shape[1]:
+            extra = len(skills) - self.skill_matrix.shape[1]
+            self.skill_matrix = np.pad(self.skill_matrix, ((0, 0), (0, extra)))
+            self.first_occurrence = np.pad(self.first_occurrence, ((0, 0), (0, extra)))
+        seen = set()
+        for column, skill_id in enumerate(skills):
+            self.skill_matrix[position, column] = skill_id
+            if skill_id not in seen:
+                self.first_occurrence[position, column] = True
+                seen.add(skill_id)
+        self.skill_counts[position] = len(skills)
+
+        self.sector_ids[position] = self._value_id("sector", record['sector'], self.sector_values)
+        self.location_ids[position] = self._value_id("location", record['location'], self.location_values)
+        self.education_ids[position] = self._value_id("education_level", record['education_level'],
+                                                      self.education_values)
+        self.alive[position] = True
+
+        # Age ranges, parsed the same way as _calculate_age_match_score
+        self.has_age_range[position] = False
+        age_range = record['age_range']
+        if '-' in age_range:
+            try:
+                min_age, max_age = map(int, age_range.split('-'))
+            except ValueError:
+                return
+            self.min_age[position] = min_age
+            self.max_age[position] = max_age
+            self.has_age_range[position] = True
+
+    def updated(self, records: List[Any], positions: Iterable[int]) -> "VectorizedScorer":
+        """Copy-on-write update: a new scorer with the given catalogue positions rewritten.
+
+        Column arrays are copied (and grown for appended records) so the current
+        scorer stays valid for requests still using it. Candidate-skill caches are
+        kept unless the skill vocabulary grew.
+        """
+        new = copy.copy(self)
+        grow = len(records) - self.size
+        new.size = len(records)
+        for name in ("skill_matrix", "first_occurrence"):
+            array = getattr(self, name)
+            setattr(new, name, np.concatenate([array, np.zeros((grow, array.shape[1]), dtype=array.dtype)]))
+        for name in ("skill_counts", "sector_ids", "location_ids", "education_ids",
+                     "min_age", "max_age", "has_age_range", "alive"):
+            array = getattr(self, name)
+            setattr(new, name, np.concatenate([array, np.zeros(grow, dtype=array.dtype)]))
+
+        new.skill_vocab = list(self.skill_vocab)
+        new.skill_ids = dict(self.skill_ids)
+        new.vocab_vectors = list(self.vocab_vectors)
+        new.token_vocab = dict(self.token_vocab)
+        new._owned_tokens = set()
+        new.sector_values = list(self.sector_values)
+        new.location_values = list(self.location_values)
+        new.education_values = list(self.education_values)
+        new.value_ids = {field: dict(ids) for field, ids in self.value_ids.items()}
+
+        for position in positions:
+            new._set_row(position, records[position])
+
+        if len(new.skill_vocab) != len(self.skill_vocab):
+            new._reset_caches()
+        return new
+
+    def _build_similarity_row(self, candidate_skill: str, threshold: float) -> "np.ndarray":
+        """Similarity of one candidate skill to every vocabulary skill, zero unless above ``threshold``"""
+        row = np.zeros(len(self.skill_vocab))
+        if self.similarity is not None and self.similarity.covers(threshold):
+            skill_terms = self.similarity.terms.terms["skill"]
+            for term_id, similarity in self.similarity.row(candidate_skill).items():
+                skill_id = self.skill_ids.get(skill_terms[term_id])
+                if skill_id is not None and similarity > threshold:
+                    row[skill_id] = similarity
+            return row
+
+        candidate_vector = SkillVector(candidate_skill)
+        related = {skill_id for token in candidate_vector.terms for skill_id in self.token_vocab.get(token, ())}
+        for skill_id in related:
+            if self.skill_vocab[skill_id] == candidate_skill:
+                continue  # Skip exact matches
+            similarity = candidate_vector.cosine(self.vocab_vectors[skill_id])
+            if similarity > threshold:  # Threshold for semantic match
+                row[skill_id] = similarity
+        return row
+
+    def _build_keyword_row(self, candidate_skill: str, rules) -> "np.ndarray":
+        """Keyword contribution of one candidate skill against every vocabulary skill"""
+        row = np.zeros(len(self.skill_vocab))
+        for skill_id, internship_skill in enumerate(self.skill_vocab[1:], start=1):
+            row[skill_id] = self.engine._calculate_keyword_matches([candidate_skill], [internship_skill], rules)
+        return row
+
+    def _skill_scores(self, rules, candidate_skills: List[str]) -> "np.ndarray":
+        if not candidate_skills:
+            return np.zeros(self.size)
+
+        candidate_ids = np.zeros(len(self.skill_vocab), dtype=bool)
+        for skill in candidate_skills:
+            skill_id = self.skill_ids.get(skill)
+            if skill_id is not None:
+                candidate_ids[skill_id] = True
+
+        exact_matches = np.zeros(self.size, dtype=np.int64)
+        semantic_matches = np.zeros(self.size)
+        keyword_matches = np.zeros(self.size)
+        columns = [self.skill_matrix[:, column] for column in range(self.skill_matrix.shape[1])]
+
+        for column, skill_ids in enumerate(columns):
+            exact_matches += candidate_ids[skill_ids] & self.first_occurrence[:, column]
+
+        # Accumulate in candidate-skill then internship-skill order, like the scalar loops
+        for candidate_skill in candidate_skills:
+            similarity_row = self._similarity_row(candidate_skill, rules.semantic_threshold)
+            keyword_row = self._keyword_row(candidate_skill, rules)
+
+            found = np.zeros(self.size, dtype=bool)
+            best = np.zeros(self.size)
+            for skill_ids in columns:
+                similarity = similarity_row[skill_ids]
+                first_match = (similarity > 0) & ~found
+                best = np.where(first_match, similarity, best)
+                found |= first_match
+                keyword_matches += keyword_row[skill_ids]
+            semantic_matches += best
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            exact_score = (exact_matches / self.skill_counts) * rules.exact_share
+            semantic_score = (semantic_matches / self.skill_counts) * rules.semantic_share
+            keyword_score = (keyword_matches / self.skill_counts) * rules.keyword_share
+            scores = np.minimum(exact_score + semantic_score + keyword_score, 1.0)
+
+        return np.where(self.skill_counts > 0, scores, 0.0)
+
+    def age_scores(self, rules, age: str) -> "np.ndarray":
+        try:
+            candidate_age = int(age)
+        except (TypeError, ValueError):
+            return np.full(self.size, rules.age_out_of_range)
+        in_range = self.has_age_range & (self.min_age <= candidate_age) & (candidate_age <= self.max_age)
+        return np.where(in_range, rules.age_in_range, rules.age_out_of_range)
+
+    def sector_scores(self, rules, sectors: List[str]) -> "np.ndarray":
+        table = np.array([self.engine._calculate_sector_match_score(sectors, value, rules)
+                          for value in self.sector_values], dtype=float)
+        return table[self.sector_ids] if self.size else np.zeros(0)
+
+    def location_scores(self, rules, location: str) -> "np.ndarray":
+        table = np.array([self.engine._calculate_location_match_score(location, value, rules)
+                          for value in self.location_values], dtype=float)
+        return table[self.location_ids] if self.size else np.zeros(0)
+
+    def education_scores(self, rules, education: str) -> "np.ndarray":
+        table = np.array([self.engine._calculate_education_match_score(education, value, rules)
+                          for value in self.education_values], dtype=float)
+        return table[self.education_ids] if self.size else np.zeros(0)
+
+    def skill_scores(self, rules, skills: List[str]) -> "np.ndarray":
+        return self._skill_scores(rules, [skill.lower() for skill in skills])
+
+    def total_scores(self, rules, skill_score, sector_score, location_score, education_score,
+                     age_score) -> "np.ndarray":
+        total_score = (
+            skill_score * rules.skill_weight +
+            sector_score * rules.sector_weight +
+            location_score * rules.location_weight +
+            education_score * rules.education_weight +
+            age_score * rules.age_weight
+        )
+        return np.where(self.alive, total_score, 0.0)
+
+    def score(self, rules, age: str, education: str, skills: List[str],
+              sectors: List[str], location: str) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """Return (total, sector, location) score arrays for every internship under the scoring ``rules``"""
+        sector_score = self.sector_scores(rules, sectors)
+        location_score = self.location_scores(rules, location)
+        total_score = self.total_scores(rules, self.skill_scores(rules, skills), sector_score, location_score,
+                                        self.education_scores(rules, education), self.age_scores(rules, age))
+        return total_score, sector_score, location_score
+
+    def top_k(self, total_score: "np.ndarray", top_k: int, min_score: float) -> List[Tuple[int, float]]:
+        """Positions of the best internships above ``min_score``, ranked like the scalar path.
+
+        ``argpartition`` finds the k-th best raw score; every internship within
+        0.002 of it could round to the same ``match_score``, so those are ranked
+        with Python rounding and a stable sort to keep the catalogue-order
+        tie-breaking of the scalar path.
+        """
+        candidates = np.flatnonzero(total_score > min_score)
+        if 0 < top_k < len(candidates):
+            kth_best = total_score[candidates][np.argpartition(-total_score[candidates], top_k - 1)[top_k - 1]]
+            candidates = candidates[total_score[candidates] >= kth_best - 0.002]
+
+        ranked = [(int(position), round(float(total_score[position]) * 100, 1)) for position in candidates]
+        ranked.sort(key=lambda item: item[1], reverse=True)
+        return ranked[:top_k]
@@ -37,6 +37,43 @@ export interface RecommendationResponse {
     processing_time: number;
 }
 
+export interface Internship {
+    id: string;
+    title: string;
+    company: string;
+    sector: string;
+    skills: string[];
+    location: string;
+    duration: string;
+    stipend: string;
+    description: string;
+    requirements: string[];
+    education_level: string;
+    age_range: string;
+}
+
+export interface InternshipPageOptions {
+    // next_cursor of the previous page; omit for the first page
+    cursor?: string | null;
+    limit?: number;
+    // Only these fields are returned for each internship
+    fields?: (keyof Internship)[];
+    sector?: string;
+    location?: string;
+    education?: string;
+}
+
+export interface InternshipPage {
+    internships: Partial<Internship>[];
+    total: number;
+    // null on the last page; the server answers 410 once a cursor is stale (restart from the first page)
+    next_cursor: string | null;
+}
+
+export interface SessionRecommendationResponse extends RecommendationResponse {
+    session: string;
+}
+
 export interface SystemStats {
     total_internships: number;
     sectors: string[];
@@ -89,8 +126,48 @@ class ApiService {
         });
     }
 
-    async getAllInternships(): Promise<InternshipRecommendation[]> {
-        return this.makeRequest<InternshipRecommendation[]>("/internships");
+    // Profile sessions: after the first call, only the edited fields are sent and re-scored
+    async createProfileSession(
+        profile: CandidateProfile
+    ): Promise<SessionRecommendationResponse> {
+        return this.makeRequest<SessionRecommendationResponse>(
+            "/recommend/sessions",
+            {
+                method: "POST",
+                body: JSON.stringify({ profile }),
+            }
+        );
+    }
+
+    async updateProfileSession(
+        session: string,
+        changes: Partial<CandidateProfile>
+    ): Promise<SessionRecommendationResponse> {
+        return this.makeRequest<SessionRecommendationResponse>(
+            `/recommend/sessions/${encodeURIComponent(session)}`,
+            {
+                method: "PATCH",
+                body: JSON.stringify(changes),
+            }
+        );
+    }
+
+    async getInternshipsPage(
+        options: InternshipPageOptions = {}
+    ): Promise<InternshipPage> {
+        const params = new URLSearchParams();
+        if (options.cursor) params.set("cursor", options.cursor);
+        if (options.limit !== undefined)
+            params.set("limit", String(options.limit));
+        if (options.fields?.length)
+            params.set("fields", options.fields.join(","));
+        if (options.sector) params.set("sector", options.sector);
+        if (options.location) params.set("location", options.location);
+        if (options.education) params.set("education", options.education);
+        const query = params.toString();
+        return this.makeRequest<InternshipPage>(
+            `/internships${query ? `?${query}` : ""}`
+        );
     }
 
     async getStats(): Promise<SystemStats> {